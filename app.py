@@ -2,7 +2,24 @@ import dash
 from dash import Dash, html, dcc
 import dash_bootstrap_components as dbc
 
-app = Dash(__name__, use_pages=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
+from dashboard import compact, export, health, lazy, metrics, warmup
+
+# Page layouts are functions that load their data on first visit, so the
+# callbacks cannot be validated against them up front. With lazy pages the
+# pages folder is not scanned; see dashboard/lazy.py.
+app = Dash(__name__, use_pages=True, suppress_callback_exceptions=True,
+           pages_folder="" if lazy.ENABLED else "pages",
+           external_stylesheets=[dbc.themes.BOOTSTRAP])
+if lazy.ENABLED:
+    lazy.register(app)
+    lazy.install(app.server)
+compact.install(app)
+health.install(app.server)
+metrics.install(app.server)
+export.install(app.server)
+
+# WSGI entry point; see wsgi.py for production serving.
+server = app.server
 
 
 app.layout = html.Div([
@@ -15,6 +32,8 @@ app.layout = html.Div([
                         dcc.Link(
                             f"{page['name']}",
                             href=page["relative_path"],
+                            # A lazy page's callbacks reach the browser with a full page load.
+                            refresh=lazy.ENABLED,
                             style={
                                 'textDecoration': 'none',
                                 'color': '#007bff',
@@ -40,8 +59,10 @@ app.layout = html.Div([
 ])
 
 if __name__ == '__main__':
+    # Development server only; production uses gunicorn (see wsgi.py).
     import os
     # Set the port and host from environment variables or use defaults
     port = os.environ.get("PORT", 8080)  # Set default port if not specified
     host = os.environ.get("HOST", "0.0.0.0")  # Set default host if not specified
+    warmup.start()
     app.run(debug=False, port=port, host=host)
@@ -0,0 +1,235 @@
+// Figure builders for the clientside mode of the method comparison and
+// missingness pages (see dashboard/clientside.py). Each function receives the
+// data bundle of the selected app type plus the remaining dropdown values and
+// returns a Plotly figure equivalent to the server-side callback's.
+
+(function () {
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            methodTrends: function (bundle, methods, years, category, bands) {
+                if (!bundle) {
+                    return window.dash_clientside.no_update;
+                }
+                if (!years || !years.length || !methods || !methods.length) {
+                    return messageFigure(bundle, "⚠️ Please select year(s) and method(s).");
+                }
+
+                const daily = bundle.granularity === "daily";
+                const timeLabel = daily ? "Date" : "Month";
+                const keep = bundle.times.map(t => years.includes(parseInt(t.slice(0, 4), 10)));
+                const colorway = (bundle.template && bundle.template.colorway) || [];
+                const data = [];
+                const shaded = [];
+                bundle.methods.forEach(method => {
+                    const series = (bundle.series[method] || {})[category];
+                    if (!methods.includes(method) || !series) {
+                        return;
+                    }
+                    const {x, y} = seriesPoints(series, bundle.times, keep);
+                    if (y.every(v => v === null)) {
+                        return;
+                    }
+                    const color = colorway[data.length % Math.max(colorway.length, 1)];
+                    data.push({
+                        type: "scatter",
+                        mode: daily ? "lines" : "lines+markers",
+                        name: method,
+                        legendgroup: method,
+                        connectgaps: true,
+                        line: {color: color},
+                        marker: {color: color},
+                        x: x,
+                        y: y,
+                        hovertemplate: "method=" + method +
+                            "<br>" + timeLabel + "=%{x}<br>Relative Share (%)=%{y}<extra></extra>"
+                    });
+                    const band = !daily && bandEdges(bands, bundle.app_type, method, category, years);
+                    if (band) {
+                        shaded.push(bandTrace(method, band, color));
+                    }
+                });
+                if (!data.length) {
+                    return messageFigure(bundle, "⚠️ No data available for selected filters.");
+                }
+
+                return {
+                    // Bands first, so the lines are drawn on top.
+                    data: shaded.concat(data),
+                    layout: {
+                        template: bundle.template,
+                        title: {text: category + " – " + bundle.app_type + " Apps – Aggregation Method Comparison"},
+                        height: 600,
+                        legend: {title: {text: "Aggregation Method"}},
+                        xaxis: {title: {text: timeLabel}},
+                        yaxis: {title: {text: "Relative Share (%)"}, ticksuffix: "%"}
+                    }
+                };
+            },
+
+            missingness: function (bundle, years, countries, view) {
+                if (!bundle) {
+                    return window.dash_clientside.no_update;
+                }
+                years = years || [];
+                countries = countries || [];
+                if (view === "heatmap") {
+                    return missingnessHeatmap(bundle, years);
+                }
+
+                const data = [];
+                bundle.years.forEach(year => {
+                    if (!years.includes(year)) {
+                        return;
+                    }
+                    const x = [], y = [], customdata = [];
+                    bundle.countries.forEach(country => {
+                        const ratios = (bundle.ratios[String(year)] || {})[country];
+                        if (!countries.includes(country) || !ratios) {
+                            return;
+                        }
+                        ratios.forEach((v, i) => {
+                            if (v !== null) {
+                                x.push(bundle.rank_bins[i]);
+                                y.push(v);
+                                customdata.push([country]);
+                            }
+                        });
+                    });
+                    data.push({
+                        type: "bar",
+                        name: String(year),
+                        legendgroup: String(year),
+                        offsetgroup: String(year),
+                        x: x,
+                        y: y,
+                        customdata: customdata,
+                        hovertemplate: "Year=" + year + "<br>App Rank (Grouped by 10)=%{x}" +
+                            "<br>Unknown Classification (%)=%{y}<br>Country=%{customdata[0]}<extra></extra>"
+                    });
+                });
+
+                return {
+                    data: data,
+                    layout: {
+                        template: bundle.template,
+                        title: {text: "Unknown Classification by Rank Group and Year"},
+                        barmode: "group",
+                        legend: {title: {text: "Year"}},
+                        xaxis: {
+                            title: {text: "App Rank (Grouped by 10)"},
+                            tickangle: -45,
+                            categoryorder: "array",
+                            categoryarray: bundle.rank_bins
+                        },
+                        yaxis: {title: {text: "Unknown Classification (%)"}, ticksuffix: "%"}
+                    }
+                };
+            }
+        }
+    });
+
+    // Every country x rank group, averaged over the selected years.
+    function missingnessHeatmap(bundle, years) {
+        if (!years.length) {
+            return messageFigure(bundle, "⚠️ Please select a year.");
+        }
+        const z = bundle.countries.map(country => bundle.rank_bins.map((bin, i) => {
+            let sum = 0, count = 0;
+            years.forEach(year => {
+                const ratios = (bundle.ratios[String(year)] || {})[country];
+                if (ratios && ratios[i] !== null) {
+                    sum += ratios[i];
+                    count += 1;
+                }
+            });
+            return count ? sum / count : null;
+        }));
+        const selected = Array.from(new Set(years)).sort();
+        const period = selected.length === 1 ? String(selected[0]) : "mean of " + selected.length + " years";
+        return {
+            data: [{
+                type: "heatmap",
+                x: bundle.rank_bins,
+                y: bundle.countries.map(c => c.toUpperCase()),
+                z: z,
+                colorscale: "Reds",
+                colorbar: {title: {text: "Unknown (%)"}},
+                hovertemplate: "App Rank (Grouped by 10)=%{x}<br>Country=%{y}<br>Unknown (%)=%{z}<extra></extra>"
+            }],
+            layout: {
+                template: bundle.template,
+                title: {text: "Unknown Classification by Country and Rank Group (" + period + ")"},
+                height: Math.max(400, 22 * bundle.countries.length + 200),
+                xaxis: {title: {text: "App Rank (Grouped by 10)"}, tickangle: -45},
+                yaxis: {title: {text: "Country"}, autorange: "reversed"}
+            }
+        };
+    }
+
+    // Band of one method and category over the selected years, from the
+    // edges bundle of the app type; null if there is none.
+    function bandEdges(bands, appType, method, category, years) {
+        const edges = bands && bands.app_type === appType && (bands.edges[method] || {})[category];
+        if (!edges) {
+            return null;
+        }
+        const band = {x: [], lower: [], upper: []};
+        bands.times.forEach((t, i) => {
+            if (years.includes(parseInt(t.slice(0, 4), 10)) && edges.lower[i] !== null) {
+                band.x.push(t);
+                band.lower.push(edges.lower[i]);
+                band.upper.push(edges.upper[i]);
+            }
+        });
+        return band.x.length ? band : null;
+    }
+
+    // Points of the selected years, from a series aligned with the bundle's
+    // times (monthly) or from the steps between kept positions and their
+    // values, {gaps, y} (decimated daily).
+    function seriesPoints(series, times, keep) {
+        const x = [], y = [];
+        if (Array.isArray(series)) {
+            series.forEach((v, i) => {
+                if (keep[i]) {
+                    x.push(times[i]);
+                    y.push(v);
+                }
+            });
+        } else {
+            let i = 0;
+            series.gaps.forEach((gap, j) => {
+                i += gap;
+                if (keep[i]) {
+                    x.push(times[i]);
+                    y.push(series.y[j]);
+                }
+            });
+        }
+        return {x: x, y: y};
+    }
+
+    function bandTrace(method, band, color) {
+        let fillcolor = color;
+        if (/^#[0-9a-f]{6}$/i.test(color || "")) {
+            const rgb = [1, 3, 5].map(i => parseInt(color.slice(i, i + 2), 16));
+            fillcolor = "rgba(" + rgb.join(", ") + ", 0.2)";
+        }
+        return {
+            type: "scatter",
+            name: method + " (band)",
+            legendgroup: method,
+            showlegend: false,
+            hoverinfo: "skip",
+            fill: "toself",
+            fillcolor: fillcolor,
+            line: {width: 0},
+            x: band.x.concat(band.x.slice().reverse()),
+            y: band.upper.concat(band.lower.slice().reverse())
+        };
+    }
+
+    function messageFigure(bundle, text) {
+        return {data: [], layout: {template: bundle.template, title: {text: text}}};
+    }
+})();
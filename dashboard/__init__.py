@@ -0,0 +1 @@
+"""Shared support code for the pages in ``pages/``."""
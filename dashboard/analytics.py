@@ -0,0 +1,214 @@
+"""Rolling means, year-over-year changes and change points for share series.
+
+The RQ1 and RQ2 line charts can overlay three analyses of the plotted
+relative shares, computed for all categories together on a (time,
+category) array:
+
+``rolling``
+    trailing mean over ``ROLLING_WINDOW`` points (30 days or 3 months).
+``yoy``
+    change in percentage points against the same date one year earlier,
+    on a secondary y axis.
+``changes``
+    change points: times where the mean of the next ``CHANGE_WINDOW``
+    points differs from the mean of the previous ones by at least
+    ``CHANGE_THRESHOLD`` pooled standard deviations and
+    ``CHANGE_MIN_SHIFT`` points, keeping the strongest within a window.
+
+Results are kept per series (page, filters other than the years) together
+with running sums of the values. When a request extends the previous time
+range at the end, as when 2023 is added to [2022], only the new tail and
+the last window before it are computed. A request for a prefix of a stored
+range is sliced without computing anything. Any other change rebuilds the
+series.
+"""
+import collections
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from dashboard import data, decimate
+
+OVERLAYS = {"rolling": "Rolling mean", "yoy": "Year-over-year change", "changes": "Change points"}
+
+ROLLING_WINDOW = {"daily": 30, "monthly": 3}
+CHANGE_WINDOW = {"daily": 30, "monthly": 3}
+CHANGE_THRESHOLD = 2.0
+CHANGE_MIN_SHIFT = 0.5
+
+# Series kept per process
+MAX_SERIES = 64
+
+
+class Series:
+    """Shares of every category of one series on a (time, category) array, with their analyses."""
+
+    def __init__(self, granularity, times, classifications, values):
+        self.granularity = granularity
+        self.times = times
+        self.classifications = classifications
+        self.values = values
+        self._sums = _running(values)
+        self.rolling = np.full(values.shape, np.nan)
+        self.yoy = np.full(values.shape, np.nan)
+        self.score = np.full(values.shape, np.nan)
+        self._analyse(0)
+
+    def extend(self, times, values):
+        """Append later time points, recomputing only what the new points affect."""
+        old = len(self.times)
+        self.times = self.times.append(times)
+        self.values = np.vstack([self.values, values])
+        self._sums = tuple(np.vstack([s, s[-1] + r[1:]]) for s, r in zip(self._sums, _running(values)))
+        pad = np.full(values.shape, np.nan)
+        self.rolling, self.yoy, self.score = (np.vstack([a, pad]) for a in (self.rolling, self.yoy, self.score))
+        # The change score looks CHANGE_WINDOW points ahead, so the old tail moves too.
+        self._analyse(max(0, old - CHANGE_WINDOW[self.granularity]))
+
+    def head(self, n):
+        """View of the first ``n`` time points, as if the series ended there."""
+        view = object.__new__(Series)
+        view.granularity = self.granularity
+        view.times, view.classifications = self.times[:n], self.classifications
+        view.values, view.rolling, view.yoy = (a[:n] for a in (self.values, self.rolling, self.yoy))
+        view.score = self.score[:n]
+        if n < len(self.times):
+            # Scores of the last window looked past the end of the view.
+            view.score = view.score.copy()
+            view.score[max(0, n - CHANGE_WINDOW[self.granularity]):] = np.nan
+        return view
+
+    def change_points(self):
+        """(time index, category index) of the detected change points."""
+        score = np.abs(np.nan_to_num(self.score))
+        w = CHANGE_WINDOW[self.granularity]
+        padded = np.pad(score, ((w, w), (0, 0)))
+        local_max = np.lib.stride_tricks.sliding_window_view(padded, 2 * w + 1, axis=0).max(axis=-1)
+        return np.nonzero((score >= CHANGE_THRESHOLD) & (score == local_max))
+
+    def _analyse(self, start):
+        n = len(self.times)
+        total, squares, counts = self._sums
+        t = np.arange(start, n)
+
+        w = ROLLING_WINDOW[self.granularity]
+        lo = np.maximum(t + 1 - w, 0)
+        self.rolling[start:] = _mean(total, counts, lo, t + 1)
+
+        previous = self.times[start:] - pd.DateOffset(years=1)
+        found = self.times.get_indexer(previous)
+        yoy = self.values[start:] - self.values[np.maximum(found, 0)]
+        yoy[found < 0] = np.nan
+        self.yoy[start:] = yoy
+
+        w = CHANGE_WINDOW[self.granularity]
+        score = np.full((len(t), self.values.shape[1]), np.nan)
+        ok = (t >= w) & (t + w <= n)
+        if ok.any():
+            c = t[ok]
+            before, after = _mean(total, counts, c - w, c), _mean(total, counts, c, c + w)
+            var_before = _mean(squares, counts, c - w, c) - before ** 2
+            var_after = _mean(squares, counts, c, c + w) - after ** 2
+            spread = np.sqrt(np.maximum((var_before + var_after) / 2, 1e-12))
+            shift = after - before
+            score[ok] = np.where(np.abs(shift) >= CHANGE_MIN_SHIFT, shift / spread, 0)
+        self.score[start:] = score
+
+
+_series = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def analyse(key, agg, granularity):
+    """The :class:`Series` of the long-form shares ``agg`` stored under ``key``."""
+    times, classifications, values = _wide(agg)
+    key = (data.version(), granularity, *key)
+    with _lock:
+        series = _series.get(key)
+        if series is not None:
+            _series.move_to_end(key)
+            n = len(series.times)
+            if classifications.equals(series.classifications):
+                if len(times) <= n and times.equals(series.times[:len(times)]):
+                    return series.head(len(times))
+                if times[:n].equals(series.times):
+                    series.extend(times[n:], values[n:])
+                    return series.head(len(times))
+        series = _series[key] = Series(granularity, times, classifications, values)
+        while len(_series) > MAX_SERIES:
+            _series.popitem(last=False)
+        return series.head(len(times))
+
+
+def overlay(fig, series, overlays, x_range=None):
+    """Add the ``overlays`` of ``series`` to the line chart ``fig``, matching each category's colour."""
+    colors = {trace.name: trace.line.color for trace in fig.data}
+    if "rolling" in overlays:
+        fig.update_traces(opacity=0.35)
+    columns = [(k, str(c)) for k, c in enumerate(series.classifications) if str(c) in colors]
+
+    if "rolling" in overlays:
+        for k, name in columns:
+            x, y = _trace(series.times, series.rolling[:, k], x_range)
+            fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name=f"{name} (rolling)", legendgroup=name,
+                                     showlegend=False, line={"color": colors[name], "width": 2.5}))
+    if "yoy" in overlays:
+        for k, name in columns:
+            x, y = _trace(series.times, series.yoy[:, k], x_range)
+            fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name=f"{name} (YoY)", legendgroup=name,
+                                     showlegend=False, yaxis="y2",
+                                     line={"color": colors[name], "dash": "dot", "width": 1}))
+        fig.update_layout(yaxis2={"title": "YoY change (pp)", "overlaying": "y", "side": "right",
+                                  "showgrid": False, "zeroline": True})
+    if "changes" in overlays:
+        t, k = series.change_points()
+        for c, name in columns:
+            rows = t[k == c]
+            if x_range:
+                mask = (series.times[rows] >= pd.Timestamp(x_range[0])) & (series.times[rows] <= pd.Timestamp(x_range[1]))
+                rows = rows[mask]
+            if not len(rows):
+                continue
+            shift = series.score[rows, c]
+            fig.add_trace(go.Scatter(
+                x=series.times[rows], y=series.values[rows, c], mode="markers", name=f"{name} (change)",
+                legendgroup=name, showlegend=False,
+                marker={"color": colors[name], "symbol": np.where(shift > 0, "triangle-up", "triangle-down"),
+                        "size": 11, "line": {"width": 1, "color": "black"}},
+                hovertemplate=f"{name}<br>%{{x}}<br>shift: %{{customdata:+.1f}} sd<extra></extra>",
+                customdata=shift))
+    return fig
+
+
+def _wide(agg):
+    t, times = pd.factorize(agg["time"], sort=True)
+    k, classifications = pd.factorize(agg["classification"].astype(str), sort=True)
+    values = np.full((len(times), len(classifications)), np.nan)
+    values[t, k] = agg["relative_score"].to_numpy(dtype=float)
+    return pd.DatetimeIndex(times), pd.Index(classifications), values
+
+
+def _running(values):
+    """Cumulative sums of values, squares and counts, NaNs skipped, with a leading zero row."""
+    listed = ~np.isnan(values)
+    filled = np.where(listed, values, 0)
+    return tuple(np.vstack([np.zeros((1, values.shape[1])), np.cumsum(a, axis=0)])
+                 for a in (filled, filled ** 2, listed.astype(float)))
+
+
+def _mean(sums, counts, lo, hi):
+    n = counts[hi] - counts[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, (sums[hi] - sums[lo]) / n, np.nan)
+
+
+def _trace(times, values, x_range):
+    """Points of one overlay line, clipped to ``x_range`` and reduced like the chart's own lines."""
+    keep = ~np.isnan(values)
+    if x_range:
+        keep &= (times >= pd.Timestamp(x_range[0])) & (times <= pd.Timestamp(x_range[1]))
+    x, y = times[keep], values[keep]
+    rows = decimate.lttb(x.asi8, y, decimate.MAX_POINTS)
+    return x[rows], y[rows]
@@ -0,0 +1,264 @@
+"""Bootstrap confidence bands for the aggregation method comparison.
+
+A month's relative share of a category is its share of the scores summed
+over the month's days. To see how much that share depends on which days
+happened to be observed, the days of each month are resampled with
+replacement ``RESAMPLES`` times from the daily ``global_borda*_daily``
+files. All resamples of a month are drawn as one batch of multinomial day
+counts and applied to every app type and category with a single
+matrix product. The band is the central ``LEVEL`` percentile interval of the
+resampled shares, stored as offsets from the share of the observed days.
+It is drawn around the monthly estimate of the page.
+
+For Borda the observed-days share is the monthly estimate itself. For Mean
+and Median, the monthly files score the month's pooled apps, not its days,
+so the offsets are shifted onto that estimate.
+
+Work is split into one task per (method, month). A process pool of
+``DASHBOARD_BOOTSTRAP_WORKERS`` (default: one per CPU) runs them when the
+missing tasks add up to at least ``PARALLEL_MIN_RESAMPLES`` month resamples.
+Starting the pool takes longer than a few hundred tasks at the default
+resample count, so smaller batches run in the calling process. Each task is
+seeded from its method and month, so the bands do not depend on how the
+work was split. Results are written to ``data/.cache/bands/`` under the
+data version, and later requests in any worker read them from there.
+Build every month ahead of a deploy with::
+
+    python -m dashboard.bands --workers 8
+"""
+import argparse
+import concurrent.futures
+import functools
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from dashboard import cache, data, methods
+
+logger = logging.getLogger(__name__)
+
+RESAMPLES = int(os.environ.get("DASHBOARD_BOOTSTRAP_RESAMPLES", "1000"))
+LEVEL = 0.95
+SEED = 20240501
+
+WORKERS = int(os.environ.get("DASHBOARD_BOOTSTRAP_WORKERS", "0")) or os.cpu_count()
+PARALLEL_MIN_RESAMPLES = 500_000
+
+_bands = {}
+_lock = threading.Lock()
+
+
+def bootstrap_month(task):
+    """Worker: (lower, upper) share offsets of every (app_type, classification) for one month.
+
+    ``task`` is ``(method index, month, scores)`` with ``scores`` shaped
+    (app_type, classification, day).
+    """
+    m, month, scores = task
+    days = scores.shape[2]
+    rng = np.random.default_rng([SEED, m, month.year, month.month])
+    counts = rng.multinomial(days, np.full(days, 1 / days), size=RESAMPLES).astype(float)
+    sums = (counts @ scores.reshape(-1, days).T).reshape(RESAMPLES, *scores.shape[:2])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        resampled = sums / sums.sum(axis=2, keepdims=True)
+        observed = scores.sum(axis=2) / scores.sum(axis=(1, 2))[:, None]
+    tail = (1 - LEVEL) / 2 * 100
+    # NaN only for an app type without scores in the month, which stays NaN.
+    lower, upper = np.percentile(resampled, [tail, 100 - tail], axis=0)
+    # No band where a category has no score in the month.
+    listed = scores.sum(axis=2) > 0
+    return np.where(listed, lower - observed, np.nan), np.where(listed, upper - observed, np.nan)
+
+
+def select(selected, app_type, classification, years):
+    """Long-form (time, method, lower, upper) monthly bands for the selection."""
+    cube = methods.cube("monthly")
+    a = cube.app_types.get_indexer([app_type])[0]
+    c = cube.classifications.get_indexer([classification])[0]
+    t = np.flatnonzero(np.isin(cube.years, list(years)))
+    selected = [method for method in cube.methods if method in set(selected)]
+    if a < 0 or c < 0 or not len(t) or not selected:
+        return pd.DataFrame(columns=["time", "method", "lower", "upper"])
+
+    offsets = compute(selected, cube.times[t])
+    frames = []
+    for method in selected:
+        m = cube.methods.get_loc(method)
+        estimate = cube.values[m, a, c, t]
+        lower = np.array([offsets[method, month][0][a, c] for month in cube.times[t]])
+        upper = np.array([offsets[method, month][1][a, c] for month in cube.times[t]])
+        keep = ~np.isnan(estimate) & ~np.isnan(lower)
+        frames.append(pd.DataFrame({
+            "time": cube.times[t][keep],
+            "method": method,
+            "lower": (estimate + lower)[keep],
+            "upper": (estimate + upper)[keep],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def edges(app_type):
+    """(lower, upper) band edges of every method, category and month of ``app_type``.
+
+    Both are shaped (method, classification, time) as the monthly cube, with
+    NaN where there is no band. Used by the clientside page, which picks the
+    methods, category and years in the browser.
+    """
+    cube = methods.cube("monthly")
+    a = cube.app_types.get_loc(app_type)
+    offsets = compute(cube.methods, cube.times)
+    shape = (len(cube.methods), len(cube.classifications), len(cube.times))
+    lower, upper = np.full(shape, np.nan), np.full(shape, np.nan)
+    for m, method in enumerate(cube.methods):
+        for t, month in enumerate(cube.times):
+            lower[m, :, t], upper[m, :, t] = (edge[a] for edge in offsets[method, month])
+    estimate = cube.values[:, a]
+    return estimate + lower, estimate + upper
+
+
+def overlay(fig, rows):
+    """Shade the (lower, upper) band of each method of ``rows`` behind its line in ``fig``."""
+    colors = {trace.name: trace.line.color for trace in fig.data}
+    shaded = []
+    for method, group in rows.groupby("method", sort=False):
+        if method not in colors:
+            continue
+        shaded.append(go.Scatter(
+            x=np.concatenate([group["time"], group["time"][::-1]]),
+            y=np.concatenate([group["upper"], group["lower"][::-1]]),
+            fill="toself", fillcolor=_transparent(colors[method]), line={"width": 0},
+            name=f"{method} (band)", legendgroup=method, showlegend=False, hoverinfo="skip"))
+    lines = len(fig.data)
+    fig.add_traces(shaded)
+    # Bands first, so the lines are drawn on top.
+    fig.data = fig.data[lines:] + fig.data[:lines]
+    return fig
+
+
+def compute(selected, months, workers=None):
+    """``{(method, month): (lower, upper)}`` offsets, from memory, disk or a fresh bootstrap."""
+    version = data.version()
+    wanted = [(method, month) for method in selected for month in months]
+    with _lock:
+        if _bands.get("version") != version:
+            _bands.clear()
+            _bands["version"] = version
+        found = {key: _bands[key] for key in wanted if key in _bands}
+    directory = _directory(version)
+    for key in wanted:
+        if key not in found:
+            entry = _read(directory, *key)
+            if entry is not None:
+                found[key] = entry
+
+    missing = [key for key in wanted if key not in found]
+    if missing:
+        tasks = [_task(method, month) for method, month in missing]
+        for key, result in zip(missing, _run(tasks, workers)):
+            _write(directory, *key, result)
+            found[key] = result
+    with _lock:
+        if _bands.get("version") == version:
+            _bands.update(found)
+    return found
+
+
+@functools.cache
+def daily_scores(method):
+    """(days, scores) of ``method``, scores shaped (app_type, classification, day) as the monthly cube."""
+    cube = methods.cube("monthly")
+    df = methods._clean(data.global_scores(method, "daily"))
+    days = pd.DatetimeIndex(sorted(df["date"].unique()))
+    scores = np.zeros((len(cube.app_types), len(cube.classifications), len(days)))
+    a = cube.app_types.get_indexer(df["app_type"])
+    c = cube.classifications.get_indexer(df["classification"])
+    known = (a >= 0) & (c >= 0)
+    scores[a[known], c[known], days.get_indexer(df["date"])[known]] = df["score_borda"].to_numpy(dtype=float)[known]
+    return days, scores
+
+
+def _task(method, month):
+    days, scores = daily_scores(method)
+    in_month = (days.year == month.year) & (days.month == month.month)
+    return methods.METHODS.index(method), month, scores[:, :, in_month]
+
+
+def _run(tasks, workers=None):
+    workers = workers or WORKERS
+    empty = [task[2].shape[2] == 0 for task in tasks]
+    work = [task for task, skip in zip(tasks, empty) if not skip]
+    if workers > 1 and len(work) * RESAMPLES >= PARALLEL_MIN_RESAMPLES:
+        logger.info("bootstrapping %d months on %d workers", len(work), workers)
+        # Forking a threaded server process is unsafe; forkserver children are
+        # forked from a clean single-threaded process instead.
+        context = multiprocessing.get_context("forkserver")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            chunksize = max(1, len(work) // (4 * workers))
+            results = iter(list(pool.map(bootstrap_month, work, chunksize=chunksize)))
+    else:
+        results = iter([bootstrap_month(task) for task in work])
+    shape = tasks[0][2].shape[:2] if tasks else (0, 0)
+    nothing = (np.full(shape, np.nan), np.full(shape, np.nan))
+    return [nothing if skip else next(results) for skip in empty]
+
+
+def _transparent(color, alpha=0.2):
+    if isinstance(color, str) and color.startswith("#") and len(color) == 7:
+        r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+        return f"rgba({r}, {g}, {b}, {alpha})"
+    return color
+
+
+def _directory(version):
+    root = os.path.join(cache.cache_dir(data.DATA_DIR), "bands")
+    return os.path.join(root, f"{version}-{RESAMPLES}-{LEVEL}")
+
+
+def _path(directory, method, month):
+    return os.path.join(directory, f"{method.lower()}-{month:%Y-%m}.npz")
+
+
+def _read(directory, method, month):
+    try:
+        with np.load(_path(directory, method, month)) as entry:
+            return entry["lower"], entry["upper"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write(directory, method, month, result):
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            # Bands of older data versions are never read again.
+            root = os.path.dirname(directory)
+            for name in os.listdir(root):
+                if os.path.join(root, name) != directory:
+                    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        fd, tmp = cache.mkstemp(directory, ".npz")
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh, lower=result[0], upper=result[1])
+        os.replace(tmp, _path(directory, method, month))
+    except OSError as exc:
+        logger.warning("could not write bootstrap bands for %s %s: %s", method, month, exc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the bootstrap bands of every month.")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    months = methods.cube("monthly").times
+    found = compute(methods.METHODS, months, args.workers)
+    logger.info("%d (method, month) bands in %s", len(found), _directory(data.version()))
+
+
+if __name__ == "__main__":
+    main()
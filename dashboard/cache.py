@@ -0,0 +1,190 @@
+"""Binary columnar cache for the CSV files in ``data/``.
+
+Each parsed dataset is stored as one ``.npy`` file per column plus a JSON
+manifest under ``data/.cache/``. Loading memory-maps the column files, so
+every worker on a host reads the same pages from the OS page cache instead
+of parsing its own private copy of the CSV.
+
+Categorical and text columns are stored as integer codes with their
+categories in the manifest; datetime columns are stored as int64 ticks.
+
+A cache entry is valid while the source CSV keeps the size and mtime
+recorded in the manifest. When the mtime moves but the SHA-256 of the file
+is unchanged the manifest is refreshed without rebuilding.
+
+Build every entry ahead of time with::
+
+    python -m dashboard.cache
+"""
+import hashlib
+import json
+import logging
+import os
+import secrets
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+ENABLED = os.environ.get("DASHBOARD_CACHE", "1") != "0"
+
+def cache_dir(data_dir):
+    return os.environ.get("DASHBOARD_CACHE_DIR", os.path.join(data_dir, ".cache"))
+
+
+def load(name, source, parse, version, directory):
+    """Return dataset ``name`` from the cache, rebuilding it from ``source`` if stale.
+
+    ``parse`` turns the CSV at ``source`` into a DataFrame; ``version`` is
+    stored in the manifest so that changes to ``parse`` invalidate old
+    entries. If the cache directory is not writable the parsed frame is
+    returned uncached.
+    """
+    manifest = _valid_manifest(name, source, version, directory)
+    if manifest is not None:
+        return _read_entry(name, manifest, directory)
+
+    frame = parse()
+    try:
+        write(name, frame, source, version, directory)
+    except OSError as exc:
+        logger.warning("could not write cache entry for %s: %s", name, exc)
+        return frame
+    return _read_entry(name, _read_manifest(name, directory), directory)
+
+
+def write(name, frame, source, version, directory):
+    """Store ``frame`` as the cache entry for ``name``."""
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for col in frame.columns:
+        values, meta = _encode(frame[col])
+        _atomic_save(os.path.join(directory, _column_file(name, col)), values)
+        columns.append({"name": col, **meta})
+
+    stat = os.stat(source)
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "source": os.path.basename(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(source),
+        "rows": len(frame),
+        "columns": columns,
+    }
+    _write_manifest(name, manifest, directory)
+    logger.info("cached %s (%d rows) in %s", name, len(frame), directory)
+
+
+def file_hash(source):
+    digest = hashlib.sha256()
+    with open(source, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _valid_manifest(name, source, version, directory):
+    manifest = _read_manifest(name, directory)
+    if manifest is None:
+        return None
+    if manifest.get("format") != FORMAT_VERSION or manifest.get("version") != version:
+        return None
+
+    stat = os.stat(source)
+    if manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+        return manifest
+    if manifest["size"] != stat.st_size or manifest["sha256"] != file_hash(source):
+        return None
+
+    # Touched but unchanged: remember the new mtime and keep the entry.
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_manifest(name, manifest, directory)
+    except OSError:
+        pass
+    return manifest
+
+
+def _read_manifest(name, directory):
+    try:
+        with open(os.path.join(directory, f"{name}.json")) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def mkstemp(directory, suffix=""):
+    """Like :func:`tempfile.mkstemp`, but the file gets the mode of a normally created file.
+
+    ``tempfile.mkstemp`` creates files with mode 0600, so a cache built by a
+    deploy user would be unreadable to the service user. Here the kernel
+    applies the process umask to 0666, as for ``open(path, "w")``.
+    """
+    while True:
+        path = os.path.join(directory, f"tmp{secrets.token_hex(8)}{suffix}")
+        try:
+            return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), path
+        except FileExistsError:
+            continue
+
+
+def _write_manifest(name, manifest, directory):
+    fd, tmp = mkstemp(directory, ".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp, os.path.join(directory, f"{name}.json"))
+
+
+def _read_entry(name, manifest, directory):
+    data = {}
+    for meta in manifest["columns"]:
+        values = np.load(os.path.join(directory, _column_file(name, meta["name"])), mmap_mode="r")
+        data[meta["name"]] = _decode(values, meta)
+    return pd.DataFrame(data, copy=False)
+
+
+def _encode(series):
+    if (isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object
+            or pd.api.types.is_string_dtype(series.dtype)):
+        cat = series.astype("category")
+        return cat.cat.codes.to_numpy(), {
+            "kind": "category",
+            "categories": cat.cat.categories.tolist(),
+            "ordered": bool(cat.cat.ordered),
+        }
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series.to_numpy().view("i8"), {"kind": "datetime", "dtype": str(series.dtype)}
+    return series.to_numpy(), {"kind": "plain"}
+
+
+def _decode(values, meta):
+    if meta["kind"] == "category":
+        dtype = pd.CategoricalDtype(meta["categories"], ordered=meta["ordered"])
+        return pd.Categorical.from_codes(values, dtype=dtype)
+    if meta["kind"] == "datetime":
+        return values.view(meta["dtype"])
+    return values
+
+
+def _column_file(name, column):
+    return f"{name}.{column}.npy"
+
+
+def _atomic_save(target, values):
+    fd, tmp = mkstemp(os.path.dirname(target), ".npy.tmp")
+    with os.fdopen(fd, "wb") as fh:
+        np.save(fh, np.ascontiguousarray(values))
+    os.replace(tmp, target)
+
+
+if __name__ == "__main__":
+    from dashboard import data
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for dataset in data.DATASETS:
+        data.get(dataset)
@@ -0,0 +1,35 @@
+"""Clientside mode for the small pages.
+
+With ``DASHBOARD_CLIENTSIDE=1`` the method comparison and missingness pages
+fetch a compact data bundle for the selected app type once and build their
+figures in the browser (``assets/clientside.js``). Changing years, methods,
+categories or countries then never reaches the server. Without it the
+pages use their regular server-side callbacks.
+"""
+import functools
+import os
+
+import numpy as np
+import plotly.io as pio
+from dash import ClientsideFunction
+
+ENABLED = os.environ.get("DASHBOARD_CLIENTSIDE", "0") == "1"
+
+NAMESPACE = "dashboard"
+
+
+def function(name):
+    """Reference to ``window.dash_clientside.dashboard[name]``."""
+    return ClientsideFunction(namespace=NAMESPACE, function_name=name)
+
+
+@functools.cache
+def template():
+    """The layout template Plotly Express applies, so browser-built figures look the same."""
+    return pio.templates[pio.templates.default].layout.to_plotly_json()
+
+
+def values(array, decimals=4):
+    """``array`` as a JSON list, rounded, with NaN as null."""
+    array = np.round(np.asarray(array, dtype=float), decimals)
+    return [None if np.isnan(v) else v for v in array.tolist()]
@@ -0,0 +1,95 @@
+"""Smaller figure payloads and compressed callback responses.
+
+:func:`figure` rewrites a Plotly figure before it is serialised:
+
+* y values are sent as float32 typed arrays instead of float64,
+* datetime x values are sent as epoch milliseconds on a ``date`` axis
+  instead of ISO strings,
+* scatter traces become ``scattergl`` (WebGL) once the figure holds more
+  than ``WEBGL_POINTS`` points (``DASHBOARD_WEBGL_POINTS``, default 2000).
+
+:func:`install` turns on HTTP compression for the Flask server behind the
+Dash app (via ``flask-compress``) and records the raw and on-the-wire size
+of every ``_dash-update-component`` response per callback output; see
+:func:`payload_stats`.
+"""
+import collections
+import logging
+import os
+import threading
+
+import numpy as np
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+WEBGL_POINTS = int(os.environ.get("DASHBOARD_WEBGL_POINTS", "2000"))
+
+_payloads = collections.defaultdict(lambda: {"count": 0, "raw_bytes": 0, "wire_bytes": 0, "max_raw_bytes": 0})
+_lock = threading.Lock()
+
+
+def figure(fig):
+    """Return ``fig`` as a compact figure dict; dicts are passed through unchanged."""
+    if isinstance(fig, dict):
+        return fig
+
+    points = 0
+    date_axes = set()
+    for trace in fig.data:
+        x, y = getattr(trace, "x", None), getattr(trace, "y", None)
+        if isinstance(x, np.ndarray):
+            points += len(x)
+            if np.issubdtype(x.dtype, np.datetime64):
+                trace.x = x.astype("datetime64[ms]").astype("int64").astype("float64")
+                date_axes.add(trace.xaxis or "x")
+        if isinstance(y, np.ndarray) and y.dtype == np.float64:
+            trace.y = y.astype(np.float32)
+
+    for axis in date_axes:
+        fig.layout["xaxis" + axis[1:]].type = "date"
+
+    fig_dict = fig.to_plotly_json()
+    if points > WEBGL_POINTS:
+        for trace in fig_dict["data"]:
+            if trace.get("type") == "scatter":
+                trace["type"] = "scattergl"
+    return fig_dict
+
+
+def install(app):
+    """Enable response compression and payload accounting on ``app.server``."""
+    server = app.server
+    # after_request hooks run in reverse order of registration: the raw size
+    # is recorded before compression and the wire size after it.
+    server.after_request(_record("wire_bytes"))
+    try:
+        from flask_compress import Compress
+    except ImportError:
+        logger.warning("flask-compress is not installed; responses are not compressed")
+    else:
+        Compress(server)
+    server.after_request(_record("raw_bytes"))
+
+
+def payload_stats():
+    """Response sizes per callback output since start-up."""
+    with _lock:
+        return {output: dict(entry) for output, entry in _payloads.items()}
+
+
+def _record(field):
+    def hook(response):
+        if request.path.endswith("_dash-update-component"):
+            body = request.get_json(silent=True) or {}
+            size = response.content_length
+            if size is None:
+                size = len(response.get_data())
+            with _lock:
+                entry = _payloads[body.get("output", "?")]
+                entry[field] += size
+                if field == "raw_bytes":
+                    entry["count"] += 1
+                    entry["max_raw_bytes"] = max(entry["max_raw_bytes"], size)
+        return response
+    return hook
@@ -0,0 +1,117 @@
+"""Relative Borda shares of every country at once, for the cross-country page.
+
+For a (granularity, app_type, year) the rows of all countries are stacked
+and summed into one (country, time, classification) array with a single
+``np.add.at``, then normalised over the classification axis. This gives
+every country's shares in one vectorised pass instead of one groupby per
+country. "Unknown" is excluded, as on RQ2. Arrays are cached per
+(granularity, app_type, year) and data version, and multi-year selections
+are joined along the time axis.
+
+With the consolidated store (:mod:`dashboard.store`) a year is read in one
+filtered scan. Otherwise each country's file comes from the frame cache of
+:mod:`dashboard.countries`.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from dashboard import countries, data, shares, store
+
+
+class CountryCube:
+    def __init__(self, countries, times, classifications, values):
+        self.countries = countries
+        self.times = times
+        self.classifications = classifications
+        self.values = values
+
+    def period_means(self):
+        """(country, classification) mean share over the whole period, NaN where never listed."""
+        listed = ~np.isnan(self.values)
+        counts = listed.sum(axis=1)
+        sums = np.where(listed, self.values, 0).sum(axis=1)
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    def long(self):
+        """Long-form (country, time, classification, relative_score) rows, NaNs dropped."""
+        keep = ~np.isnan(self.values)
+        c, t, k = np.nonzero(keep)
+        return pd.DataFrame({
+            "country": self.countries[c],
+            "time": self.times[t],
+            "classification": self.classifications[k],
+            "relative_score": self.values[keep],
+        })
+
+
+def empty():
+    return CountryCube(pd.Index([]), pd.DatetimeIndex([]), pd.Index([]), np.zeros((0, 0, 0)))
+
+
+def year_cube(granularity, app_type, year):
+    """Shares of every country with data for ``app_type`` in ``year``."""
+    return _year_cube(data.version(), granularity, app_type, year)
+
+
+@functools.lru_cache(maxsize=64)
+def _year_cube(version, granularity, app_type, year):
+    df = _rows(app_type, year)
+    if df.empty:
+        return empty()
+    time_col = "date" if granularity == "daily" else "month"
+    df = df[df["classification"].astype(str) != shares.UNKNOWN]
+
+    c, country_index = pd.factorize(df["country"].astype(str), sort=True)
+    t, times = pd.factorize(df[time_col], sort=True)
+    k, classifications = pd.factorize(df["classification"].astype(str), sort=True)
+    sums = np.zeros((len(country_index), len(times), len(classifications)))
+    np.add.at(sums, (c, t, k), df["score_borda"].to_numpy(dtype=float))
+
+    # A country without rows at a time point has no shares there, not zeros.
+    listed = np.zeros(sums.shape, dtype=bool)
+    listed[c, t, k] = True
+    totals = sums.sum(axis=2, keepdims=True)
+    values = np.where(listed & (totals > 0), sums / np.where(totals > 0, totals, 1) * 100, np.nan)
+    return CountryCube(pd.Index(country_index), pd.DatetimeIndex(times), pd.Index(classifications), values)
+
+
+def select(granularity, app_type, years):
+    """Shares of every country over ``years``, joined along the time axis."""
+    cubes = [year_cube(granularity, app_type, y) for y in sorted(set(years))]
+    cubes = [cube for cube in cubes if len(cube.countries)]
+    if not cubes:
+        return empty()
+    if len(cubes) == 1:
+        return cubes[0]
+
+    all_countries = functools.reduce(lambda a, b: a.union(b), [cube.countries for cube in cubes])
+    classifications = functools.reduce(lambda a, b: a.union(b), [cube.classifications for cube in cubes])
+    blocks = []
+    for cube in cubes:
+        block = np.full((len(all_countries), len(cube.times), len(classifications)), np.nan)
+        block[np.ix_(all_countries.get_indexer(cube.countries), np.arange(len(cube.times)),
+                     classifications.get_indexer(cube.classifications))] = cube.values
+        blocks.append(block)
+    times = cubes[0].times.append([cube.times for cube in cubes[1:]])
+    return CountryCube(all_countries, times, classifications, np.concatenate(blocks, axis=1))
+
+
+def app_types():
+    return sorted({a for entry in countries.index().values() for a in entry["app_types"]})
+
+
+def _rows(app_type, year):
+    if countries.from_store():
+        return store.read(years=[year], app_type=app_type, columns=[*store.COLUMNS, "country"])
+    frames = []
+    for (country, y) in sorted(countries.index()):
+        if y != year:
+            continue
+        df = countries.frame(country, year, app_type)
+        if df is not None and len(df):
+            frames.append(df.assign(country=country))
+    if not frames:
+        return pd.DataFrame(columns=["country", "date", "month", "classification", "score_borda"])
+    return pd.concat(frames, ignore_index=True)
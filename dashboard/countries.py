@@ -0,0 +1,216 @@
+"""Index and frame cache for the per-country files in ``data/by_country_year``.
+
+The index lists every ``{country}_{year}.csv`` with the app types it
+contains. It is persisted next to the binary cache so a restart only
+re-reads files whose size or mtime changed, and after the first call the
+dropdown callbacks are answered from memory.
+
+Parsed frames are kept in a per-process LRU bounded by
+``DASHBOARD_COUNTRY_CACHE_MB`` (default 128), so each file is read at most
+once per process as long as it stays resident. :func:`country_cube` keeps
+the relative shares computed from them. The index, frames and shares are
+dropped whenever :func:`dashboard.data.version` changes, so replaced or
+appended files are picked up without a restart.
+
+When the consolidated store of :mod:`dashboard.store` has been built from
+the current CSV files, the index comes from the store and frames are read
+from it with the country, year and app type pushed down to the Parquet
+scan.
+"""
+import collections
+import functools
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from dashboard import cache, data, shares, store
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.join(data.DATA_DIR, "by_country_year")
+
+MAX_BYTES = int(float(os.environ.get("DASHBOARD_COUNTRY_CACHE_MB", "128")) * 1e6)
+
+_index = None
+_index_version = None
+_from_store = False
+_frames = collections.OrderedDict()
+_frame_bytes = 0
+_lock = threading.Lock()
+
+
+def index():
+    """Mapping of (country, year) to ``{"path", "app_types"}``."""
+    global _index, _index_version
+    version = data.version()
+    current = _index
+    if current is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _clear()
+                _index, _index_version = _build_index(), version
+            current = _index
+    return current
+
+
+def refresh():
+    """Forget the in-memory index, cached frames and shares, e.g. after adding files."""
+    with _lock:
+        _clear()
+
+
+def from_store():
+    """Whether the index, and so :func:`frame`, reads the consolidated store."""
+    index()
+    return _from_store
+
+
+def countries():
+    return sorted({country for country, _ in index()})
+
+
+def years():
+    return sorted({year for _, year in index()})
+
+
+def app_types(country, selected_years):
+    """App types present for ``country`` in any of ``selected_years``."""
+    found = set()
+    for year in selected_years:
+        entry = index().get((country, year))
+        if entry is not None:
+            found.update(entry["app_types"])
+    return sorted(found)
+
+
+def frame(country, year, app_type=None):
+    """Parsed rows for ``country`` and ``year``, or None if there is no such data.
+
+    With ``app_type`` set only that app type's rows are returned.
+    """
+    global _frame_bytes
+    # First, so frames of an older data version are dropped.
+    entry = index().get((country, year))
+    key = (country, year, app_type)
+    with _lock:
+        if key in _frames:
+            _frames.move_to_end(key)
+            return _frames[key][0]
+
+    if entry is None:
+        return None
+    if entry["path"] is None:
+        df = _read_store(country, year, app_type)
+    else:
+        df = _read(entry["path"])
+        if app_type is not None:
+            df = df[df["app_type"] == app_type].reset_index(drop=True)
+    size = int(df.memory_usage(deep=True).sum())
+
+    with _lock:
+        if key not in _frames:
+            _frames[key] = (df, size)
+            _frame_bytes += size
+            while _frame_bytes > MAX_BYTES and len(_frames) > 1:
+                _, (_, evicted) = _frames.popitem(last=False)
+                _frame_bytes -= evicted
+        return _frames[key][0]
+
+
+def country_cube(country, year, app_type, granularity):
+    """Relative shares of one country, year and app type, as :func:`dashboard.shares.build_cube` blocks."""
+    return _country_cube(data.version(), country, year, app_type, granularity)
+
+
+@functools.lru_cache(maxsize=256)
+def _country_cube(version, country, year, app_type, granularity):
+    df = frame(country, year, app_type)
+    if df is None:
+        return {}
+    return shares.build_cube(df, "date" if granularity == "daily" else "month")
+
+
+def _clear():
+    global _index, _frame_bytes
+    _index = None
+    _frames.clear()
+    _frame_bytes = 0
+    _country_cube.cache_clear()
+
+
+def _read(path):
+    df = pd.read_csv(path, dtype={"app_type": "category", "classification": "category"})
+    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d")
+    df["month"] = pd.to_datetime(df["month"].astype(str))
+    df["year"] = df["date"].dt.year
+    return df
+
+
+def _read_store(country, year, app_type):
+    df = store.read(country=country, years=[year], app_type=app_type)
+    df["year"] = df["date"].dt.year
+    return df
+
+
+def _build_index():
+    global _from_store
+    _from_store = store.available() and store.current()
+    if _from_store:
+        return {
+            (country, year): {"path": None, "app_types": app_types}
+            for country, years in store.index().items()
+            for year, app_types in years.items()
+        }
+    if store.available():
+        logger.warning("%s changed since %s was built; reading the CSV files until the store is "
+                       "rebuilt with python -m dashboard.store", BASE_DIR, store.STORE_DIR)
+
+    if not os.path.isdir(BASE_DIR):
+        logger.warning("%s does not exist; RQ2 has no data", BASE_DIR)
+        return {}
+
+    index_file = os.path.join(cache.cache_dir(data.DATA_DIR), "by_country_year.json")
+    try:
+        with open(index_file) as fh:
+            previous = json.load(fh)
+    except (OSError, ValueError):
+        previous = {}
+
+    files = {}
+    for fname in sorted(os.listdir(BASE_DIR)):
+        parts = fname[:-len(".csv")].split("_") if fname.endswith(".csv") else []
+        if len(parts) != 2 or not parts[1].isdigit():
+            continue
+        path = os.path.join(BASE_DIR, fname)
+        stat = os.stat(path)
+        entry = previous.get(fname)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            app_types = pd.read_csv(path, usecols=["app_type"])["app_type"].dropna().unique()
+            entry = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "app_types": sorted(str(a) for a in app_types),
+            }
+        files[fname] = entry
+
+    if files != previous:
+        try:
+            os.makedirs(os.path.dirname(index_file), exist_ok=True)
+            fd, tmp = cache.mkstemp(os.path.dirname(index_file), ".tmp")
+            with os.fdopen(fd, "w") as fh:
+                json.dump(files, fh)
+            os.replace(tmp, index_file)
+        except OSError as exc:
+            logger.warning("could not persist country index: %s", exc)
+
+    result = {}
+    for fname, entry in files.items():
+        country, year = fname[:-len(".csv")].split("_")
+        result[(country, int(year))] = {
+            "path": os.path.join(BASE_DIR, fname),
+            "app_types": entry["app_types"],
+        }
+    return result
@@ -0,0 +1,154 @@
+"""Shared, lazily loaded access to the datasets in ``data/``.
+
+Pages never read CSVs at import time. They call :func:`get` from their
+layout functions and callbacks; each dataset is parsed the first time any
+page asks for it and the same frame is handed to every later caller, so a
+worker holds one copy per dataset. Returned frames are shared and must be
+treated as read-only.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from dashboard import cache
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get(
+    "DASHBOARD_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"),
+)
+
+# name -> (file name, time column)
+DATASETS = {
+    "borda_daily": ("global_borda_daily.csv", "date"),
+    "borda_monthly": ("global_borda_monthly.csv", "month"),
+    "mean_daily": ("global_borda_mean_daily.csv", "date"),
+    "mean_monthly": ("global_borda_mean_monthly.csv", "month"),
+    "median_daily": ("global_borda_median_daily.csv", "date"),
+    "median_monthly": ("global_borda_median_monthly.csv", "month"),
+    "missingness": ("missingness_by_rank.csv", None),
+}
+
+CATEGORICAL_COLUMNS = ["app_type", "classification", "country", "rank_bin"]
+
+# Bump whenever _parse changes so cached entries are rebuilt.
+PARSE_VERSION = 1
+
+# How often version() re-stats the files in DATA_DIR.
+VERSION_CHECK_SECONDS = 5
+
+_frames = {}
+_stats = {}
+_lock = threading.Lock()
+_version = {"checked": 0.0, "token": None}
+
+
+def path(name):
+    """Absolute path of the CSV behind dataset ``name``."""
+    return os.path.join(DATA_DIR, DATASETS[name][0])
+
+
+def time_column(name):
+    return DATASETS[name][1]
+
+
+def get(name):
+    """Return dataset ``name``, loading it on first use."""
+    frame = _frames.get(name)
+    if frame is None:
+        with _lock:
+            frame = _frames.get(name)
+            if frame is None:
+                frame = _frames[name] = _load(name)
+    return frame
+
+
+def global_scores(method, granularity):
+    """Global Borda/Mean/Median scores, e.g. ``global_scores("borda", "daily")``."""
+    return get(f"{method.lower()}_{granularity}")
+
+
+def version():
+    """Token that changes whenever a file under DATA_DIR is added, removed or modified."""
+    now = time.monotonic()
+    if _version["token"] is None or now - _version["checked"] > VERSION_CHECK_SECONDS:
+        digest = hashlib.sha1()
+        for root, dirs, files in os.walk(DATA_DIR):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for fname in sorted(files):
+                st = os.stat(os.path.join(root, fname))
+                digest.update(f"{root}/{fname}:{st.st_size}:{st.st_mtime_ns};".encode())
+        _version["token"] = digest.hexdigest()[:16]
+        _version["checked"] = now
+    return _version["token"]
+
+
+def loaded():
+    """Names of the datasets already loaded in this process."""
+    return sorted(_frames)
+
+
+def stats():
+    """Load time and memory footprint of every dataset loaded so far."""
+    return {name: dict(entry) for name, entry in _stats.items()}
+
+
+def _load(name):
+    started = time.perf_counter()
+    rss_before = _rss_bytes()
+
+    frame = _read(name)
+
+    elapsed = time.perf_counter() - started
+    memory = int(frame.memory_usage(deep=True).sum())
+    _stats[name] = {
+        "rows": len(frame),
+        "load_seconds": elapsed,
+        "memory_bytes": memory,
+        "rss_delta_bytes": max(_rss_bytes() - rss_before, 0),
+    }
+    logger.info("loaded %s: %d rows in %.3fs, %.1f MB",
+                name, len(frame), elapsed, memory / 1e6)
+    return frame
+
+
+def _read(name):
+    if not cache.ENABLED:
+        return _parse(name)
+    return cache.load(name, path(name), lambda: _parse(name), PARSE_VERSION,
+                      cache.cache_dir(DATA_DIR))
+
+
+def _parse(name):
+    time_col = time_column(name)
+    frame = pd.read_csv(path(name))
+
+    if time_col is not None:
+        frame[time_col] = pd.to_datetime(frame[time_col], format="%Y-%m-%d")
+        frame["year"] = frame[time_col].dt.year
+    else:
+        frame["year"] = frame["year"].astype(int)
+
+    if "country" in frame:
+        frame["country"] = frame["country"].str.lower()
+    if "rank_bin" in frame:
+        frame["rank_bin"] = frame["rank_bin"].astype(str)
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in frame:
+            frame[col] = frame[col].astype("category")
+    return frame
+
+
+def _rss_bytes():
+    """Resident set size of this process, or 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
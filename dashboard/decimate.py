@@ -0,0 +1,119 @@
+"""Server-side decimation of long time series before they reach Plotly.
+
+Line traces are reduced with Largest-Triangle-Three-Buckets (LTTB), which
+keeps the visual shape of each series, to at most ``MAX_POINTS`` points
+(``DASHBOARD_MAX_POINTS``, default 600). Stacked bars cannot be decimated
+per trace without breaking the stacks, so consecutive time points are
+averaged into at most ``MAX_BARS`` bars (``DASHBOARD_MAX_BARS``, default 200).
+
+Graph callbacks also take the graph's ``relayoutData``: when the user zooms,
+:func:`zoom_range` yields the visible window and the callback re-queries
+just that window, which is usually small enough to be sent at full
+resolution.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from dash import ctx
+
+MAX_POINTS = int(os.environ.get("DASHBOARD_MAX_POINTS", "600"))
+MAX_BARS = int(os.environ.get("DASHBOARD_MAX_BARS", "200"))
+
+
+def lttb(x, y, n):
+    """Indices of the ``n`` points of (x, y) chosen by Largest-Triangle-Three-Buckets."""
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    selected = np.empty(n, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else size
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def zoom_range(graph_id, relayout_data):
+    """Visible x range of ``graph_id`` if this callback was triggered by zooming it.
+
+    Returns ``(start, end)`` as ISO dates widened to whole days, or None for
+    the full range (autorange, other triggers, or no callback context).
+    """
+    try:
+        if ctx.triggered_id != graph_id:
+            return None
+    except Exception:
+        return None
+    if not relayout_data:
+        return None
+
+    if "xaxis.range[0]" in relayout_data:
+        start, end = relayout_data["xaxis.range[0]"], relayout_data.get("xaxis.range[1]")
+    elif "xaxis.range" in relayout_data:
+        start, end = relayout_data["xaxis.range"]
+    else:
+        return None
+    start, end = pd.Timestamp(start).floor("D"), pd.Timestamp(end).ceil("D")
+    return start.date().isoformat(), end.date().isoformat()
+
+
+def clip(agg, x_range, x="time"):
+    if not x_range:
+        return agg
+    start, end = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+    return agg[(agg[x] >= start) & (agg[x] <= end)]
+
+
+def lines(agg, x_range=None, max_points=None, x="time", y="relative_score", by="classification"):
+    """Clip ``agg`` to ``x_range`` and reduce every ``by`` trace to ``max_points`` with LTTB."""
+    max_points = max_points or MAX_POINTS
+    agg = clip(agg, x_range, x)
+    if agg.empty or agg.groupby(by, observed=True).size().max() <= max_points:
+        return agg
+
+    ticks = agg[x].to_numpy().astype("datetime64[ns]").view("i8")
+    values = agg[y].to_numpy()
+    keep = []
+    for rows in agg.groupby(by, observed=True).indices.values():
+        keep.append(rows[lttb(ticks[rows], values[rows], max_points)])
+    return agg.iloc[np.sort(np.concatenate(keep))]
+
+
+def bars(agg, x_range=None, max_bars=None, x="time", y="relative_score", by="classification"):
+    """Clip ``agg`` to ``x_range`` and average consecutive times into at most ``max_bars`` bars.
+
+    Each bar is labelled with the first time of its bucket and holds the
+    mean share over the bucket, so the stacks still add up to 100%.
+    """
+    max_bars = max_bars or MAX_BARS
+    agg = clip(agg, x_range, x)
+    times = np.unique(agg[x].to_numpy())
+    if len(times) <= max_bars:
+        return agg
+
+    bucket_of_time = np.arange(len(times)) * max_bars // len(times)
+    bucket = bucket_of_time[np.searchsorted(times, agg[x].to_numpy())]
+    times_per_bucket = np.bincount(bucket_of_time)
+    starts = times[np.searchsorted(bucket_of_time, np.arange(max_bars))]
+
+    binned = (
+        agg.assign(bucket=bucket)
+        .groupby(["bucket", by], observed=True)[y]
+        .sum()
+        .reset_index()
+    )
+    binned[y] = binned[y] / times_per_bucket[binned["bucket"]]
+    binned[x] = starts[binned["bucket"]]
+    return binned.drop(columns="bucket")
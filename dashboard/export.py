@@ -0,0 +1,220 @@
+"""Download endpoints for the aggregates behind the pages.
+
+:func:`install` adds four routes to the Flask server. Each takes query
+parameters named after the page's dropdowns and returns the rows that page
+plots:
+
+``/export/rq1``
+    global category shares; ``granularity``, ``app_type``, ``years``.
+``/export/rq2``
+    one country's category shares; as RQ1 plus ``country``.
+``/export/methods``
+    Borda/Mean/Median comparison; ``granularity``, ``app_type``,
+    ``methods``, ``categories`` (default all) and ``years``.
+``/export/missingness``
+    unknown-classification ratios; ``app_type``, ``years``, ``countries``.
+
+List parameters are comma-separated, e.g. ``years=2021,2022``; left out,
+they select everything. ``format=csv`` (default) or ``format=arrow`` (Arrow
+IPC stream). The response is streamed one year at a time, in chunks of at
+most ``DASHBOARD_EXPORT_CHUNK_ROWS`` rows (default 50000), so a daily
+multi-year export is never held in memory as a whole. pyarrow and the data
+modules are imported on the first export, not at start-up. Each response has an
+ETag built from the data version (see :func:`dashboard.data.version`) and
+the query. A request whose ``If-None-Match`` matches gets an empty 304::
+
+    curl -OJ "http://localhost:8080/export/rq1?granularity=daily&app_type=Free&years=2022,2023"
+"""
+import functools
+import hashlib
+import io
+import json
+import os
+
+from flask import Response, jsonify, request, stream_with_context
+
+CHUNK_ROWS = int(os.environ.get("DASHBOARD_EXPORT_CHUNK_ROWS", "50000"))
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+@functools.cache
+def schema(kind):
+    """Arrow schema of the ``kind`` export; its names are the CSV columns."""
+    import pyarrow as pa
+
+    share_fields = [("time", pa.timestamp("ms")), ("classification", pa.string()),
+                    ("score_borda", pa.float64()), ("relative_score", pa.float64())]
+    return {
+        "rq1": pa.schema(share_fields),
+        "rq2": pa.schema([("country", pa.string()), *share_fields]),
+        "methods": pa.schema([("time", pa.timestamp("ms")), ("method", pa.string()),
+                              ("classification", pa.string()), ("relative_score", pa.float64())]),
+        "missingness": pa.schema([("year", pa.int64()), ("country", pa.string()),
+                                  ("rank_bin", pa.string()), ("unknown_ratio", pa.float64())]),
+    }[kind]
+
+
+def rq1_blocks(args):
+    from dashboard import data, shares
+
+    granularity = _choice(args, "granularity", ["daily", "monthly"], "monthly")
+    app_type = args.get("app_type", "Free")
+    cube = shares.global_cube(granularity)
+    all_years = data.get(f"borda_{granularity}")["year"].unique()
+    for year in _list(args, "years", int) or sorted(int(y) for y in all_years):
+        block = cube.get((app_type, year))
+        if block is not None:
+            yield block
+
+
+def rq2_blocks(args):
+    from dashboard import countries
+
+    granularity = _choice(args, "granularity", ["daily", "monthly"], "monthly")
+    country = _choice(args, "country", countries.countries())
+    app_type = args.get("app_type", "Free")
+    for year in _list(args, "years", int) or sorted(y for c, y in countries.index() if c == country):
+        block = countries.country_cube(country, year, app_type, granularity).get((app_type, year))
+        if block is not None:
+            yield block.assign(country=country)
+
+
+def methods_blocks(args):
+    from dashboard import methods
+
+    cube = methods.cube(_choice(args, "granularity", ["daily", "monthly"], "monthly"))
+    app_type = args.get("app_type", "Free")
+    selected = _list(args, "methods") or list(methods.METHODS)
+    categories = _list(args, "categories") or list(cube.classifications)
+    for year in _list(args, "years", int) or sorted(set(cube.years.tolist())):
+        for category in categories:
+            rows = cube.select(selected, app_type, category, [year])
+            if len(rows):
+                yield rows.assign(classification=category)
+
+
+def missingness_blocks(args):
+    from dashboard import missingness
+
+    cube = missingness.cube()
+    app_type = args.get("app_type", "Free")
+    selected = _list(args, "countries") or list(cube.countries)
+    for year in _list(args, "years", int) or list(cube.years):
+        rows = cube.select(app_type, [year], selected)
+        if len(rows):
+            yield rows
+
+
+EXPORTS = {
+    "rq1": rq1_blocks,
+    "rq2": rq2_blocks,
+    "methods": methods_blocks,
+    "missingness": missingness_blocks,
+}
+
+
+def etag(kind, args):
+    """ETag of an export: the data version plus the normalised query."""
+    from dashboard import data
+
+    query = sorted((key, sorted({v for raw in values for v in raw.split(",") if v}))
+                   for key, values in args.lists())
+    raw = json.dumps([kind, data.version(), query])
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def csv_chunks(blocks, schema):
+    yield ",".join(schema.names) + "\n"
+    for chunk in _chunks(blocks, schema):
+        yield chunk.to_csv(index=False, header=False, date_format="%Y-%m-%d")
+
+
+def arrow_chunks(blocks, schema):
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for chunk in _chunks(blocks, schema):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def install(server):
+    """Register the ``/export/<kind>`` routes on the Flask ``server``."""
+    @server.route("/export/<kind>")
+    def export(kind):
+        if kind not in EXPORTS:
+            return jsonify(error=f"unknown export {kind!r}; one of {sorted(EXPORTS)}"), 404
+        fmt = request.args.get("format", "csv")
+        if fmt not in FORMATS:
+            return jsonify(error=f"format must be one of {sorted(FORMATS)}"), 400
+
+        tag = etag(kind, request.args)
+        if request.if_none_match.contains(tag):
+            response = Response(status=304)
+            response.set_etag(tag)
+            return response
+
+        blocks = EXPORTS[kind](request.args)
+        try:
+            # Validate the parameters before the 200 status is sent.
+            first = next(blocks, None)
+        except BadRequest as exc:
+            return jsonify(error=str(exc)), 400
+        blocks = _chain(first, blocks)
+
+        arrow_schema = schema(kind)
+        body = csv_chunks(blocks, arrow_schema) if fmt == "csv" else arrow_chunks(blocks, arrow_schema)
+        mimetype, extension = FORMATS[fmt]
+        response = Response(stream_with_context(body), mimetype=mimetype)
+        response.set_etag(tag)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["Content-Disposition"] = f"attachment; filename={kind}.{extension}"
+        return response
+
+
+def _chunks(blocks, schema):
+    for block in blocks:
+        block = block[schema.names]
+        for start in range(0, len(block), CHUNK_ROWS):
+            chunk = block.iloc[start:start + CHUNK_ROWS]
+            # Categories differ between blocks; plain strings keep one schema.
+            yield chunk.astype({c: str for c in chunk.columns if chunk[c].dtype == "category"})
+
+
+def _chain(first, rest):
+    if first is not None:
+        yield first
+        yield from rest
+
+
+def _drain(sink):
+    payload = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return payload
+
+
+def _choice(args, name, options, default=None):
+    value = args.get(name, default)
+    if value not in options:
+        raise BadRequest(f"{name} must be one of {list(options)}")
+    return value
+
+
+def _list(args, name, cast=str):
+    """Sorted, de-duplicated values of ``name``, so the body matches the normalised query of the ETag."""
+    values = [v for raw in args.getlist(name) for v in raw.split(",") if v]
+    try:
+        return sorted({cast(v) for v in values})
+    except ValueError:
+        raise BadRequest(f"{name} must be a comma-separated list of {cast.__name__}") from None
@@ -0,0 +1,239 @@
+"""Memoized figures for the page callbacks.
+
+Wrap a figure callback with :func:`cached` to serve repeated filter
+combinations from a bounded cache instead of rebuilding the Plotly figure::
+
+    @callback(Output(...), Input(...), ...)
+    @figures.cached("rq1")
+    def update_graph(granularity, app_type, selected_years):
+        ...
+
+The key is the page name, the data version (see :func:`dashboard.data.version`)
+and the normalised inputs, with list inputs sorted and de-duplicated, so
+``[2023, 2022, 2022]`` and ``[2022, 2023]`` share an entry and entries built
+from old data files are never served. Figures are compacted with
+:func:`dashboard.compact.figure`, stored as serialised JSON and returned as
+plain figure dicts.
+
+The backend is chosen with ``DASHBOARD_FIGURE_CACHE``:
+
+``memory`` (default)
+    in-process LRU, one per worker.
+``sqlite:/path/to/figures.db``
+    LRU shared by every worker on the host.
+``off``
+    no caching.
+
+``DASHBOARD_FIGURE_CACHE_MB`` bounds the stored bytes (default 64) and
+``DASHBOARD_FIGURE_CACHE_TTL`` expires entries after that many seconds
+(default 3600, 0 disables expiry).
+"""
+import collections
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import plotly.io as pio
+
+from dashboard import compact, data, metrics
+
+
+class MemoryBackend:
+    """In-process LRU bounded by total payload bytes."""
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, created = entry
+            if self.ttl and time.time() - created > self.ttl:
+                self._drop(key)
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (payload, time.time())
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def size(self):
+        return len(self._entries), self._bytes
+
+    def _drop(self, key):
+        payload, _ = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+
+class SQLiteBackend:
+    """LRU in a local SQLite file, shared by all worker processes on a host."""
+
+    def __init__(self, path, max_bytes, ttl):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS figures ("
+                " key TEXT PRIMARY KEY, payload TEXT, size INTEGER,"
+                " created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS figures_accessed ON figures (accessed)")
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload, created FROM figures WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM figures WHERE key = ?", (key,))
+                self.evictions += 1
+                return None
+            conn.execute("UPDATE figures SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO figures VALUES (?, ?, ?, ?, ?)",
+                         (key, payload, len(payload), now, now))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM figures").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = conn.execute(
+                    "SELECT key, size FROM figures ORDER BY accessed LIMIT 1").fetchone()
+                conn.execute("DELETE FROM figures WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                self.evictions += 1
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM figures")
+
+    def size(self):
+        with self._connect() as conn:
+            return tuple(conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM figures").fetchone())
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+        return conn
+
+
+def _make_backend():
+    spec = os.environ.get("DASHBOARD_FIGURE_CACHE", "memory")
+    max_bytes = int(float(os.environ.get("DASHBOARD_FIGURE_CACHE_MB", "64")) * 1e6)
+    ttl = float(os.environ.get("DASHBOARD_FIGURE_CACHE_TTL", "3600"))
+    if spec == "off":
+        return None
+    if spec.startswith("sqlite:"):
+        return SQLiteBackend(spec[len("sqlite:"):], max_bytes, ttl)
+    return MemoryBackend(max_bytes, ttl)
+
+
+backend = _make_backend()
+_counters = collections.Counter()
+
+
+def normalise(value):
+    """Sort and de-duplicate list inputs so equivalent selections share a key.
+
+    Multi-select dropdowns arrive as lists. Tuples are positional, like the
+    ``(start, end)`` zoom range of :func:`dashboard.decimate.zoom_range`, and
+    are kept as they are.
+    """
+    if isinstance(value, (list, set)):
+        return sorted(set(value), key=lambda v: (str(type(v)), v))
+    return value
+
+
+def make_key(page, args):
+    raw = json.dumps([page, data.version(), [normalise(a) for a in args]], default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached(page):
+    """Decorator memoizing a figure callback under the name ``page``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            args = [normalise(a) for a in args]
+            if backend is None:
+                fig = func(*args)
+                with metrics.phase("figure"):
+                    return compact.figure(fig)
+
+            key = make_key(page, args)
+            payload = backend.get(key)
+            if payload is not None:
+                _counters["hits"] += 1
+                return json.loads(payload)
+
+            _counters["misses"] += 1
+            fig = func(*args)
+            with metrics.phase("figure"):
+                payload = pio.to_json(compact.figure(fig), validate=False)
+                backend.set(key, payload)
+                return json.loads(payload)
+        return wrapper
+    return decorator
+
+
+def contains(page, args):
+    """Whether the figure of ``args`` is cached under ``page``."""
+    if backend is None:
+        return False
+    return backend.get(make_key(page, [normalise(a) for a in args])) is not None
+
+
+def stats():
+    """Hit/miss/eviction counters of this process plus the current cache size."""
+    if backend is None:
+        return {"backend": "off"}
+    entries, size = backend.size()
+    return {
+        "backend": type(backend).__name__,
+        "hits": _counters["hits"],
+        "misses": _counters["misses"],
+        "evictions": backend.evictions,
+        "entries": entries,
+        "bytes": size,
+        "max_bytes": backend.max_bytes,
+    }
+
+
+def clear():
+    if backend is not None:
+        backend.clear()
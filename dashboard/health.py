@@ -0,0 +1,76 @@
+"""Data preloading and health/readiness endpoints for production serving.
+
+:func:`preload` loads every dataset and the structures derived from them
+(share cubes, method cubes, the RQ2 country index). ``wsgi.py`` calls it
+before gunicorn forks its workers, so they start warm and share the loaded
+data copy-on-write instead of each parsing its own copy.
+
+:func:`install` adds two routes to the Flask server:
+
+``/healthz``
+    liveness; 200 as long as the worker answers.
+``/readyz``
+    readiness; 200 with per-dataset status once every dataset is loaded,
+    503 while it is not. With lazy pages (:mod:`dashboard.lazy`) data loads
+    on first visit, so the worker is ready as soon as the app is imported
+    and the dataset status is informational. Background warm-up progress
+    (see :mod:`dashboard.warmup`) is reported but not waited for.
+"""
+import logging
+import os
+import time
+
+from flask import jsonify
+
+from dashboard import lazy, warmup
+
+logger = logging.getLogger(__name__)
+
+_state = {"preload_seconds": None, "errors": {}}
+
+
+def preload():
+    """Load every dataset and derived structure in this process."""
+    started = time.perf_counter()
+    for name, step in warmup.data_tasks():
+        try:
+            step()
+        except Exception as exc:
+            # A broken file must not keep the other pages from serving.
+            logger.exception("preloading %s failed", name)
+            _state["errors"][name] = repr(exc)
+    _state["preload_seconds"] = time.perf_counter() - started
+    logger.info("preloaded data in %.2fs", _state["preload_seconds"])
+
+
+def status():
+    """Readiness of this worker: which datasets are loaded, and preload timing."""
+    # Imported here so the data modules (and pandas) stay off the start-up path.
+    from dashboard import data
+
+    loaded = set(data.loaded())
+    stats = data.stats()
+    return {
+        # Lazy workers load data on demand and never wait for all of it.
+        "ready": lazy.ENABLED or loaded >= set(data.DATASETS),
+        "lazy": lazy.ENABLED,
+        "pid": os.getpid(),
+        "preload_seconds": _state["preload_seconds"],
+        "datasets": {
+            name: {"loaded": name in loaded, **stats.get(name, {})} for name in data.DATASETS
+        },
+        "errors": dict(_state["errors"]),
+        "warmup": warmup.status(),
+    }
+
+
+def install(server):
+    """Register ``/healthz`` and ``/readyz`` on the Flask ``server``."""
+    @server.route("/healthz")
+    def healthz():
+        return jsonify(status="ok")
+
+    @server.route("/readyz")
+    def readyz():
+        report = status()
+        return jsonify(report), 200 if report["ready"] else 503
@@ -0,0 +1,193 @@
+"""Parallel, chunked rebuild of the aggregated tables from raw ranking dumps.
+
+Same outputs as ``python -m dashboard.pipeline build`` (see
+:mod:`dashboard.pipeline`), for raw histories too large to load at once.
+Each raw CSV is cut into byte ranges of about ``CHUNK_BYTES`` (aligned to
+line boundaries), and a process pool parses and scores the ranges in
+parallel. A worker returns only mergeable partials: per (date, app_type,
+classification) Borda point histograms and per (year, country, rank_bin,
+app_type) missingness counts. The parent sums partials as they arrive,
+with at most two ranges per worker in flight, so memory is bounded by the
+chunk size and the size of the aggregated tables rather than by the raw
+input. Daily sums, means and exact medians come from the merged daily
+histograms; monthly ones from the same histograms summed by month.
+
+The pipeline state is written as well, so later days can be added with
+``python -m dashboard.pipeline append``.
+
+    python -m dashboard.ingest raw/*.csv --workers 8
+"""
+import argparse
+import concurrent.futures
+import io
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dashboard import data, pipeline
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = int(float(os.environ.get("DASHBOARD_INGEST_CHUNK_MB", "64")) * 2**20)
+
+RAW_DTYPES = {"country": str, "app_type": str, "app_id": str, "classification": str}
+
+
+def byte_ranges(path, chunk_bytes=CHUNK_BYTES):
+    """``(path, start, end)`` tasks covering the rows of ``path`` after the header."""
+    with open(path, "rb") as fh:
+        body = len(fh.readline())
+    size = os.path.getsize(path)
+    return [(path, start, min(start + chunk_bytes, size)) for start in range(body, size, chunk_bytes)]
+
+
+def read_range(path, start, end):
+    """Raw rows of ``path`` whose line starts in ``[start, end)``."""
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        # Step back one byte so a range starting exactly on a line start
+        # keeps that line; otherwise finish the line owned by the previous range.
+        fh.seek(start - 1)
+        fh.readline()
+        position = fh.tell()
+        if position >= end:
+            chunk = b""
+        else:
+            chunk = fh.read(end - position)
+            if not chunk.endswith(b"\n"):
+                chunk += fh.readline()
+    return pd.read_csv(io.BytesIO(header + chunk), dtype=RAW_DTYPES)
+
+
+def score_range(task):
+    """Worker: parse one byte range and return its mergeable partials."""
+    started = time.perf_counter()
+    raw = read_range(*task)
+    parsed = time.perf_counter()
+    prepared = pipeline.prepare(raw)
+    keys, hist = pipeline.histograms(prepared, "date")
+    counts = pipeline.missingness_counts(prepared)
+    return {
+        "rows": len(raw),
+        "keys": keys,
+        "hist": hist.astype(np.int32),
+        "counts": counts,
+        "parse_seconds": parsed - started,
+        "score_seconds": time.perf_counter() - parsed,
+    }
+
+
+def ingest(paths, out_dir=data.DATA_DIR, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Rebuild every table in ``out_dir`` from the raw CSVs in ``paths``.
+
+    Returns rows, seconds and rows/sec per stage.
+    """
+    workers = workers or os.cpu_count()
+    tasks = [task for path in paths for task in byte_ranges(path, chunk_bytes)]
+    logger.info("%d raw files, %d chunks, %d workers", len(paths), len(tasks), workers)
+
+    keys = pd.DataFrame(columns=["date"] + pipeline.KEYS)
+    hist = np.zeros((0, pipeline.MAX_RANK), dtype=np.int32)
+    counts = pipeline._empty_state()["missing_counts"]
+    buffered = []
+    totals = {"rows": 0, "parse_seconds": 0.0, "score_seconds": 0.0, "merge_seconds": 0.0}
+
+    def merge():
+        nonlocal keys, hist, counts
+        merge_started = time.perf_counter()
+        keys, hist = pipeline.merge_histograms(
+            pd.concat([keys] + [p["keys"] for p in buffered], ignore_index=True),
+            np.vstack([hist] + [p["hist"] for p in buffered]))
+        counts = pipeline.merge_counts(pd.concat([counts] + [p["counts"] for p in buffered]))
+        totals["merge_seconds"] += time.perf_counter() - merge_started
+        buffered.clear()
+
+    started = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queued = iter(tasks)
+        while True:
+            # Keep at most two chunks per worker in flight.
+            for task in queued:
+                pending.add(pool.submit(score_range, task))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                partial = future.result()
+                for field in ["rows", "parse_seconds", "score_seconds"]:
+                    totals[field] += partial[field]
+                buffered.append(partial)
+            # Partials of neighbouring chunks overlap, so summing a batch at a
+            # time keeps the buffer small without re-merging after every chunk.
+            if len(buffered) >= workers:
+                merge()
+        merge()
+    scored = time.perf_counter()
+
+    _write(keys, hist, counts, out_dir)
+    finished = time.perf_counter()
+
+    rows = totals["rows"]
+    stages = {
+        # parse/score are summed over workers: rows per second of one worker
+        "parse": totals["parse_seconds"],
+        "score": totals["score_seconds"],
+        "merge": totals["merge_seconds"],
+        "pool": scored - started,
+        "write": finished - scored,
+        "total": finished - started,
+    }
+    report = {stage: {"seconds": round(seconds, 3), "rows_per_second": round(rows / seconds) if seconds else None}
+              for stage, seconds in stages.items()}
+    for stage, entry in report.items():
+        logger.info("%-6s %8.2fs %12s rows/s", stage, entry["seconds"], entry["rows_per_second"])
+    return {"rows": rows, "chunks": len(tasks), "workers": workers, "stages": report}
+
+
+def _write(day_keys, day_hist, counts, out_dir):
+    """Write the daily, monthly and missingness tables plus the pipeline state."""
+    day_hist = day_hist.astype(np.int64)
+    # Without any input rows the keys never pass through a merge that types them.
+    day_keys = day_keys.assign(date=pd.to_datetime(day_keys["date"]))
+    for method, table in pipeline.histogram_tables(day_keys, day_hist, "date").items():
+        table = pipeline._format(table, "date")
+        table.to_csv(os.path.join(out_dir, pipeline.METHOD_FILES[method].format("daily")), index=False)
+
+    month_keys = day_keys.assign(date=day_keys["date"].dt.to_period("M").dt.to_timestamp())
+    month_keys, month_hist = pipeline.merge_histograms(month_keys.rename(columns={"date": "month"}), day_hist)
+    for method, table in pipeline.histogram_tables(month_keys, month_hist, "month").items():
+        table = pipeline._format(table, "month")
+        table.to_csv(os.path.join(out_dir, pipeline.METHOD_FILES[method].format("monthly")), index=False)
+
+    table = pipeline.missingness_table(counts)
+    table.sort_values(["year", "country", "rank_bin", "app_type"], key=pipeline._sort_key, kind="stable").to_csv(
+        os.path.join(out_dir, pipeline.MISSINGNESS_FILE), index=False)
+
+    pipeline.save_state({
+        "dates": pd.DatetimeIndex(day_keys["date"].unique()),
+        "month_keys": month_keys,
+        "month_hist": month_hist,
+        "missing_counts": counts,
+    }, out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild data/ tables from raw rankings in parallel.")
+    parser.add_argument("raw", nargs="+", help="raw ranking CSV files")
+    parser.add_argument("--out", default=data.DATA_DIR, help="output directory (default: data/)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / 2**20, help="bytes per chunk, in MiB")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    ingest(args.raw, args.out, args.workers, int(args.chunk_mb * 2**20))
+
+
+if __name__ == "__main__":
+    main()
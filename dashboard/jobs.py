@@ -0,0 +1,167 @@
+"""Background jobs for long figure requests.
+
+With ``DASHBOARD_BACKGROUND=1`` (and ``diskcache`` installed) the RQ1 and
+RQ2 figures are served in two steps instead of one request-bound callback:
+
+1. a regular callback answers right away. Short selections get their
+   figure as usual. Long ones (daily granularity over at least
+   ``DASHBOARD_BACKGROUND_MIN_YEARS`` years, default 2, not zoomed and not
+   in the figure cache) get the monthly figure of the same selection as a
+   coarse preview, and the full request is written to a ``dcc.Store``;
+2. the store triggers a Dash background callback, which runs the request
+   in a separate process through a :class:`dash.DiskcacheManager` queue
+   in ``data/.cache/jobs`` (``DASHBOARD_JOB_DIR``). A progress bar shows
+   its stage until it replaces the preview with the daily figure.
+
+The request worker is free again once the preview is sent. Changing a
+dropdown re-runs step 1. This rewrites the store, and Dash terminates the
+job still running for the old selection. Identical jobs share one
+computation: the first holds an owner entry in the job cache, the others
+wait for its result (see :func:`run_once`).
+"""
+import functools
+import logging
+import os
+import time
+
+from dash import Input, Output, State, callback, dcc, no_update
+from dash.exceptions import PreventUpdate
+import dash_bootstrap_components as dbc
+
+from dashboard import data, decimate, figures
+
+try:
+    import diskcache
+    import psutil
+except ImportError:  # optional dependencies
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("DASHBOARD_BACKGROUND", "0") == "1" and diskcache is not None
+JOB_DIR = os.environ.get("DASHBOARD_JOB_DIR", os.path.join(data.DATA_DIR, ".cache", "jobs"))
+MIN_YEARS = int(os.environ.get("DASHBOARD_BACKGROUND_MIN_YEARS", "2"))
+
+if os.environ.get("DASHBOARD_BACKGROUND", "0") == "1" and diskcache is None:
+    logger.warning("DASHBOARD_BACKGROUND=1 needs diskcache and psutil (pip install -r requirements.txt); "
+                   "serving every request in the foreground")
+
+# Seconds a finished result stays available to identical jobs
+RESULT_TTL = 600
+# Milliseconds between the browser's polls for progress and the result
+POLL_MS = 500
+
+HIDDEN = {"display": "none"}
+VISIBLE = {"display": "flex", "height": "1.5rem"}
+
+
+@functools.cache
+def store():
+    """The job cache shared by every worker and job process on the host."""
+    return diskcache.Cache(JOB_DIR)
+
+
+@functools.cache
+def manager():
+    from dash import DiskcacheManager
+
+    return DiskcacheManager(store(), expire=RESULT_TTL)
+
+
+def is_long(granularity, selected_years, x_range):
+    """Whether a selection is slow enough to be worth a background job."""
+    if not isinstance(selected_years, list):
+        selected_years = [selected_years] if selected_years else []
+    return granularity == "daily" and len(selected_years) >= MIN_YEARS and x_range is None
+
+
+def run_once(key, compute, on_wait=None):
+    """``compute()``, shared between identical jobs running at the same time.
+
+    The first job to claim ``key`` computes and stores the result; the
+    others wait for it. An owner killed by cancellation leaves its claim
+    behind, so a waiter takes over once the owner's process is gone.
+    """
+    cache = store()
+    waiting = False
+    while True:
+        result = cache.get(("result", key))
+        if result is not None:
+            return result
+        if cache.add(("owner", key), os.getpid(), expire=RESULT_TTL):
+            try:
+                result = compute()
+                cache.set(("result", key), result, expire=RESULT_TTL)
+                return result
+            finally:
+                cache.delete(("owner", key))
+        owner = cache.get(("owner", key))
+        if owner is not None and not psutil.pid_exists(owner):
+            cache.delete(("owner", key))
+        elif not waiting and on_wait is not None:
+            on_wait()
+            waiting = True
+        time.sleep(POLL_MS / 1000 / 5)
+
+
+def components(graph):
+    """Layout pieces of the background mode for ``graph``; empty when disabled."""
+    if not ENABLED:
+        return []
+    return [
+        dcc.Store(id=f"{graph}-job"),
+        dbc.Progress(id=f"{graph}-progress", value=0, striped=True, animated=True,
+                     style=HIDDEN, className="mb-2"),
+    ]
+
+
+def register(page, graph, update, build, inputs, granularity_arg=0, years_arg=2):
+    """Register the callbacks of ``graph``, sending long selections to a background job.
+
+    ``update`` is the page's figure callback, taking the values of ``inputs``
+    (the last one is the graph's ``relayoutData``). ``build`` is its cached
+    figure function, taking the same values with the zoomed x range in place
+    of ``relayoutData``. ``granularity_arg`` and ``years_arg`` locate the
+    granularity and year dropdowns among the inputs.
+    """
+    job = f"{graph}-job"
+    progress = f"{graph}-progress"
+
+    def request(*values):
+        *values, pending = values
+        args = [*values[:-1], decimate.zoom_range(graph, values[-1])]
+        if (not is_long(values[granularity_arg], values[years_arg], args[-1])
+                or figures.contains(page, args)):
+            # Clearing a pending job cancels it; with none there is nothing to start.
+            return update(*values), None if pending else no_update
+        preview = list(values)
+        preview[granularity_arg] = "monthly"
+        return update(*preview), {"args": args}
+
+    def run(set_progress, request):
+        if not request:
+            raise PreventUpdate
+        set_progress((10, "Showing the monthly preview; computing daily values…"))
+        result = run_once(
+            figures.make_key(f"{page}:job", request["args"]), lambda: build(*request["args"]),
+            on_wait=lambda: set_progress((50, "Waiting for an identical request…")))
+        set_progress((100, "Done"))
+        return result
+
+    callback(
+        Output(graph, "figure"),
+        Output(job, "data"),
+        *inputs,
+        State(job, "data")
+    )(request)
+
+    callback(
+        Output(graph, "figure", allow_duplicate=True),
+        Input(job, "data"),
+        background=True,
+        manager=manager(),
+        progress=[Output(progress, "value"), Output(progress, "label")],
+        running=[(Output(progress, "style"), VISIBLE, HIDDEN)],
+        interval=POLL_MS,
+        prevent_initial_call=True,
+    )(run)
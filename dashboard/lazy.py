@@ -0,0 +1,133 @@
+"""Lazy page modules for fast cold starts.
+
+With ``DASHBOARD_LAZY_PAGES=1`` the app does not import ``pages/*.py`` at
+start-up. :func:`register` reads each page's ``dash.register_page(...)``
+call from its source with :mod:`ast`. It registers the page's path, name
+and order with a placeholder layout, so the navigation is complete without
+running any page code. A page module, with its heavy imports (Plotly
+Express, the dashboard's data modules) and its callbacks, is imported by
+:func:`load` on the first request for that page's path.
+
+Dash sends the callback list to the browser once per page load, so
+callbacks registered later are only known to pages loaded afterwards. The
+navigation links therefore do a full page load in this mode, and
+:func:`install` imports the page before that load is served.
+"""
+import ast
+import glob
+import importlib.util
+import os
+import sys
+import threading
+
+import dash
+
+ENABLED = os.environ.get("DASHBOARD_LAZY_PAGES", "0") == "1"
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages")
+
+_app = None
+_paths = {}  # page path -> module
+_files = {}  # module -> source file
+_lock = threading.RLock()
+
+
+def pages(pages_dir=PAGES_DIR):
+    """``{module: {"path", "name", "order", ...}}`` from the ``register_page`` calls in ``pages_dir``."""
+    found = {}
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*.py"))):
+        with open(path, encoding="utf-8") as fh:
+            tree = ast.parse(fh.read(), path)
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and getattr(node.func, "attr", getattr(node.func, "id", None))
+                    == "register_page"):
+                module = f"pages.{os.path.basename(path)[:-len('.py')]}"
+                found[module] = {k.arg: ast.literal_eval(k.value) for k in node.keywords}
+                found[module]["file"] = path
+                break
+    return found
+
+
+def register(app):
+    """Register every page with a placeholder layout that imports it on first use."""
+    global _app
+    _check(app)
+    _app = app
+    for module, meta in pages().items():
+        meta = dict(meta)
+        _files[module] = meta.pop("file")
+        _paths[meta["path"]] = module
+        dash.register_page(module, layout=_placeholder(module), **meta)
+
+
+def load(module):
+    """Import page ``module`` if it is not imported yet, and return it."""
+    if module in sys.modules:
+        return sys.modules[module]
+    if module not in _files:
+        return importlib.import_module(module)
+    with _lock:
+        if module in sys.modules:
+            return sys.modules[module]
+        spec = importlib.util.spec_from_file_location(module, _files[module])
+        page = importlib.util.module_from_spec(spec)
+        # Dash refuses register_page inside a request, and :func:`register`
+        # has already registered the page from its source.
+        register_page, dash.register_page = dash.register_page, lambda *args, **kwargs: None
+        try:
+            spec.loader.exec_module(page)
+        finally:
+            dash.register_page = register_page
+        sys.modules[module] = page
+        dash.page_registry[module]["layout"] = page.layout
+        _adopt_callbacks()
+        return page
+
+
+def install(server):
+    """Import a page before its first page load is served."""
+    @server.before_request
+    def load_page():
+        from flask import request
+
+        module = _paths.get(request.path)
+        if module is not None and module not in sys.modules:
+            load(module)
+
+
+def _check(app):
+    """Fail at start-up, not on a page visit, if Dash lacks the internals used here.
+
+    :func:`_adopt_callbacks` repeats part of Dash's private server setup,
+    tested with the Dash versions allowed by requirements.txt.
+    """
+    from dash import _callback
+
+    missing = [name for name in ["GLOBAL_CALLBACK_MAP", "GLOBAL_CALLBACK_LIST"] if not hasattr(_callback, name)]
+    missing += [f"Dash.{name}" for name in ["_got_first_request", "_callback_list", "callback_map"]
+                if not hasattr(app, name)]
+    if missing or "setup_server" not in getattr(app, "_got_first_request", {}):
+        raise RuntimeError(f"DASHBOARD_LAZY_PAGES=1 is not supported by dash {dash.__version__} "
+                           f"(missing {', '.join(missing) or 'Dash._got_first_request[setup_server]'}); "
+                           "install the version in requirements.txt or unset it")
+
+
+def _placeholder(module):
+    def layout(**kwargs):
+        page = load(module)
+        return page.layout(**kwargs) if callable(page.layout) else page.layout
+    return layout
+
+
+def _adopt_callbacks():
+    """Hand callbacks registered after the first request to the app, as Dash's setup does."""
+    from dash import _callback
+
+    if _app is None or not _app._got_first_request["setup_server"]:
+        return  # Dash picks them up itself on the first request
+    hidden = _app.config.get("hide_all_callbacks", False)
+    for key in list(_callback.GLOBAL_CALLBACK_MAP):
+        _app.callback_map[key] = _callback.GLOBAL_CALLBACK_MAP.pop(key)
+    _app._callback_list.extend(
+        {**c, "hidden": hidden} if c.get("hidden") is None else c for c in _callback.GLOBAL_CALLBACK_LIST)
+    _callback.GLOBAL_CALLBACK_LIST.clear()
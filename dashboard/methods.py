@@ -0,0 +1,77 @@
+"""Aligned Borda/Mean/Median scores for the aggregation method comparison.
+
+For each granularity the three ``global_borda*`` files are loaded once into
+a single array indexed by (method, app_type, classification, time), with
+missing combinations as NaN. Rows without a classification, "Unknown" and
+"exclusion criteria ..." categories are dropped at load time. A callback
+then gets every selected method with one slice of that array.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from dashboard import data
+
+METHODS = ["Borda", "Mean", "Median"]
+
+EXCLUDED = ["Unknown"]
+EXCLUDED_PREFIX = "exclusion criteria"
+
+
+class MethodCube:
+    def __init__(self, granularity, methods, app_types, classifications, times, values):
+        self.granularity = granularity
+        self.methods = methods
+        self.app_types = app_types
+        self.classifications = classifications
+        self.times = times
+        self.years = times.year.to_numpy()
+        self.values = values
+
+    def select(self, methods, app_type, classification, years):
+        """Long-form (time, method, relative_score) rows for the selection, NaNs dropped."""
+        m = self.methods.get_indexer([m for m in self.methods if m in set(methods)])
+        a = self.app_types.get_indexer([app_type])[0]
+        c = self.classifications.get_indexer([classification])[0]
+        if a < 0 or c < 0 or not len(m):
+            return pd.DataFrame(columns=["time", "method", "relative_score"])
+
+        t = np.flatnonzero(np.isin(self.years, list(years)))
+        block = self.values[m, a, c][:, t]
+        keep = ~np.isnan(block)
+        rows, cols = np.nonzero(keep)
+        return pd.DataFrame({
+            "time": self.times[t][cols],
+            "method": self.methods[m][rows],
+            "relative_score": block[keep],
+        })
+
+
+@functools.cache
+def cube(granularity):
+    frames = {method: _clean(data.global_scores(method, granularity)) for method in METHODS}
+    time_col = "date" if granularity == "daily" else "month"
+
+    app_types = pd.Index(sorted(set().union(*(f["app_type"].unique() for f in frames.values()))))
+    classifications = pd.Index(sorted(set().union(*(f["classification"].unique() for f in frames.values()))))
+    times = pd.DatetimeIndex(sorted(set().union(*(f[time_col].unique() for f in frames.values()))))
+
+    values = np.full((len(METHODS), len(app_types), len(classifications), len(times)), np.nan)
+    for m, method in enumerate(METHODS):
+        df = frames[method]
+        values[
+            m,
+            app_types.get_indexer(df["app_type"]),
+            classifications.get_indexer(df["classification"]),
+            times.get_indexer(df[time_col]),
+        ] = df["relative_score"].to_numpy()
+    return MethodCube(granularity, pd.Index(METHODS), app_types, classifications, times, values)
+
+
+def _clean(df):
+    df = df.dropna(subset=["classification"])
+    classification = df["classification"].astype(str)
+    excluded = classification.isin(EXCLUDED) | classification.str.lower().str.startswith(EXCLUDED_PREFIX)
+    df = df[~excluded]
+    return df.assign(app_type=df["app_type"].astype(str), classification=classification[~excluded])
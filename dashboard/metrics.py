@@ -0,0 +1,255 @@
+"""Callback timings and payload sizes, exposed for Prometheus on ``/metrics``.
+
+Wrap every page callback with :func:`instrumented`, below ``@callback``::
+
+    @callback(Output(...), Input(...), ...)
+    @metrics.instrumented("rq1")
+    def update_graph(granularity, app_type, selected_years):
+        ...
+
+and mark its phases inside the figure builder::
+
+    with metrics.phase("filter"):
+        agg = shares.global_shares(...)
+        metrics.rows(len(agg))
+    with metrics.phase("aggregate"):
+        agg = decimate.lines(agg, x_range)
+    with metrics.phase("figure"):
+        fig = px.line(...)
+
+Per callback this records histograms of the wall time (``total`` plus each
+phase), the input rows, the points in the returned figures and the
+serialised response bytes. Figures served from :mod:`dashboard.figures`
+only record ``total``.
+
+Callbacks slower than ``DASHBOARD_SLOW_CALLBACK_MS`` (off by default) are
+logged with their inputs, as JSON lines appended to
+``DASHBOARD_SLOW_CALLBACK_LOG`` or to this module's logger. Replay such a
+log with::
+
+    python -m dashboard.metrics replay slow.jsonl
+"""
+import argparse
+import base64
+import bisect
+import collections
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from flask import Response, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+SLOW_SECONDS = float(os.environ.get("DASHBOARD_SLOW_CALLBACK_MS", "0")) / 1000
+SLOW_LOG = os.environ.get("DASHBOARD_SLOW_CALLBACK_LOG")
+
+
+class Histogram:
+    """Prometheus histogram with one series per label combination."""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = sorted(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[label] for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = ",".join(f'{label}="{value}"' for label, value in zip(self.labels, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']:g}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+
+SECONDS = Histogram(
+    "dashboard_callback_seconds", "Callback wall time per phase.", ["callback", "phase"],
+    [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10])
+ROWS = Histogram(
+    "dashboard_callback_input_rows", "Data rows a callback selected before aggregating.", ["callback"],
+    [10, 100, 1e3, 1e4, 1e5, 1e6, 1e7])
+POINTS = Histogram(
+    "dashboard_callback_output_points", "Points in the figures a callback returned.", ["callback"],
+    [10, 100, 500, 1e3, 2e3, 5e3, 1e4, 1e5])
+BYTES = Histogram(
+    "dashboard_callback_response_bytes", "Serialised callback response size, before compression.", ["callback"],
+    [1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6])
+HISTOGRAMS = [SECONDS, ROWS, POINTS, BYTES]
+
+_current = contextvars.ContextVar("dashboard_metrics_record", default=None)
+
+
+def instrumented(name):
+    """Decorator recording timings and sizes of a callback under ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            record = {"phases": collections.defaultdict(float), "rows": None}
+            token = _current.set(record)
+            started = time.perf_counter()
+            try:
+                result = func(*args)
+            finally:
+                _current.reset(token)
+            elapsed = time.perf_counter() - started
+
+            SECONDS.observe(elapsed, callback=name, phase="total")
+            for phase_name, seconds in record["phases"].items():
+                SECONDS.observe(seconds, callback=name, phase=phase_name)
+            if record["rows"] is not None:
+                ROWS.observe(record["rows"], callback=name)
+            points = output_points(result)
+            if points is not None:
+                POINTS.observe(points, callback=name)
+            if has_request_context():
+                g.dashboard_callback = name
+            if SLOW_SECONDS and elapsed >= SLOW_SECONDS:
+                _log_slow(name, func, args, elapsed, record, points)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Time the enclosed block as phase ``name`` of the running callback."""
+    record = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if record is not None:
+            record["phases"][name] += time.perf_counter() - started
+
+
+def rows(count):
+    """Count ``count`` input rows for the running callback."""
+    record = _current.get()
+    if record is not None:
+        record["rows"] = (record["rows"] or 0) + int(count)
+
+
+def output_points(result):
+    """Number of points in the figure(s) of a callback result, or None without figures."""
+    if isinstance(result, (list, tuple)):
+        counts = [c for c in map(output_points, result) if c is not None]
+        return sum(counts) if counts else None
+    if hasattr(result, "to_plotly_json"):
+        result = result.to_plotly_json()
+    if not isinstance(result, dict) or not isinstance(result.get("data"), (list, tuple)):
+        return None
+    total = 0
+    for trace in result["data"]:
+        values = trace.get("x") if trace.get("x") is not None else trace.get("y")
+        total += _length(values)
+    return total
+
+
+def install(server):
+    """Serve ``/metrics`` on the Flask ``server`` and record callback response sizes."""
+    @server.after_request
+    def record_bytes(response):
+        name = g.get("dashboard_callback")
+        if name is not None and request.path.endswith("_dash-update-component"):
+            size = response.content_length
+            if size is None:
+                size = len(response.get_data())
+            BYTES.observe(size, callback=name)
+        return response
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(expose(), mimetype="text/plain; version=0.0.4")
+
+
+def expose():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    return "\n".join(lines) + "\n"
+
+
+def _length(values):
+    if values is None:
+        return 0
+    if isinstance(values, dict) and "bdata" in values:
+        # plotly typed array
+        return len(base64.b64decode(values["bdata"])) // np.dtype(values["dtype"]).itemsize
+    return len(values)
+
+
+def _log_slow(name, func, args, elapsed, record, points):
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "callback": name,
+        "module": func.__module__,
+        "function": func.__qualname__,
+        "args": args,
+        "seconds": round(elapsed, 4),
+        "phases": {k: round(v, 4) for k, v in record["phases"].items()},
+        "rows": record["rows"],
+        "points": points,
+    }
+    line = json.dumps(entry, default=str)
+    if SLOW_LOG:
+        with open(SLOW_LOG, "a") as fh:
+            fh.write(line + "\n")
+    else:
+        logger.warning("slow callback: %s", line)
+
+
+def replay(path):
+    """Re-run the callbacks logged in the slow-callback log at ``path``, uncached."""
+    import app  # noqa: F401  registers the pages
+    from dashboard import figures, lazy
+
+    figures.backend = None
+    with open(path) as fh:
+        for line in fh:
+            entry = json.loads(line)
+            # With lazy pages (dashboard/lazy.py) the module may not be imported yet.
+            module = lazy.load(entry["module"])
+            func = getattr(module, entry["function"])
+            started = time.perf_counter()
+            func(*entry["args"])
+            print(f"{entry['callback']:<16} logged {entry['seconds']:8.3f}s  "
+                  f"replayed {time.perf_counter() - started:8.3f}s  {json.dumps(entry['args'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a slow-callback log.")
+    parser.add_argument("command", choices=["replay"])
+    parser.add_argument("log", help="JSON-lines file written via DASHBOARD_SLOW_CALLBACK_LOG")
+    args = parser.parse_args()
+    replay(args.log)
+
+
+if __name__ == "__main__":
+    main()
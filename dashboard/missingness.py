@@ -0,0 +1,90 @@
+"""Unknown-classification ratios as a dense array for the missingness page.
+
+``missingness_by_rank.csv`` is loaded once into a single array indexed by
+(app_type, year, country, rank_bin), with missing combinations as NaN.
+Rank bins such as "[10, 20)" are stored as integer codes ordered by their
+lower bound, so charts list them numerically instead of as sorted strings.
+The bar chart takes one slice of the array per request, and the heatmap
+shows every country of a year selection from a single slice.
+"""
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+from dashboard import data
+
+
+class MissingnessCube:
+    def __init__(self, app_types, years, countries, rank_bins, values):
+        self.app_types = app_types
+        self.years = years
+        self.countries = countries
+        self.rank_bins = rank_bins
+        self.values = values
+
+    def select(self, app_type, years, countries):
+        """Long-form (year, country, rank_bin, unknown_ratio) rows, rank bins in order, NaNs dropped."""
+        a = self.app_types.get_indexer([app_type])[0]
+        y = _positions(self.years, years)
+        c = _positions(self.countries, countries)
+        if a < 0 or not len(y) or not len(c):
+            return pd.DataFrame(columns=["year", "country", "rank_bin", "unknown_ratio"])
+
+        block = self.values[a][np.ix_(y, c)]
+        keep = ~np.isnan(block)
+        yi, ci, ri = np.nonzero(keep)
+        return pd.DataFrame({
+            "year": self.years[y][yi],
+            "country": self.countries[c][ci],
+            "rank_bin": pd.Categorical.from_codes(ri, self.rank_bins),
+            "unknown_ratio": block[keep],
+        })
+
+    def matrix(self, app_type, years):
+        """(country, rank_bin) unknown ratios of ``app_type``, averaged over ``years``."""
+        a = self.app_types.get_indexer([app_type])[0]
+        y = _positions(self.years, years)
+        if a < 0 or not len(y):
+            return np.full((len(self.countries), len(self.rank_bins)), np.nan)
+        block = self.values[a, y]
+        if len(y) == 1:
+            return block[0]
+        counts = (~np.isnan(block)).sum(axis=0)
+        return np.where(counts > 0, np.nansum(block, axis=0) / np.maximum(counts, 1), np.nan)
+
+
+def rank_order(labels):
+    """Rank bin labels sorted by their lower bound, e.g. "[0, 10)" before "[100, 110)"."""
+    def lower(label):
+        match = re.match(r"\s*[\[(]\s*(-?\d+)", str(label))
+        return (int(match.group(1)), str(label)) if match else (float("inf"), str(label))
+    return sorted(labels, key=lower)
+
+
+@functools.cache
+def cube():
+    df = data.get("missingness")
+    app_types = pd.Index(sorted(df["app_type"].astype(str).unique()))
+    years = pd.Index(sorted(df["year"].unique()))
+    countries = pd.Index(sorted(df["country"].astype(str).unique()))
+    rank_bins = pd.Index(rank_order(df["rank_bin"].astype(str).unique()))
+
+    values = np.full((len(app_types), len(years), len(countries), len(rank_bins)), np.nan)
+    values[
+        app_types.get_indexer(df["app_type"].astype(str)),
+        years.get_indexer(df["year"]),
+        countries.get_indexer(df["country"].astype(str)),
+        rank_bins.get_indexer(df["rank_bin"].astype(str)),
+    ] = df["unknown_ratio"].to_numpy()
+    return MissingnessCube(app_types, years, countries, rank_bins, values)
+
+
+def _positions(index, values):
+    if values is None:
+        return np.array([], dtype=int)
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    found = index.get_indexer(sorted(set(values)))
+    return found[found >= 0]
@@ -0,0 +1,270 @@
+"""Build the ``global_borda_*`` and ``missingness_by_rank.csv`` tables from raw rankings.
+
+Raw rankings have one row per listed app::
+
+    date, country, app_type, rank, app_id, classification
+
+with ``rank`` counted from 0 within each country's daily top list. An app
+at rank ``r`` earns ``MAX_RANK - r`` Borda points. Per (time, app_type,
+classification) the tables hold:
+
+* ``global_borda_*``: the sum of points,
+* ``global_borda_mean_*``: the mean points per listed app,
+* ``global_borda_median_*``: the median points per listed app,
+
+each with ``relative_score`` = score / sum of scores over the categories
+of that (time, app_type). Unlabelled and "Unknown" apps are left out of
+the scores. ``missingness_by_rank.csv`` holds, per (year, country,
+rank bin, app_type), the percentage of listed apps without a category.
+
+Appending new dates only touches what they affect: daily rows are
+appended, and monthly rows are recomputed for the touched months from
+per-month point histograms kept in ``data/.pipeline/``, so mean and
+median stay exact without rescanning history. Missingness rows are
+recomputed for the touched years from stored counts.
+
+    python -m dashboard.pipeline build raw/*.csv
+    python -m dashboard.pipeline append raw/2024-05-02.csv
+"""
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from dashboard import data
+
+logger = logging.getLogger(__name__)
+
+MAX_RANK = 200
+BIN_WIDTH = 10
+UNKNOWN = "Unknown"
+
+KEYS = ["app_type", "classification"]
+METHOD_FILES = {
+    "borda": "global_borda_{}.csv",
+    "mean": "global_borda_mean_{}.csv",
+    "median": "global_borda_median_{}.csv",
+}
+MISSINGNESS_FILE = "missingness_by_rank.csv"
+STATE_FILE = os.path.join(".pipeline", "state.pkl")
+
+
+def read_raw(paths):
+    frames = [pd.read_csv(p, dtype={"country": str, "app_type": str, "app_id": str, "classification": str})
+              for p in paths]
+    return pd.concat(frames, ignore_index=True)
+
+
+def prepare(raw):
+    """Typed raw rows with Borda ``points``; ranks outside the top list are dropped."""
+    raw = raw[(raw["rank"] >= 0) & (raw["rank"] < MAX_RANK)].copy()
+    raw["date"] = pd.to_datetime(raw["date"]).dt.normalize()
+    raw["month"] = raw["date"].dt.to_period("M").dt.to_timestamp()
+    raw["country"] = raw["country"].str.lower()
+    raw["points"] = (MAX_RANK - raw["rank"]).astype(np.int16)
+    raw["unknown"] = raw["classification"].isna() | (raw["classification"] == UNKNOWN)
+    return raw
+
+
+def daily_tables(raw):
+    """Daily Borda/mean/median tables of prepared ``raw``."""
+    known = raw[~raw["unknown"]]
+    grouped = known.groupby(["date"] + KEYS, sort=True)["points"]
+    scores = grouped.agg(["sum", "mean", "median"]).reset_index()
+    return {
+        method: _relative(scores.rename(columns={column: "score_borda"})[["date"] + KEYS + ["score_borda"]], "date")
+        for method, column in [("borda", "sum"), ("mean", "mean"), ("median", "median")]
+    }
+
+
+def histograms(raw, time_col):
+    """Per (time, app_type, classification) counts of each Borda point value."""
+    known = raw[~raw["unknown"]]
+    group = known.groupby([time_col] + KEYS, sort=True)
+    keys = group.size().index.to_frame(index=False)
+    hist = np.zeros((len(keys), MAX_RANK), dtype=np.int64)
+    np.add.at(hist, (group.ngroup().to_numpy(), known["points"].to_numpy() - 1), 1)
+    return keys, hist
+
+
+def histogram_tables(keys, hist, time_col):
+    """Borda/mean/median tables from point histograms keyed by (time, app_type, classification)."""
+    points = np.arange(1, MAX_RANK + 1)
+    count = hist.sum(axis=1)
+    total = hist @ points
+    cum = hist.cumsum(axis=1)
+    lower = (cum > ((count - 1) // 2)[:, None]).argmax(axis=1)
+    upper = (cum > (count // 2)[:, None]).argmax(axis=1)
+    scores = {
+        "borda": total,
+        "mean": total / count,
+        "median": (points[lower] + points[upper]) / 2,
+    }
+    return {method: _relative(keys.assign(score_borda=values), time_col) for method, values in scores.items()}
+
+
+def merge_histograms(keys, hist):
+    """Sum the histogram rows of ``hist`` that share the same key in ``keys``."""
+    codes, uniques = pd.factorize(pd.MultiIndex.from_frame(keys), sort=True)
+    merged = np.zeros((len(uniques), MAX_RANK), dtype=hist.dtype)
+    np.add.at(merged, codes, hist)
+    merged_keys = pd.DataFrame(list(uniques), columns=keys.columns)
+    merged_keys[keys.columns[0]] = pd.to_datetime(merged_keys[keys.columns[0]])
+    return merged_keys, merged
+
+
+def missingness_counts(raw):
+    """Listed and unlabelled app counts per (year, country, rank_bin, app_type)."""
+    raw = raw.assign(year=raw["date"].dt.year, rank_bin=raw["rank"] // BIN_WIDTH * BIN_WIDTH)
+    return (
+        raw.groupby(["year", "country", "rank_bin", "app_type"])["unknown"]
+        .agg(unknown="sum", total="size")
+        .reset_index()
+    )
+
+
+def merge_counts(counts):
+    """Sum missingness counts that share the same (year, country, rank_bin, app_type)."""
+    return counts.groupby(["year", "country", "rank_bin", "app_type"], as_index=False)[["unknown", "total"]].sum()
+
+
+def missingness_table(counts):
+    table = counts.assign(
+        rank_bin=[f"[{b}, {b + BIN_WIDTH})" for b in counts["rank_bin"]],
+        unknown_ratio=counts["unknown"] / counts["total"] * 100,
+    )
+    return table[["year", "country", "rank_bin", "app_type", "unknown_ratio"]]
+
+
+def build(raw, out_dir=data.DATA_DIR):
+    """Rebuild every table in ``out_dir`` from the complete raw history."""
+    state_path = os.path.join(out_dir, STATE_FILE)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    outputs = [pattern.format(granularity)
+               for granularity in ["daily", "monthly"] for pattern in METHOD_FILES.values()]
+    for name in outputs + [MISSINGNESS_FILE]:
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    append(raw, out_dir, _empty_state())
+
+
+def append(raw, out_dir=data.DATA_DIR, state=None):
+    """Add the dates in ``raw`` to the tables in ``out_dir``.
+
+    Dates that are already aggregated are rejected; use :func:`build` to
+    recompute history.
+    """
+    state_path = os.path.join(out_dir, STATE_FILE)
+    if state is None:
+        if not os.path.exists(state_path):
+            raise FileNotFoundError(f"{state_path} not found; run a full build first")
+        state = pd.read_pickle(state_path)
+
+    raw = prepare(raw)
+    dates = pd.DatetimeIndex(raw["date"].unique())
+    already = dates.intersection(state["dates"])
+    if len(already):
+        raise ValueError(f"{len(already)} dates are already aggregated, e.g. {already[0].date()}")
+
+    # Daily rows: only the new dates, appended.
+    for method, table in daily_tables(raw).items():
+        _append_csv(table, os.path.join(out_dir, METHOD_FILES[method].format("daily")), "date")
+
+    # Monthly rows: merge histograms and recompute the touched months.
+    keys, hist = histograms(raw, "month")
+    state["month_keys"], state["month_hist"] = merge_histograms(
+        pd.concat([state["month_keys"], keys], ignore_index=True),
+        np.vstack([state["month_hist"], hist]))
+    months = keys["month"].unique()
+    touched = state["month_keys"]["month"].isin(months).to_numpy()
+    for method, table in histogram_tables(state["month_keys"][touched].reset_index(drop=True),
+                                          state["month_hist"][touched], "month").items():
+        _replace_rows(table, os.path.join(out_dir, METHOD_FILES[method].format("monthly")),
+                      "month", set(months), ["month"] + KEYS)
+
+    # Missingness: merge counts and recompute the touched years.
+    counts = missingness_counts(raw)
+    merged = pd.concat([state["missing_counts"], counts])
+    state["missing_counts"] = merge_counts(merged)
+    years = set(counts["year"])
+    table = missingness_table(state["missing_counts"][state["missing_counts"]["year"].isin(years)])
+    _replace_rows(table, os.path.join(out_dir, MISSINGNESS_FILE), "year", years,
+                  ["year", "country", "rank_bin", "app_type"])
+
+    state["dates"] = state["dates"].union(dates)
+    save_state(state, out_dir)
+    logger.info("aggregated %d rows over %d dates (%d months, %d years touched)",
+                len(raw), len(dates), len(months), len(years))
+
+
+def save_state(state, out_dir=data.DATA_DIR):
+    """Store the histograms and counts that later appends build on."""
+    state_path = os.path.join(out_dir, STATE_FILE)
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    pd.to_pickle(state, state_path)
+
+
+def _empty_state():
+    return {
+        "dates": pd.DatetimeIndex([]),
+        "month_keys": pd.DataFrame(columns=["month"] + KEYS),
+        "month_hist": np.zeros((0, MAX_RANK), dtype=np.int64),
+        "missing_counts": pd.DataFrame(columns=["year", "country", "rank_bin", "app_type", "unknown", "total"]),
+    }
+
+
+def _relative(scores, time_col):
+    total = scores.groupby([time_col, "app_type"])["score_borda"].transform("sum")
+    return scores.assign(relative_score=scores["score_borda"] / total)
+
+
+def _format(table, time_col):
+    if time_col in ("date", "month"):
+        table = table.assign(**{time_col: table[time_col].dt.strftime("%Y-%m-%d")})
+    return table
+
+
+def _append_csv(table, path, time_col):
+    exists = os.path.exists(path)
+    _format(table, time_col).to_csv(path, mode="a" if exists else "w", header=not exists, index=False)
+
+
+def _replace_rows(table, path, time_col, replaced, sort_by):
+    table = _format(table, time_col)
+    if os.path.exists(path):
+        existing = pd.read_csv(path, float_precision="round_trip")
+        keys = {str(v) for v in _format(pd.DataFrame({time_col: sorted(replaced)}), time_col)[time_col]}
+        existing = existing[~existing[time_col].astype(str).isin(keys)]
+        table = pd.concat([existing, table], ignore_index=True)
+    table.sort_values(sort_by, key=_sort_key, kind="stable").to_csv(path, index=False)
+
+
+def _sort_key(column):
+    # "[100, 110)" sorts after "[90, 100)"
+    if column.name == "rank_bin":
+        # astype(str): an empty table has no strings to infer the dtype from
+        return column.astype(str).str.extract(r"(\d+)", expand=False).astype(int)
+    return column
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate raw Google Play rankings into data/ tables.")
+    parser.add_argument("command", choices=["build", "append"])
+    parser.add_argument("raw", nargs="+", help="raw ranking CSV files")
+    parser.add_argument("--out", default=data.DATA_DIR, help="output directory (default: data/)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    raw = read_raw(args.raw)
+    if args.command == "build":
+        build(raw, args.out)
+    else:
+        append(raw, args.out)
+
+
+if __name__ == "__main__":
+    main()
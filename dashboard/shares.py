@@ -0,0 +1,153 @@
+"""Relative Borda shares, precomputed per (app_type, year) block.
+
+A share cube holds, for every (app_type, year), the per-time category
+shares with "Unknown" excluded and each time point renormalised to 100%.
+Callbacks only look blocks up and concatenate them for multi-year
+selections; nothing is grouped or normalised per request.
+
+The global cubes (:func:`global_cube`) build their blocks one year at a
+time, the first time a year is requested, from that year's rows only. So
+adding 2023 to a [2022] selection computes the 2023 blocks and reuses the
+cached 2022 ones. Monthly Borda sums are the sums of the daily ones, so a
+monthly Borda year whose daily blocks are already cached is derived from
+them instead of loading the monthly file.
+"""
+import functools
+import threading
+
+import pandas as pd
+
+from dashboard import data
+
+UNKNOWN = "Unknown"
+
+COLUMNS = ["time", "classification", "score_borda", "relative_score"]
+
+
+def relative_shares(df, time_col):
+    """Sum ``score_borda`` per (app_type, year, time, classification) and renormalise per time."""
+    df = df[df["classification"] != UNKNOWN]
+    agg = (
+        df.groupby(["app_type", "year", time_col, "classification"], observed=True)["score_borda"]
+        .sum()
+        .reset_index()
+        .rename(columns={time_col: "time"})
+    )
+    total = agg.groupby(["app_type", "year", "time"], observed=True)["score_borda"].transform("sum")
+    agg["relative_score"] = agg["score_borda"] / total * 100
+    return agg
+
+
+def build_cube(df, time_col):
+    """Split the relative shares of ``df`` into blocks keyed by (app_type, year)."""
+    agg = relative_shares(df, time_col)
+    return {
+        (app_type, int(year)): block[COLUMNS].reset_index(drop=True)
+        for (app_type, year), block in agg.groupby(["app_type", "year"], observed=True)
+    }
+
+
+def monthly(block):
+    """Monthly relative shares of a daily block, renormalised per month."""
+    month = block["time"].dt.to_period("M").dt.to_timestamp()
+    agg = (
+        block.groupby([month, "classification"], observed=True)["score_borda"]
+        .sum()
+        .reset_index()
+    )
+    agg["relative_score"] = agg["score_borda"] / agg.groupby("time")["score_borda"].transform("sum") * 100
+    return agg[COLUMNS]
+
+
+class ShareCube:
+    """Share blocks of one global dataset, built a year at a time on first use.
+
+    Behaves like the ``{(app_type, year): block}`` dict of :func:`build_cube`
+    for :func:`select`.
+    """
+
+    def __init__(self, name, daily=None):
+        self.name = name
+        self.time_col = data.time_column(name)
+        # Daily cube whose blocks can be summed into this monthly one
+        self.daily = daily
+        self._blocks = {}
+        self._year_rows = None
+        self._years = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        self._build(key[1])
+        return self._blocks.get(key, default)
+
+    def __getitem__(self, key):
+        block = self.get(key)
+        if block is None:
+            raise KeyError(key)
+        return block
+
+    def built(self, year):
+        return year in self._years
+
+    def build_all(self):
+        """Build the blocks of every year; used by the preload and warm-up."""
+        for year in self._rows().keys():
+            self._build(int(year))
+        return self
+
+    def _build(self, year):
+        if year in self._years:
+            return
+        with self._lock:
+            if year in self._years:
+                return
+            if self._derivable(year):
+                # A year of the daily frame is far cheaper than loading the monthly file.
+                for app_type in self.daily.app_types(year):
+                    self._blocks[(app_type, year)] = monthly(self.daily[(app_type, year)])
+            else:
+                rows = self._rows().get(year)
+                if rows is not None:
+                    self._blocks.update(build_cube(data.get(self.name).take(rows), self.time_col))
+            self._years.add(year)
+
+    def app_types(self, year):
+        self._build(year)
+        return [app_type for app_type, y in self._blocks if y == year]
+
+    def _derivable(self, year):
+        return (self.daily is not None and self.daily.built(year)
+                and self.name not in data.loaded())
+
+    def _rows(self):
+        """Row positions of each year in the dataset."""
+        if self._year_rows is None:
+            frame = data.get(self.name)
+            self._year_rows = {int(year): rows for year, rows in frame.groupby("year").indices.items()}
+        return self._year_rows
+
+
+def select(cube, app_type, years):
+    """Concatenate the blocks of ``cube`` for ``app_type`` and ``years`` in time order."""
+    blocks = [cube.get((app_type, y)) for y in sorted(set(years))]
+    blocks = [block for block in blocks if block is not None]
+    if not blocks:
+        return pd.DataFrame(columns=COLUMNS)
+    if len(blocks) == 1:
+        return blocks[0]
+    return pd.concat(blocks, ignore_index=True)
+
+
+def global_cube(granularity, method="borda"):
+    """The lazily built :class:`ShareCube` of a global dataset."""
+    return _cube(f"{method.lower()}_{granularity}")
+
+
+@functools.cache
+def _cube(name):
+    return ShareCube(name, _cube("borda_daily") if name == "borda_monthly" else None)
+
+
+def global_shares(granularity, app_type, years, method="borda"):
+    """Global category shares for one app type and a set of years."""
+    return select(global_cube(granularity, method), app_type, years)
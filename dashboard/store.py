@@ -0,0 +1,165 @@
+"""Consolidated Parquet store for the per-country rankings.
+
+``data/by_country_year/{country}_{year}.csv`` is combined into one hive
+partitioned dataset under ``data/by_country/country=<c>/year=<y>/``. Each
+partition is sorted by app_type and date and written with one row group
+per app type, so :func:`read` prunes partitions by country/year and skips
+row groups by app type before anything is decoded.
+
+Build or rebuild it with::
+
+    python -m dashboard.store
+
+Requires ``pyarrow``. The store records the size and mtime of every CSV it
+was built from. When the store has not been built, or the CSVs have changed
+since, RQ2 reads the CSV files (see :mod:`dashboard.countries`) until the
+store is rebuilt.
+"""
+import functools
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from dashboard import data
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR = os.path.join(data.DATA_DIR, "by_country_year")
+STORE_DIR = os.path.join(data.DATA_DIR, "by_country")
+INDEX_FILE = "_index.json"
+SOURCES_FILE = "_sources.json"
+
+COLUMNS = ["date", "month", "app_type", "classification", "score_borda"]
+
+
+def available():
+    return os.path.exists(os.path.join(STORE_DIR, INDEX_FILE))
+
+
+def current(source_dir=SOURCE_DIR, store_dir=STORE_DIR):
+    """Whether the store was built from the CSV files now in ``source_dir``.
+
+    Without ``source_dir`` the store is the only copy of the data and is
+    always current.
+    """
+    if not os.path.isdir(source_dir):
+        return True
+    try:
+        with open(os.path.join(store_dir, SOURCES_FILE)) as fh:
+            return json.load(fh) == sources(source_dir)
+    except (OSError, ValueError):
+        return False
+
+
+def sources(source_dir=SOURCE_DIR):
+    """``{file name: [size, mtime_ns]}`` of every ``{country}_{year}.csv`` in ``source_dir``."""
+    found = {}
+    for fname in sorted(os.listdir(source_dir)):
+        if _partition(fname) is not None:
+            stat = os.stat(os.path.join(source_dir, fname))
+            found[fname] = [stat.st_size, stat.st_mtime_ns]
+    return found
+
+
+def index():
+    """``{country: {year: [app_type, ...]}}`` as recorded at build time."""
+    with open(os.path.join(STORE_DIR, INDEX_FILE)) as fh:
+        return {country: {int(year): types for year, types in years.items()}
+                for country, years in json.load(fh).items()}
+
+
+def read(country=None, years=None, app_type=None, columns=COLUMNS):
+    """Rows matching the given filters; any filter left as None matches everything."""
+    import pyarrow.dataset as ds
+
+    condition = None
+    for expr in [
+        ds.field("country") == country if country is not None else None,
+        ds.field("year").isin(list(years)) if years is not None else None,
+        ds.field("app_type") == app_type if app_type is not None else None,
+    ]:
+        if expr is not None:
+            condition = expr if condition is None else condition & expr
+
+    table = _dataset().to_table(columns=list(columns), filter=condition)
+    return table.to_pandas()
+
+
+@functools.cache
+def _dataset():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(
+        pa.schema([("country", pa.string()), ("year", pa.int16())]), flavor="hive")
+    return ds.dataset(STORE_DIR, format="parquet", partitioning=partitioning)
+
+
+def build(source_dir=SOURCE_DIR, store_dir=STORE_DIR):
+    """Combine every ``{country}_{year}.csv`` in ``source_dir`` into the store."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    staging = store_dir + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+
+    # Stat before reading, so a file changed during the build counts as changed.
+    built_from = sources(source_dir)
+    store_index = {}
+    rows = 0
+    for fname in built_from:
+        country, year = _partition(fname)
+
+        df = pd.read_csv(os.path.join(source_dir, fname))
+        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d")
+        df["month"] = pd.to_datetime(df["month"].astype(str))
+        df = df.sort_values(["app_type", "date"], kind="stable").reset_index(drop=True)
+        for col in ["app_type", "classification"]:
+            df[col] = df[col].astype("category")
+
+        partition = os.path.join(staging, f"country={country}", f"year={year}")
+        os.makedirs(partition)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        codes = df["app_type"].cat.codes.to_numpy()
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(df)]
+        with pq.ParquetWriter(os.path.join(partition, "part-0.parquet"), table.schema) as writer:
+            for start, end in zip(starts, ends):
+                writer.write_table(table.slice(start, end - start))
+
+        store_index.setdefault(country, {})[year] = sorted(
+            str(a) for a in df["app_type"].dropna().unique())
+        rows += len(df)
+
+    os.makedirs(staging, exist_ok=True)
+    with open(os.path.join(staging, INDEX_FILE), "w") as fh:
+        json.dump(store_index, fh)
+    with open(os.path.join(staging, SOURCES_FILE), "w") as fh:
+        json.dump(built_from, fh)
+
+    previous = store_dir + ".old"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(store_dir):
+        os.rename(store_dir, previous)
+    os.rename(staging, store_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    _dataset.cache_clear()
+
+    logger.info("stored %d rows for %d countries in %s", rows, len(store_index), store_dir)
+
+
+def _partition(fname):
+    """(country, year) of ``{country}_{year}.csv``, or None for other files."""
+    parts = fname[:-len(".csv")].split("_") if fname.endswith(".csv") else []
+    if len(parts) != 2 or not parts[1].isdigit():
+        return None
+    return parts[0], int(parts[1])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    build()
@@ -0,0 +1,186 @@
+"""Warm-up of data, aggregates and figures in the background after boot.
+
+:func:`start` runs, on a small thread pool, everything the first visitor
+of each page would otherwise wait for:
+
+1. every dataset and derived cube (see :func:`data_tasks`; with gunicorn's
+   ``preload_app`` these are already loaded in the master before fork),
+2. the figures for each page's default filters, read from the page
+   layout, and for the hotlist in ``DASHBOARD_WARMUP_HOTLIST``,
+3. the RQ2 per-country shares of the latest year for every country.
+
+Figures land in the figure cache (:mod:`dashboard.figures`), so later
+requests for those combinations are cache hits. The pool runs beside the
+server: ``/readyz`` does not wait for it, and its progress is reported
+under ``warmup`` in the readiness payload. ``DASHBOARD_WARMUP=0`` turns
+it off and ``DASHBOARD_WARMUP_THREADS`` sizes the pool (default 2). With
+lazy page modules (:mod:`dashboard.lazy`) it is off unless set to 1, since
+warming would import every page.
+
+The hotlist is a JSON-lines file in the format of the slow-callback log
+(see :mod:`dashboard.metrics`), so logged slow combinations can be fed
+straight back in::
+
+    {"module": "pages.app_rq1", "function": "update_graph", "args": ["daily", "Free", [2023], null]}
+"""
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+
+from dashboard import lazy
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("DASHBOARD_WARMUP", "0" if lazy.ENABLED else "1") != "0"
+THREADS = int(os.environ.get("DASHBOARD_WARMUP_THREADS", "2"))
+HOTLIST = os.environ.get("DASHBOARD_WARMUP_HOTLIST")
+
+# Per-country shares warmed for RQ2; stays below the page's LRU size.
+MAX_COUNTRY_CUBES = 128
+
+# page module -> (figure callback, ids of the dropdowns it takes, in order)
+DEFAULT_FIGURES = {
+    "app_rq1": ("update_graph", ["granularity-dropdown", "app-type-dropdown", "year-dropdown",
+                                 "overlay-checklist"]),
+    "app_rq1_1": ("update_chart", ["granularity-dropdown", "app-type-dropdown", "year-dropdown"]),
+    "app_rq2": ("update_graph", ["granularity-dropdown", "app-type-dropdown", "country-dropdown", "year-dropdown",
+                                 "overlay-checklist"]),
+    "app_rq2_compare": ("update_graph", ["compare-granularity-dropdown", "compare-app-type-dropdown",
+                                         "compare-year-dropdown", "compare-view-radio"]),
+    "missing": ("update_graph", ["type-dropdown", "year-dropdown", "country-dropdown", "view-radio"]),
+    "dash_method_trends": ("update_graph", ["app-type-dropdown", "method-dropdown", "year-dropdown",
+                                            "category-dropdown", "granularity-dropdown", "band-checklist"]),
+}
+
+_state = {"state": "idle", "tasks": 0, "done": 0, "failed": 0, "seconds": None}
+_lock = threading.Lock()
+
+
+def data_tasks():
+    """(name, task) pairs loading every dataset and derived structure."""
+    from dashboard import countries, data, methods, shares
+
+    tasks = [(name, lambda name=name: data.get(name)) for name in data.DATASETS]
+    tasks += [(f"shares_{g}", lambda g=g: shares.global_cube(g).build_all()) for g in ["daily", "monthly"]]
+    tasks += [(f"methods_{g}", lambda g=g: methods.cube(g)) for g in ["daily", "monthly"]]
+    tasks += [("countries", countries.index)]
+    return tasks
+
+
+def figure_tasks():
+    """Figures of every page's default filters, then the hotlist."""
+    tasks = [(f"{page}_defaults", lambda page=page: _default_figure(page)) for page in DEFAULT_FIGURES]
+    if HOTLIST and os.path.exists(HOTLIST):
+        with open(HOTLIST) as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    page = entry["module"].split(".")[-1]
+                    tasks.append((f"{page}_hot", lambda page=page, entry=entry:
+                                  getattr(page_module(page), entry["function"])(*entry["args"])))
+    return tasks
+
+
+def country_tasks():
+    """RQ2 shares of every country's latest year, per app type, monthly."""
+    from dashboard import countries
+
+    latest = {}
+    for country, year in countries.index():
+        latest[country] = max(year, latest.get(country, year))
+    tasks = []
+    for country, year in sorted(latest.items()):
+        for app_type in countries.app_types(country, [year]):
+            tasks.append((f"rq2_{country}_{year}_{app_type}", lambda c=country, y=year, a=app_type:
+                          countries.country_cube(c, y, a, "monthly")))
+    return tasks[:MAX_COUNTRY_CUBES]
+
+
+def start():
+    """Start the background warm-up; returns the thread, or None if disabled."""
+    if not ENABLED:
+        return None
+    with _lock:
+        if _state["state"] != "idle":
+            return None
+        _state["state"] = "running"
+    thread = threading.Thread(target=_warm, name="dashboard-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def status():
+    with _lock:
+        return dict(_state)
+
+
+def page_module(name):
+    """The page module Dash imported for ``pages/<name>.py``, importing it if pages are lazy."""
+    import dash
+
+    if not dash.page_registry:
+        import app  # noqa: F401  registers the pages
+    for entry in dash.page_registry.values():
+        if entry["module"].split(".")[-1] == name:
+            return lazy.load(entry["module"])
+    raise KeyError(name)
+
+
+def defaults(layout):
+    """Initial ``value`` of every component with an id in ``layout``."""
+    found = {}
+    for component in [layout, *layout._traverse()]:
+        component_id = getattr(component, "id", None)
+        if component_id is not None and hasattr(component, "value"):
+            found[component_id] = component.value
+    return found
+
+
+def _default_figure(page):
+    module = page_module(page)
+    function, inputs = DEFAULT_FIGURES[page]
+    values = defaults(module.layout())
+    if page == "app_rq2" and values.get("app-type-dropdown") is None:
+        # RQ2's app type is filled in by a callback once country and years are known
+        values["app-type-dropdown"] = module.update_app_type_dropdown(
+            values["country-dropdown"], values["year-dropdown"])[1]
+    return getattr(module, function)(*[values.get(i) for i in inputs])
+
+
+def _warm():
+    started = time.perf_counter()
+    stages = [data_tasks, figure_tasks, country_tasks]
+    with concurrent.futures.ThreadPoolExecutor(THREADS, thread_name_prefix="dashboard-warmup") as pool:
+        for stage in stages:
+            try:
+                tasks = stage()
+            except Exception:
+                logger.exception("warm-up stage %s failed", stage.__name__)
+                continue
+            with _lock:
+                _state["tasks"] += len(tasks)
+            # Stages run one after the other: figures need the data loaded.
+            list(pool.map(lambda task: _run_one(*task), tasks))
+    with _lock:
+        _state["state"] = "done"
+        _state["seconds"] = time.perf_counter() - started
+        summary = dict(_state)
+    logger.info("warm-up finished: %d tasks in %.2fs (%d failed)",
+                summary["tasks"], summary["seconds"], summary["failed"])
+
+
+def _run_one(name, task):
+    try:
+        task()
+    except Exception:
+        # A broken file or page must not stop the rest of the warm-up.
+        logger.exception("warming %s failed", name)
+        with _lock:
+            _state["failed"] += 1
+        return False
+    with _lock:
+        _state["done"] += 1
+    return True
@@ -0,0 +1,24 @@
+"""gunicorn settings for ``gunicorn -c gunicorn.conf.py wsgi:server``.
+
+Defaults suit one box serving many concurrent sessions: one process per
+CPU, each with a few threads so a slow daily-view callback does not block
+other users, and the app preloaded in the master so workers share data.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("DASHBOARD_THREADS", "4"))
+worker_class = "gthread"
+preload_app = os.environ.get("DASHBOARD_PRELOAD", "1") != "0"
+timeout = int(os.environ.get("DASHBOARD_TIMEOUT", "120"))
+max_requests = int(os.environ.get("DASHBOARD_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # Threads do not survive fork, so each worker starts its own warm-up.
+    from dashboard import warmup
+    warmup.start()
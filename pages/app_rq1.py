@@ -1,25 +1,10 @@
-import os
-import pandas as pd
-from dash import Dash, dcc, html, Input, Output
+from dash import dcc, html, Input, Output
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import dash
 from dash import callback
-# === Initialize Dash App ===
 
-# === Load Data ===
-data_dir = os.path.join(os.path.dirname(__file__), "../data")
-daily_file = os.path.join(data_dir, "global_borda_daily.csv")
-monthly_file = os.path.join(data_dir, "global_borda_monthly.csv")
-
-daily_df = pd.read_csv(daily_file)
-monthly_df = pd.read_csv(monthly_file)
-
-daily_df["date"] = pd.to_datetime(daily_df["date"])
-monthly_df["month"] = pd.to_datetime(monthly_df["month"])
-
-daily_df["year"] = daily_df["date"].dt.year
-monthly_df["year"] = monthly_df["month"].dt.year
+from dashboard import analytics, data, decimate, figures, jobs, metrics, shares
 
 # === Initialize App ===
 dash.register_page(__name__ , path="/rq1",
@@ -27,87 +12,113 @@ dash.register_page(__name__ , path="/rq1",
                     order=1)
 
 # === Layout ===
-layout = dbc.Container([
-    html.H2("🌍 Global App Category Trends Over Time", className="my-3"),
-
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select Granularity"),
-            dcc.Dropdown(
-                id="granularity-dropdown",
-                options=[
-                    {"label": "Daily", "value": "daily"},
-                    {"label": "Monthly", "value": "monthly"},
-                ],
-                value="monthly",
-                clearable=False
-            )
-        ], width=3),
-
-        dbc.Col([
-            html.Label("Select App Type"),
-            dcc.Dropdown(
-                id="app-type-dropdown",
-                options=[{"label": t, "value": t} for t in sorted(daily_df['app_type'].unique())],
-                value="Free",
-                clearable=False
-            )
-        ], width=3),
-
-        dbc.Col([
-            html.Label("Select Year(s)"),
-            dcc.Dropdown(
-                id="year-dropdown",
-                options=[{"label": str(y), "value": y} for y in sorted(daily_df['year'].unique())],
-                value=[2022],
-                multi=True
-            )
-        ], width=6),
-    ], className="mb-4"),
-            html.P(
-                "This chart visualizes the global distribution of educational app categories over time,"
-                " using normalized Borda scores aggregated from national rankings across countries.",             className="text-muted"
-            ),
-    dcc.Graph(id="global-trend-graph")
-])
+def layout(**kwargs):
+    daily_df = data.get("borda_daily")
+    return dbc.Container([
+        html.H2("🌍 Global App Category Trends Over Time", className="my-3"),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select Granularity"),
+                dcc.Dropdown(
+                    id="granularity-dropdown",
+                    options=[
+                        {"label": "Daily", "value": "daily"},
+                        {"label": "Monthly", "value": "monthly"},
+                    ],
+                    value="monthly",
+                    clearable=False
+                )
+            ], width=3),
+
+            dbc.Col([
+                html.Label("Select App Type"),
+                dcc.Dropdown(
+                    id="app-type-dropdown",
+                    options=[{"label": t, "value": t} for t in sorted(daily_df['app_type'].unique())],
+                    value="Free",
+                    clearable=False
+                )
+            ], width=3),
+
+            dbc.Col([
+                html.Label("Select Year(s)"),
+                dcc.Dropdown(
+                    id="year-dropdown",
+                    options=[{"label": str(y), "value": y} for y in sorted(daily_df['year'].unique())],
+                    value=[2022],
+                    multi=True
+                )
+            ], width=6),
+        ], className="mb-4"),
+                html.P(
+                    "This chart visualizes the global distribution of educational app categories over time,"
+                    " using normalized Borda scores aggregated from national rankings across countries.",             className="text-muted"
+                ),
+        dcc.Checklist(
+            id="overlay-checklist",
+            options=[{"label": label, "value": value} for value, label in analytics.OVERLAYS.items()],
+            value=[],
+            inline=True,
+            inputStyle={"marginRight": "4px"},
+            labelStyle={"marginRight": "16px"},
+            className="mb-2"
+        ),
+        *jobs.components("global-trend-graph"),
+        dcc.Graph(id="global-trend-graph")
+    ])
 
 
 # === Callback ===
-@callback(
-    Output("global-trend-graph", "figure"),
-    Input("granularity-dropdown", "value"),
-    Input("app-type-dropdown", "value"),
-    Input("year-dropdown", "value")
-)
-def update_graph(granularity, app_type, selected_years):
+@metrics.instrumented("rq1")
+def update_graph(granularity, app_type, selected_years, overlays=None, relayout_data=None):
+    return build_figure(granularity, app_type, selected_years, overlays,
+                        decimate.zoom_range("global-trend-graph", relayout_data))
+
+
+@figures.cached("rq1")
+def build_figure(granularity, app_type, selected_years, overlays=None, x_range=None):
     if not selected_years:
         return px.line(title="⚠️ Please select a year.")
 
     if not isinstance(selected_years, list):
         selected_years = [selected_years]
 
-    df = daily_df if granularity == "daily" else monthly_df
-    time_col = "date" if granularity == "daily" else "month"
-
-    dff = df[
-        (df["app_type"] == app_type) &
-        (df["year"].isin(selected_years)) &
-        (df["classification"] != "Unknown")
-    ].copy()
-
-    dff["time"] = dff[time_col]
-
-    agg = dff.groupby(["time", "classification"])["score_borda"].sum().reset_index()
-    agg["relative_score"] = agg.groupby("time")["score_borda"].transform(lambda x: x / x.sum()) * 100
-
-    fig = px.line(
-        agg,
-        x="time",
-        y="relative_score",
-        color="classification",
-        labels={"relative_score": "Relative Borda Share (%)", "time": granularity.capitalize()},
-        title=f"Global Category Trends ({granularity.capitalize()})"
-    )
-    fig.update_layout(height=600, legend_title="Category")
-    fig.update_yaxes(ticksuffix="%")
+    with metrics.phase("filter"):
+        series = shares.global_shares(granularity, app_type, selected_years)
+        metrics.rows(len(series))
+    with metrics.phase("aggregate"):
+        agg = decimate.lines(series, x_range)
+
+    with metrics.phase("figure"):
+        fig = px.line(
+            agg,
+            x="time",
+            y="relative_score",
+            color="classification",
+            labels={"relative_score": "Relative Borda Share (%)", "time": granularity.capitalize()},
+            title=f"Global Category Trends ({granularity.capitalize()})"
+        )
+        # Keep the user's zoom while the filters stay the same
+        fig.update_layout(height=600, legend_title="Category",
+                          uirevision=f"{granularity}/{app_type}/{selected_years}")
+        fig.update_yaxes(ticksuffix="%")
+
+    if overlays:
+        with metrics.phase("analytics"):
+            analytics.overlay(fig, analytics.analyse(("rq1", app_type), series, granularity), overlays, x_range)
     return fig
+
+
+# === Callback registration: long selections run as background jobs when enabled ===
+graph_inputs = [
+    Input("granularity-dropdown", "value"),
+    Input("app-type-dropdown", "value"),
+    Input("year-dropdown", "value"),
+    Input("overlay-checklist", "value"),
+    Input("global-trend-graph", "relayoutData"),
+]
+if jobs.ENABLED:
+    jobs.register("rq1", "global-trend-graph", update_graph, build_figure, graph_inputs)
+else:
+    callback(Output("global-trend-graph", "figure"), *graph_inputs)(update_graph)
@@ -1,75 +1,76 @@
-import pandas as pd
-import os
 from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import dash
 
+from dashboard import analytics, countries, decimate, figures, jobs, metrics, shares
 
 
-base_path = "data/by_country_year"  # adjust if needed
-
-# === Helper: Load list of available countries and years from filenames ===
-def get_available_files():
-    files = os.listdir(base_path)
-    entries = [f.replace(".csv", "").split("_") for f in files if f.endswith(".csv")]
-    return sorted(set([e[0] for e in entries])), sorted(set(int(e[1]) for e in entries if len(e) == 2))
-
-all_countries, all_years = get_available_files()
-
 # === Initialize App ===
 dash.register_page(__name__, path="/rq2",
                    name="RQ2: App Category Trends Based on Country-Level Rankings", order=2)
 
 # === Layout ===
-layout = dbc.Container([
-    html.H2("📱 App Category Trends Based on Country-Level Rankings", className="my-3"),
-
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select Granularity"),
-            dcc.Dropdown(
-                id="granularity-dropdown",
-                options=[
-                    {"label": "Daily", "value": "daily"},
-                    {"label": "Monthly", "value": "monthly"},
-                ],
-                value="monthly",
-                clearable=False
-            )
-        ], width=3),
-
-        dbc.Col([
-            html.Label("Select App Type"),
-            dcc.Dropdown(id="app-type-dropdown", clearable=False)  # dynamic
-        ], width=2),
-
-        dbc.Col([
-            html.Label("Select Country"),
-            dcc.Dropdown(
-                id="country-dropdown",
-                options=[{"label": c.upper(), "value": c} for c in all_countries],
-                value=all_countries[0],
-                clearable=False
-            )
-        ], width=2),
-
-        dbc.Col([
-            html.Label("Select Year(s)"),
-            dcc.Dropdown(
-                id="year-dropdown",
-                options=[{"label": str(y), "value": y} for y in all_years],
-                value=[all_years[-1]],
-                multi=True
-            )
-        ], width=3),
-    ], className="mb-4"),
-        html.P(
-        "This line chart visualizes the temporal distribution of normalised Borda scores across educational app categories. For each country and time point, category-level Borda scores are computed from national app rankings.",
-        "The resulting relative shares capture each category’s prominence within the marketplace over time.",
-        className="text-muted"),
-    dcc.Graph(id="trend-graph")
-])
+def layout(**kwargs):
+    all_countries, all_years = countries.countries(), countries.years()
+    return dbc.Container([
+        html.H2("📱 App Category Trends Based on Country-Level Rankings", className="my-3"),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select Granularity"),
+                dcc.Dropdown(
+                    id="granularity-dropdown",
+                    options=[
+                        {"label": "Daily", "value": "daily"},
+                        {"label": "Monthly", "value": "monthly"},
+                    ],
+                    value="monthly",
+                    clearable=False
+                )
+            ], width=3),
+
+            dbc.Col([
+                html.Label("Select App Type"),
+                dcc.Dropdown(id="app-type-dropdown", clearable=False)  # dynamic
+            ], width=2),
+
+            dbc.Col([
+                html.Label("Select Country"),
+                dcc.Dropdown(
+                    id="country-dropdown",
+                    options=[{"label": c.upper(), "value": c} for c in all_countries],
+                    value=all_countries[0] if all_countries else None,
+                    clearable=False
+                )
+            ], width=2),
+
+            dbc.Col([
+                html.Label("Select Year(s)"),
+                dcc.Dropdown(
+                    id="year-dropdown",
+                    options=[{"label": str(y), "value": y} for y in all_years],
+                    value=all_years[-1:],
+                    multi=True
+                )
+            ], width=3),
+        ], className="mb-4"),
+            html.P(
+            "This line chart visualizes the temporal distribution of normalised Borda scores across educational app categories. For each country and time point, category-level Borda scores are computed from national app rankings.",
+            "The resulting relative shares capture each category’s prominence within the marketplace over time.",
+            className="text-muted"),
+        dcc.Checklist(
+            id="overlay-checklist",
+            options=[{"label": label, "value": value} for value, label in analytics.OVERLAYS.items()],
+            value=[],
+            inline=True,
+            inputStyle={"marginRight": "4px"},
+            labelStyle={"marginRight": "16px"},
+            className="mb-2"
+        ),
+        *jobs.components("trend-graph"),
+        dcc.Graph(id="trend-graph")
+    ])
 
 # === Callback to update app-type dropdown dynamically ===
 @callback(
@@ -78,72 +79,76 @@ layout = dbc.Container([
     Input("country-dropdown", "value"),
     Input("year-dropdown", "value")
 )
+@metrics.instrumented("rq2_app_types")
 def update_app_type_dropdown(country, selected_years):
     if not isinstance(selected_years, list):
         selected_years = [selected_years]
 
-    dfs = []
-    for y in selected_years:
-        file_path = os.path.join(base_path, f"{country}_{y}.csv")
-        if os.path.exists(file_path):
-            dfs.append(pd.read_csv(file_path))
-    if not dfs:
+    app_types = countries.app_types(country, selected_years)
+    if not app_types:
         return [], None
-
-    df = pd.concat(dfs, ignore_index=True)
-    app_types = sorted(df['app_type'].dropna().unique())
-    return [{"label": a, "value": a} for a in app_types], app_types[0] if app_types else None
+    return [{"label": a, "value": a} for a in app_types], app_types[0]
 
 # === Main Graph Callback ===
-@callback(
-    Output("trend-graph", "figure"),
-    Input("granularity-dropdown", "value"),
-    Input("app-type-dropdown", "value"),
-    Input("country-dropdown", "value"),
-    Input("year-dropdown", "value")
-)
-def update_graph(granularity, app_type, country, selected_years):
+@metrics.instrumented("rq2")
+def update_graph(granularity, app_type, country, selected_years, overlays=None, relayout_data=None):
+    return build_figure(granularity, app_type, country, selected_years, overlays,
+                        decimate.zoom_range("trend-graph", relayout_data))
+
+
+@figures.cached("rq2")
+def build_figure(granularity, app_type, country, selected_years, overlays=None, x_range=None):
     if not selected_years or not app_type:
         return px.line(title="⚠️ Please select valid filters.")
 
     if not isinstance(selected_years, list):
         selected_years = [selected_years]
 
-    # Load only the needed data
-    dfs = []
-    for year in selected_years:
-        file_path = os.path.join(base_path, f"{country}_{year}.csv")
-        if os.path.exists(file_path):
-            dfs.append(pd.read_csv(file_path))
+    with metrics.phase("filter"):
+        cube = {}
+        for year in selected_years:
+            cube.update(countries.country_cube(country, year, app_type, granularity))
 
-    if not dfs:
+    if not cube:
         return px.line(title="⚠️ No data found for selection.")
 
-    df = pd.concat(dfs, ignore_index=True)
-    df["date"] = pd.to_datetime(df["date"])
-    df["month"] = df["month"].astype(str)
-    df = df[df["app_type"] == app_type]
-    df = df[df["classification"] != "Unknown"]
-
-    if granularity == "daily":
-        df["time"] = df["date"]
-    else:
-        df["time"] = pd.to_datetime(df["month"])
-
-    group_cols = ["time", "classification"]
-    agg = df.groupby(group_cols)["score_borda"].sum().reset_index()
-    agg["relative_score"] = agg.groupby("time")["score_borda"].transform(lambda x: x / x.sum()) * 100
-
-    fig = px.line(
-        agg,
-        x="time",
-        y="relative_score",
-        color="classification",
-        labels={"relative_score": "Relative Borda Share (%)", "time": granularity.capitalize()},
-        title=f"Category Share of Borda Scores ({granularity.capitalize()})"
-    )
-
-    fig.update_layout(height=600, legend_title="Category")
-    fig.update_yaxes(ticksuffix="%")
+    with metrics.phase("aggregate"):
+        series = shares.select(cube, app_type, selected_years)
+        metrics.rows(len(series))
+        agg = decimate.lines(series, x_range)
+
+    with metrics.phase("figure"):
+        fig = px.line(
+            agg,
+            x="time",
+            y="relative_score",
+            color="classification",
+            labels={"relative_score": "Relative Borda Share (%)", "time": granularity.capitalize()},
+            title=f"Category Share of Borda Scores ({granularity.capitalize()})"
+        )
+
+        # Keep the user's zoom while the filters stay the same
+        fig.update_layout(height=600, legend_title="Category",
+                          uirevision=f"{granularity}/{app_type}/{country}/{selected_years}")
+        fig.update_yaxes(ticksuffix="%")
+
+    if overlays:
+        with metrics.phase("analytics"):
+            analytics.overlay(fig, analytics.analyse(("rq2", country, app_type), series, granularity),
+                              overlays, x_range)
     return fig
 
+
+# === Callback registration: long selections run as background jobs when enabled ===
+graph_inputs = [
+    Input("granularity-dropdown", "value"),
+    Input("app-type-dropdown", "value"),
+    Input("country-dropdown", "value"),
+    Input("year-dropdown", "value"),
+    Input("overlay-checklist", "value"),
+    Input("trend-graph", "relayoutData"),
+]
+if jobs.ENABLED:
+    jobs.register("rq2", "trend-graph", update_graph, build_figure, graph_inputs, years_arg=3)
+else:
+    callback(Output("trend-graph", "figure"), *graph_inputs)(update_graph)
@@ -0,0 +1,124 @@
+from dash import dcc, html, Input, Output, callback
+import dash_bootstrap_components as dbc
+import plotly.express as px
+import dash
+
+from dashboard import comparison, countries, figures, metrics
+
+# === Initialize App ===
+dash.register_page(__name__, path="/rq2_compare",
+                   name="RQ2: Cross-Country Comparison of App Categories", order=4)
+
+# === Layout ===
+def layout(**kwargs):
+    all_years, app_types = countries.years(), comparison.app_types()
+    return dbc.Container([
+        html.H2("🗺️ Cross-Country Comparison of App Categories", className="my-3"),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select Granularity"),
+                dcc.Dropdown(
+                    id="compare-granularity-dropdown",
+                    options=[
+                        {"label": "Daily", "value": "daily"},
+                        {"label": "Monthly", "value": "monthly"},
+                    ],
+                    value="monthly",
+                    clearable=False
+                )
+            ], width=3),
+
+            dbc.Col([
+                html.Label("Select App Type"),
+                dcc.Dropdown(
+                    id="compare-app-type-dropdown",
+                    options=[{"label": a, "value": a} for a in app_types],
+                    value=app_types[0] if app_types else None,
+                    clearable=False
+                )
+            ], width=2),
+
+            dbc.Col([
+                html.Label("Select Year(s)"),
+                dcc.Dropdown(
+                    id="compare-year-dropdown",
+                    options=[{"label": str(y), "value": y} for y in all_years],
+                    value=all_years[-1:],
+                    multi=True
+                )
+            ], width=4),
+
+            dbc.Col([
+                html.Label("View"),
+                dbc.RadioItems(
+                    id="compare-view-radio",
+                    options=[
+                        {"label": "Heatmap", "value": "heatmap"},
+                        {"label": "Small multiples", "value": "lines"},
+                    ],
+                    value="heatmap",
+                    inline=True
+                )
+            ], width=3),
+        ], className="mb-4"),
+        html.P(
+            "Relative Borda shares of every country side by side. The heatmap shows each category's mean share"
+            " over the selected period; the small multiples show one trend chart per country.",
+            className="text-muted"),
+        dcc.Graph(id="compare-graph")
+    ])
+
+# === Main Graph Callback ===
+@callback(
+    Output("compare-graph", "figure"),
+    Input("compare-granularity-dropdown", "value"),
+    Input("compare-app-type-dropdown", "value"),
+    Input("compare-year-dropdown", "value"),
+    Input("compare-view-radio", "value")
+)
+@metrics.instrumented("rq2_compare")
+@figures.cached("rq2_compare")
+def update_graph(granularity, app_type, selected_years, view):
+    if not selected_years or not app_type:
+        return px.imshow([[]], title="⚠️ Please select valid filters.")
+
+    if not isinstance(selected_years, list):
+        selected_years = [selected_years]
+
+    with metrics.phase("aggregate"):
+        cube = comparison.select(granularity, app_type, selected_years)
+        metrics.rows(cube.values.size)
+
+    if not len(cube.countries):
+        return px.imshow([[]], title="⚠️ No data found for selection.")
+
+    years = sorted(set(selected_years))
+    period = str(years[0]) if len(years) == 1 else f"{years[0]}–{years[-1]}"
+    with metrics.phase("figure"):
+        if view == "lines":
+            fig = px.line(
+                cube.long(),
+                x="time",
+                y="relative_score",
+                color="classification",
+                facet_col="country",
+                facet_col_wrap=4,
+                labels={"relative_score": "Share (%)", "time": granularity.capitalize()},
+                title=f"Category Share of Borda Scores per Country ({granularity.capitalize()}, {period})"
+            )
+            rows = -(-len(cube.countries) // 4)
+            fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1].upper()))
+            fig.update_layout(height=max(400, 250 * rows), legend_title="Category")
+        else:
+            fig = px.imshow(
+                cube.period_means(),
+                x=list(cube.classifications),
+                y=[c.upper() for c in cube.countries],
+                aspect="auto",
+                color_continuous_scale="Blues",
+                labels={"x": "Category", "y": "Country", "color": "Mean share (%)"},
+                title=f"Mean Category Share of Borda Scores per Country ({period})"
+            )
+            fig.update_layout(xaxis_tickangle=-45, height=max(400, 22 * len(cube.countries) + 250))
+    return fig
@@ -1,36 +1,18 @@
-import pandas as pd
+import functools
+
+import numpy as np
 import plotly.express as px
-import os
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, callback, clientside_callback
 import dash
 import dash_bootstrap_components as dbc
 
+from dashboard import bands as band_data, clientside, decimate, figures, metrics, methods as method_data
 
-# === Load Data ===
-data_dir = os.path.join(os.path.dirname(__file__), "../data")
-
-borda_file = os.path.join(data_dir, "global_borda_monthly.csv")
-mean_file = os.path.join(data_dir, "global_borda_mean_monthly.csv")
-median_file = os.path.join(data_dir, "global_borda_median_monthly.csv")
-
-
-borda_df = pd.read_csv(borda_file)
-mean_df = pd.read_csv(mean_file)
-median_df = pd.read_csv(median_file)
+METHODS = method_data.METHODS
 
-# Label and format
-borda_df["method"] = "Borda"
-mean_df["method"] = "Mean"
-median_df["method"] = "Median"
-
-for df in [borda_df, mean_df, median_df]:
-    df["month"] = pd.to_datetime(df["month"])
-    df.dropna(subset=["classification"], inplace=True)
-    df = df[~df["classification"].str.lower().str.startswith("exclusion criteria")]
-    df = df[df["classification"] != "Unknown"]
-
-# Combine all
-all_df = pd.concat([borda_df, mean_df, median_df], ignore_index=True)
+# Daily points per year of each series in the clientside bundle (a year has
+# about 365); four selected years add up to the server's MAX_POINTS.
+BUNDLE_DAILY_POINTS = decimate.MAX_POINTS // 4
 
 # === Initialize Dash App ===
 dash.register_page(__name__, path="/dash_method_trends",
@@ -38,86 +20,210 @@ dash.register_page(__name__, path="/dash_method_trends",
                     order=5)
 
 # === Layout ===
-layout = dbc.Container([
-    html.H2("📊 Compare Category Trends by Aggregation Method", className="my-4"),
-
-    dbc.Row([
-        dbc.Col([
-            html.Label("App Type"),
-            dcc.Dropdown(
-                id="app-type-dropdown",
-                options=[{"label": t, "value": t} for t in sorted(all_df['app_type'].dropna().unique())],
-                value="Free",
-                clearable=False
-            )
-        ], width=2),
-
-        dbc.Col([
-            html.Label("Aggregation Methods"),
-            dcc.Dropdown(
-                id="method-dropdown",
-                options=[{"label": m, "value": m} for m in ["Borda", "Mean", "Median"]],
-                value=["Borda", "Mean", "Median"],
-                multi=True,
-                clearable=False
-            )
-        ], width=3),
-
-        dbc.Col([
-            html.Label("Select Year(s)"),
-            dcc.Dropdown(
-                id="year-dropdown",
-                options=[{"label": str(y), "value": y} for y in sorted(all_df["month"].dt.year.unique())],
-                value=[2022],
-                multi=True
-            )
-        ], width=3),
-
-        dbc.Col([
-            html.Label("Category"),
-            dcc.Dropdown(
-                id="category-dropdown",
-                options=[{"label": c, "value": c} for c in sorted(all_df['classification'].dropna().unique())],
-                value="Education",
-                clearable=False
-            )
-        ], width=4),
-    ], className="mb-4"),
-
-    dcc.Graph(id="trend-graphx")
-])
-
-# === Callback ===
-@callback(
-    Output("trend-graphx", "figure"),
-    Input("app-type-dropdown", "value"),
-    Input("method-dropdown", "value"),
-    Input("year-dropdown", "value"),
-    Input("category-dropdown", "value")
-)
-def update_graph(app_type, methods, selected_years, category):
+def layout(**kwargs):
+    cube = method_data.cube("monthly")
+    return dbc.Container([
+        html.H2("📊 Compare Category Trends by Aggregation Method", className="my-4"),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("App Type"),
+                dcc.Dropdown(
+                    id="app-type-dropdown",
+                    options=[{"label": t, "value": t} for t in cube.app_types],
+                    value="Free",
+                    clearable=False
+                )
+            ], width=2),
+
+            dbc.Col([
+                html.Label("Granularity"),
+                dcc.Dropdown(
+                    id="granularity-dropdown",
+                    options=[
+                        {"label": "Daily", "value": "daily"},
+                        {"label": "Monthly", "value": "monthly"},
+                    ],
+                    value="monthly",
+                    clearable=False
+                )
+            ], width=2),
+
+            dbc.Col([
+                html.Label("Aggregation Methods"),
+                dcc.Dropdown(
+                    id="method-dropdown",
+                    options=[{"label": m, "value": m} for m in METHODS],
+                    value=METHODS,
+                    multi=True,
+                    clearable=False
+                )
+            ], width=3),
+
+            dbc.Col([
+                html.Label("Select Year(s)"),
+                dcc.Dropdown(
+                    id="year-dropdown",
+                    options=[{"label": str(y), "value": y} for y in sorted(set(cube.years))],
+                    value=[2022],
+                    multi=True
+                )
+            ], width=2),
+
+            dbc.Col([
+                html.Label("Category"),
+                dcc.Dropdown(
+                    id="category-dropdown",
+                    options=[{"label": c, "value": c} for c in cube.classifications],
+                    value="Education",
+                    clearable=False
+                )
+            ], width=3),
+        ], className="mb-4"),
+
+        dcc.Checklist(
+            id="band-checklist",
+            options=[{"label": f"Bootstrap {band_data.LEVEL:.0%} confidence bands (monthly view)",
+                      "value": "bands"}],
+            value=[],
+            inline=True,
+            inputStyle={"marginRight": "4px"},
+            className="mb-2"
+        ),
+        dcc.Store(id="method-bundle"),
+        dcc.Store(id="method-bands"),
+        dcc.Graph(id="trend-graphx")
+    ])
+
+# === Callbacks ===
+@figures.cached("method_trends")
+def update_graph(app_type, methods, selected_years, category, granularity="monthly", bands=None):
     if not selected_years or not methods:
         return px.line(title="⚠️ Please select year(s) and method(s).")
 
-    filtered = all_df[
-        (all_df["app_type"] == app_type) &
-        (all_df["classification"] == category) &
-        (all_df["method"].isin(methods)) &
-        (all_df["month"].dt.year.isin(selected_years))
-    ]
+    with metrics.phase("filter"):
+        filtered = method_data.cube(granularity).select(methods, app_type, category, selected_years)
+        metrics.rows(len(filtered))
 
     if filtered.empty:
         return px.line(title="⚠️ No data available for selected filters.")
 
-    fig = px.line(
-        filtered,
-        x="month",
-        y="relative_score",
-        color="method",
-        markers=True,
-        title=f"{category} – {app_type} Apps – Aggregation Method Comparison",
-        labels={"month": "Month", "relative_score": "Relative Share (%)"}
-    )
-    fig.update_layout(height=600, legend_title="Aggregation Method")
-    fig.update_yaxes(ticksuffix="%")
+    with metrics.phase("figure"):
+        time_label = "Date" if granularity == "daily" else "Month"
+        fig = px.line(
+            filtered,
+            x="time",
+            y="relative_score",
+            color="method",
+            markers=granularity != "daily",
+            title=f"{category} – {app_type} Apps – Aggregation Method Comparison",
+            labels={"time": time_label, "relative_score": "Relative Share (%)"}
+        )
+        fig.update_layout(height=600, legend_title="Aggregation Method")
+        fig.update_yaxes(ticksuffix="%")
+
+    if bands and granularity == "monthly":
+        with metrics.phase("bootstrap"):
+            rows = band_data.select(methods, app_type, category, selected_years)
+        band_data.overlay(fig, rows)
     return fig
+
+
+def band_bundle(app_type, bands=None):
+    """Monthly band edges of every method and category of ``app_type``, or None when bands are off.
+
+    Like :func:`method_bundle` it is sent once per app type; the browser
+    picks the methods, category and years.
+    """
+    if not bands:
+        return None
+    cube = method_data.cube("monthly")
+    lower, upper = band_data.edges(app_type)
+    edges = {}
+    for m, method in enumerate(cube.methods):
+        for c, category in enumerate(cube.classifications):
+            if not np.isnan(lower[m, c]).all():
+                edges.setdefault(method, {})[category] = {
+                    "lower": clientside.values(lower[m, c], decimals=6),
+                    "upper": clientside.values(upper[m, c], decimals=6),
+                }
+    return {
+        "app_type": app_type,
+        "times": cube.times.strftime("%Y-%m-%d").tolist(),
+        "edges": edges,
+    }
+
+
+@functools.cache  # built from methods.cube, which is also kept for the process
+def method_bundle(app_type, granularity="monthly"):
+    """Relative scores of every method and category for ``app_type``.
+
+    Monthly series are aligned with ``times``. Daily series are reduced with
+    LTTB to ``BUNDLE_DAILY_POINTS`` per year and sent as ``{"gaps", "y"}``:
+    the steps between the kept positions in ``times`` (the first from 0),
+    and their values.
+    """
+    cube = method_data.cube(granularity)
+    a = cube.app_types.get_loc(app_type)
+    series = {}
+    for m, method in enumerate(cube.methods):
+        for c, category in enumerate(cube.classifications):
+            y = cube.values[m, a, c]
+            if np.isnan(y).all():
+                continue
+            series.setdefault(method, {})[category] = (
+                _decimated(cube.years, y) if granularity == "daily" else clientside.values(y))
+    return {
+        "app_type": app_type,
+        "granularity": granularity,
+        "methods": METHODS,
+        "times": cube.times.strftime("%Y-%m-%d").tolist(),
+        "series": series,
+        "template": clientside.template(),
+    }
+
+
+def _decimated(years, y):
+    listed = np.flatnonzero(~np.isnan(y))
+    kept = []
+    for year in np.unique(years[listed]):
+        i = listed[years[listed] == year]
+        kept.append(i[decimate.lttb(i, y[i], BUNDLE_DAILY_POINTS)])
+    i = np.concatenate(kept)
+    return {"gaps": np.diff(i, prepend=0).tolist(), "y": clientside.values(y[i])}
+
+
+graph_inputs = [
+    Input("method-dropdown", "value"),
+    Input("year-dropdown", "value"),
+    Input("category-dropdown", "value"),
+]
+
+if clientside.ENABLED:
+    callback(
+        Output("method-bundle", "data"),
+        Input("app-type-dropdown", "value"),
+        Input("granularity-dropdown", "value")
+    )(metrics.instrumented("method_trends_bundle")(method_bundle))
+
+    callback(
+        Output("method-bands", "data"),
+        Input("app-type-dropdown", "value"),
+        Input("band-checklist", "value")
+    )(metrics.instrumented("method_trends_bands")(band_bundle))
+
+    clientside_callback(
+        clientside.function("methodTrends"),
+        Output("trend-graphx", "figure"),
+        Input("method-bundle", "data"),
+        *graph_inputs,
+        Input("method-bands", "data")
+    )
+else:
+    callback(
+        Output("trend-graphx", "figure"),
+        Input("app-type-dropdown", "value"),
+        *graph_inputs,
+        Input("granularity-dropdown", "value"),
+        Input("band-checklist", "value")
+    )(metrics.instrumented("method_trends")(update_graph))
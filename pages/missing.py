@@ -1,109 +1,183 @@
-
-import pandas as pd
+import numpy as np
 import plotly.express as px
-from dash import Dash, dcc, html, Input, Output
+from dash import dcc, html, Input, Output
 import dash_bootstrap_components as dbc
 import dash
-from dash import callback
-
-# === Load preprocessed CSV ===
-df = pd.read_csv("data/missingness_by_rank.csv")
-df["year"] = df["year"].astype(int)
-df["rank_bin"] = df["rank_bin"].astype(str)
-df["country"] = df["country"].str.lower()
+from dash import callback, clientside_callback
 
-# === Initialize Dash app ===
-app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-app.title = "Missing Category Dashboard"
+from dashboard import clientside, data, figures, metrics, missingness
 
 # === Register the page ===
 dash.register_page(__name__, path="/missing", 
                    name="Missing Category Labels by App Rank", order=3)
 
 # === Layout ===
-layout = dbc.Container([
-    html.H2("Missing Category Labels by App Rank", className="mt-3"),
-    html.P("Explore how the share of apps with unknown category classification varies by rank group, year, and country."),
-
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select App Type:", className="small"),
-            dcc.Dropdown(
-                options=[
-                    {"label": "Free", "value": "Free"},
-                    {"label": "Paid", "value": "Paid"}
-                ],
-                value="Free",
-                multi=False,
-                id="type-dropdown",
-                style={"fontSize": "13px"}
-            )
-        ], width=4),
-
-        dbc.Col([
-            html.Label("Select Year(s):", className="small"),
-            dcc.Dropdown(
-                options=[{"label": str(y), "value": y} for y in sorted(df["year"].unique())],
-                value=[df["year"].max()],
-                multi=True,
-                id="year-dropdown",
-                style={"fontSize": "13px"}
-            )
-        ], width=4),
-
-        dbc.Col([
-            html.Label("Select Country(ies):", className="small"),
-            dcc.Dropdown(
-                options=[{"label": c.upper(), "value": c} for c in sorted(df["country"].unique())],
-                value=[df["country"].unique()[0]],
-                multi=True,
-                id="country-dropdown",
-                style={"fontSize": "13px"}
-            )
-        ], width=4)
-    ], className="mb-3"),
-            html.P(
-            "Missingness is not random. It is concentrated in lower ranks among free apps, whereas for paid apps, top-ranked apps show higher missing rates. This pattern may introduce bias into category-level trends, so results should be interpreted with caution.",
-            className="text-muted"
-            ),
-    dcc.Graph(id="missingness-graph")
-], fluid=True)
-
-
-# === Callback ===
-@callback(
-    Output("missingness-graph", "figure"),
-    Input("type-dropdown", "value"),
-    Input("year-dropdown", "value"),
-    Input("country-dropdown", "value")
-)
-def update_graph(selected_type, selected_years, selected_countries):
-    filtered = df[
-        (df["app_type"] == selected_type) &
-        (df["year"].isin(selected_years)) &
-        (df["country"].isin(selected_countries))
-    ].copy()
-
-    filtered["year"] = filtered["year"].astype(str)
-
-    fig = px.bar(
-        filtered,
-        x="rank_bin",
-        y="unknown_ratio",
-        color="year",
-        barmode="group",
-        hover_data=["country", "year", "unknown_ratio"],
-        labels={
-            "rank_bin": "App Rank (Grouped by 10)",
-            "unknown_ratio": "Unknown Classification (%)",
-            "year": "Year",
-            "country": "Country"
-        },
-        title="Unknown Classification by Rank Group and Year"
-    )
+def layout(**kwargs):
+    df = data.get("missingness")
+    return dbc.Container([
+        html.H2("Missing Category Labels by App Rank", className="mt-3"),
+        html.P("Explore how the share of apps with unknown category classification varies by rank group, year, and country."),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select App Type:", className="small"),
+                dcc.Dropdown(
+                    options=[
+                        {"label": "Free", "value": "Free"},
+                        {"label": "Paid", "value": "Paid"}
+                    ],
+                    value="Free",
+                    multi=False,
+                    id="type-dropdown",
+                    style={"fontSize": "13px"}
+                )
+            ], width=4),
+
+            dbc.Col([
+                html.Label("Select Year(s):", className="small"),
+                dcc.Dropdown(
+                    options=[{"label": str(y), "value": y} for y in sorted(df["year"].unique())],
+                    value=[df["year"].max()],
+                    multi=True,
+                    id="year-dropdown",
+                    style={"fontSize": "13px"}
+                )
+            ], width=4),
+
+            dbc.Col([
+                html.Label("Select Country(ies):", className="small"),
+                dcc.Dropdown(
+                    options=[{"label": c.upper(), "value": c} for c in sorted(df["country"].unique())],
+                    value=[df["country"].unique()[0]],
+                    multi=True,
+                    id="country-dropdown",
+                    style={"fontSize": "13px"}
+                )
+            ], width=4)
+        ], className="mb-3"),
 
-    fig.update_yaxes(ticksuffix="%")
-    fig.update_layout(xaxis_tickangle=-45)
+        dbc.RadioItems(
+            id="view-radio",
+            options=[
+                {"label": "Bars (selected countries)", "value": "bars"},
+                {"label": "Heatmap (all countries)", "value": "heatmap"},
+            ],
+            value="bars",
+            inline=True,
+            className="mb-2 small"
+        ),
+                html.P(
+                "Missingness is not random. It is concentrated in lower ranks among free apps, whereas for paid apps, top-ranked apps show higher missing rates. This pattern may introduce bias into category-level trends, so results should be interpreted with caution.",
+                className="text-muted"
+                ),
+        dcc.Store(id="missingness-bundle"),
+        dcc.Graph(id="missingness-graph")
+    ], fluid=True)
+
+# === Callbacks ===
+@figures.cached("missing")
+def update_graph(selected_type, selected_years, selected_countries, view="bars"):
+    cube = missingness.cube()
+    if view == "heatmap":
+        return heatmap(cube, selected_type, selected_years)
+
+    with metrics.phase("filter"):
+        filtered = cube.select(selected_type, selected_years, selected_countries)
+        metrics.rows(len(filtered))
+
+        filtered["year"] = filtered["year"].astype(str)
+
+    with metrics.phase("figure"):
+        fig = px.bar(
+            filtered,
+            x="rank_bin",
+            y="unknown_ratio",
+            color="year",
+            barmode="group",
+            hover_data=["country", "year", "unknown_ratio"],
+            category_orders={"rank_bin": list(cube.rank_bins)},
+            labels={
+                "rank_bin": "App Rank (Grouped by 10)",
+                "unknown_ratio": "Unknown Classification (%)",
+                "year": "Year",
+                "country": "Country"
+            },
+            title="Unknown Classification by Rank Group and Year"
+        )
+
+        fig.update_yaxes(ticksuffix="%")
+        fig.update_layout(xaxis_tickangle=-45)
 
     return fig
 
+
+def heatmap(cube, selected_type, selected_years):
+    """Country x rank group heatmap of every country, averaged over the selected years."""
+    if not selected_years:
+        return px.imshow([[]], title="⚠️ Please select a year.")
+
+    with metrics.phase("filter"):
+        matrix = cube.matrix(selected_type, selected_years)
+        metrics.rows(matrix.size)
+
+    with metrics.phase("figure"):
+        years = sorted(set(selected_years))
+        period = str(years[0]) if len(years) == 1 else f"mean of {len(years)} years"
+        fig = px.imshow(
+            matrix,
+            x=list(cube.rank_bins),
+            y=[c.upper() for c in cube.countries],
+            aspect="auto",
+            color_continuous_scale="Reds",
+            labels={"x": "App Rank (Grouped by 10)", "y": "Country", "color": "Unknown (%)"},
+            title=f"Unknown Classification by Country and Rank Group ({period})"
+        )
+        fig.update_layout(xaxis_tickangle=-45, height=max(400, 22 * len(cube.countries) + 200))
+
+    return fig
+
+
+def missingness_bundle(selected_type):
+    """Unknown ratios for ``selected_type`` as {year: {country: [ratio per rank bin]}}."""
+    cube = missingness.cube()
+    a = cube.app_types.get_indexer([selected_type])[0]
+    ratios = {}
+    if a >= 0:
+        for y, year in enumerate(cube.years):
+            for c, country in enumerate(cube.countries):
+                row = cube.values[a, y, c]
+                if not np.isnan(row).all():
+                    ratios.setdefault(str(year), {})[country] = clientside.values(row)
+    return {
+        "years": sorted(int(y) for y in ratios),
+        "countries": list(cube.countries),
+        "rank_bins": list(cube.rank_bins),
+        "ratios": ratios,
+        "template": clientside.template(),
+    }
+
+
+graph_inputs = [
+    Input("year-dropdown", "value"),
+    Input("country-dropdown", "value"),
+    Input("view-radio", "value"),
+]
+
+if clientside.ENABLED:
+    callback(
+        Output("missingness-bundle", "data"),
+        Input("type-dropdown", "value")
+    )(metrics.instrumented("missing_bundle")(missingness_bundle))
+
+    clientside_callback(
+        clientside.function("missingness"),
+        Output("missingness-graph", "figure"),
+        Input("missingness-bundle", "data"),
+        *graph_inputs
+    )
+else:
+    callback(
+        Output("missingness-graph", "figure"),
+        Input("type-dropdown", "value"),
+        *graph_inputs
+    )(metrics.instrumented("missing")(update_graph))
@@ -0,0 +1,63 @@
+"""Compare cold start and memory of loading ``data/`` from CSV vs the binary cache.
+
+Each run starts a fresh interpreter, loads every dataset through
+``dashboard.data`` and reports load time and resident memory. File-backed
+memory (``RssFile``) is shared between workers through the page cache;
+anonymous memory (``RssAnon``) is private to each worker.
+
+    python scripts/bench_cache.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+from dashboard import data
+imported = time.perf_counter()
+for name in data.DATASETS:
+    data.get(name)
+loaded = time.perf_counter()
+status = dict(line.split(":", 1) for line in open("/proc/self/status"))
+kb = lambda key: int(status.get(key, "0 kB").split()[0]) * 1024
+print(json.dumps({
+    "import_seconds": imported - started,
+    "load_seconds": loaded - imported,
+    "rss_bytes": kb("VmRSS"),
+    "rss_anon_bytes": kb("RssAnon"),
+    "rss_file_bytes": kb("RssFile"),
+}))
+"""
+
+
+def run(mode):
+    env = dict(os.environ, DASHBOARD_CACHE="1" if mode == "cache" else "0")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    out = subprocess.run([sys.executable, "-c", CHILD], env=env, cwd=ROOT,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    run("cache")  # make sure the cache is built before timing it
+    print(f"{'mode':<6} {'load ms':>9} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8}")
+    for mode in ["csv", "cache"]:
+        results = [run(mode) for _ in range(args.runs)]
+        median = lambda key: statistics.median(r[key] for r in results)
+        print(f"{mode:<6} {median('load_seconds') * 1e3:>9.1f} "
+              f"{median('rss_bytes') / 1e6:>8.1f} {median('rss_anon_bytes') / 1e6:>8.1f} "
+              f"{median('rss_file_bytes') / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Benchmark every page callback across its filter space.
+
+Imports the app (which registers the pages), then calls each page's
+callback functions directly over every granularity x app type x year
+subset x country/category/method combination. Per page it reports the
+p50/p95/max latency, the peak memory allocated by one call and the
+serialised payload size, and writes the results to a JSON file that can be
+compared between commits::
+
+    python scripts/bench_callbacks.py --out before.json
+    git checkout other-branch
+    python scripts/bench_callbacks.py --out after.json --compare before.json
+
+Filter spaces larger than ``--max-calls`` are sampled with a fixed seed,
+so two runs on the same data call the same combinations. The figure cache
+is off unless ``--cached`` is given. Run against synthetic data (see
+``scripts/synth_data.py``) with ``DASHBOARD_DATA_DIR=/tmp/data_x10``.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dash  # noqa: E402
+from plotly.io.json import to_json_plotly  # noqa: E402
+
+from app import app  # noqa: E402,F401  registers the pages
+from dashboard import analytics, comparison, countries, data, figures, lazy, methods  # noqa: E402
+
+GRANULARITIES = ["daily", "monthly"]
+
+# Calls per page whose peak allocation is traced; tracing is slow, so it
+# runs as a separate, untimed pass.
+MEMORY_CALLS = 20
+
+
+def page(module_name):
+    """The page module Dash imported for ``pages/<module_name>.py``."""
+    for entry in dash.page_registry.values():
+        if entry["module"].split(".")[-1] == module_name:
+            return lazy.load(entry["module"])
+    raise KeyError(module_name)
+
+
+def subsets(values):
+    """Every non-empty subset of ``values``, as sorted lists."""
+    values = sorted(values)
+    return [list(c) for r in range(1, len(values) + 1) for c in itertools.combinations(values, r)]
+
+
+def year_subsets(values):
+    """Every year subset up to 7 years; singletons, contiguous ranges and all years beyond that."""
+    values = sorted(values)
+    if len(values) <= 7:
+        return subsets(values)
+    return [values[i:j] for i in range(len(values)) for j in range(i + 1, len(values) + 1)]
+
+
+def country_subsets(values):
+    values = sorted(values)
+    return [[v] for v in values] + [values]
+
+
+def sample(axes, limit, seed=0):
+    """Up to ``limit`` argument tuples from the product of ``axes``, drawn with a fixed seed."""
+    size = math.prod(len(axis) for axis in axes)
+    if size <= limit:
+        return list(itertools.product(*axes)), size
+    chosen = sorted(random.Random(seed).sample(range(size), limit))
+    calls = []
+    for index in chosen:
+        args = []
+        for axis in reversed(axes):
+            index, position = divmod(index, len(axis))
+            args.append(axis[position])
+        calls.append(tuple(reversed(args)))
+    return calls, size
+
+
+def plan():
+    """(name, function, argument axes) for every server-side page callback."""
+    daily = data.get("borda_daily")
+    app_types = sorted(daily["app_type"].unique())
+    years = year_subsets(daily["year"].unique())
+
+    missingness = data.get("missingness")
+    cube = methods.cube("monthly")
+
+    rq1, rq1_1, rq2 = page("app_rq1"), page("app_rq1_1"), page("app_rq2")
+    rq2_compare = page("app_rq2_compare")
+    missing, method_trends = page("missing"), page("dash_method_trends")
+    return [
+        ("rq1", rq1.update_graph, [GRANULARITIES, app_types, years, [[]]]),
+        ("rq1_overlays", rq1.update_graph, [GRANULARITIES, app_types, years, [list(analytics.OVERLAYS)]]),
+        ("rq1_1", rq1_1.update_chart, [GRANULARITIES, app_types, years]),
+        ("rq2", rq2.update_graph,
+         [GRANULARITIES, app_types, countries.countries(), year_subsets(countries.years()), [[]]]),
+        ("rq2_compare", rq2_compare.update_graph,
+         [GRANULARITIES, comparison.app_types(), year_subsets(countries.years()), ["heatmap", "lines"]]),
+        ("rq2_app_types", rq2.update_app_type_dropdown,
+         [countries.countries(), year_subsets(countries.years())]),
+        ("missing", missing.update_graph,
+         [sorted(missingness["app_type"].unique()), year_subsets(missingness["year"].unique()),
+          country_subsets(missingness["country"].unique())]),
+        ("missing_heatmap", missing.update_graph,
+         [sorted(missingness["app_type"].unique()), year_subsets(missingness["year"].unique()),
+          [None], ["heatmap"]]),
+        ("missing_bundle", missing.missingness_bundle, [sorted(missingness["app_type"].unique())]),
+        ("method_trends", method_trends.update_graph,
+         [list(cube.app_types), subsets(methods.METHODS), years, list(cube.classifications), GRANULARITIES]),
+        ("method_trends_bands", method_trends.update_graph,
+         [list(cube.app_types), subsets(methods.METHODS), years, list(cube.classifications), ["monthly"],
+          [["bands"]]]),
+        ("method_trends_bundle", method_trends.method_bundle, [list(cube.app_types), GRANULARITIES]),
+        ("method_trends_band_bundle", method_trends.band_bundle, [list(cube.app_types), [["bands"]]]),
+    ]
+
+
+def run_page(func, axes, max_calls):
+    calls, space = sample(axes, max_calls)
+    latencies, payloads = [], []
+    for args in calls:
+        started = time.perf_counter()
+        result = func(*args)
+        latencies.append(time.perf_counter() - started)
+        payloads.append(len(to_json_plotly(result)))
+
+    tracemalloc.start()
+    peak = 0
+    for args in calls[:MEMORY_CALLS]:
+        tracemalloc.reset_peak()
+        func(*args)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": len(calls),
+        "space": space,
+        "sampled": len(calls) < space,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1e3,
+        "max_ms": latencies[-1] * 1e3,
+        "total_s": sum(latencies),
+        "peak_alloc_bytes": peak,
+        "payload_p50_bytes": statistics.median(payloads),
+        "payload_max_bytes": max(payloads),
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    print(f"\n{'page':<22} {'p50 before':>11} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10} {'change':>8}")
+    for name, after in results["pages"].items():
+        before = baseline["pages"].get(name)
+        if before is None:
+            continue
+        change = after["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else float("nan")
+        print(f"{name:<22} {before['p50_ms']:>11.1f} {after['p50_ms']:>10.1f} "
+              f"{before['p95_ms']:>11.1f} {after['p95_ms']:>10.1f} {change:>+8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="bench_callbacks.json", help="JSON results file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--pages", nargs="*", help="only these pages (default: all)")
+    parser.add_argument("--max-calls", type=int, default=2000, help="calls per page before sampling")
+    parser.add_argument("--cached", action="store_true", help="keep the figure cache on")
+    args = parser.parse_args()
+
+    if not args.cached:
+        figures.backend = None
+
+    results = {"commit": commit(), "data_dir": data.DATA_DIR, "max_calls": args.max_calls,
+               "cached": args.cached, "pages": {}}
+    print(f"{'page':<22} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'alloc MB':>9} {'payload KB':>11}")
+    for name, func, axes in plan():
+        if args.pages and name not in args.pages:
+            continue
+        entry = results["pages"][name] = run_page(func, axes, args.max_calls)
+        print(f"{name:<22} {entry['calls']:>6} {entry['p50_ms']:>8.1f} {entry['p95_ms']:>8.1f} "
+              f"{entry['max_ms']:>8.1f} {entry['peak_alloc_bytes'] / 1e6:>9.1f} "
+              f"{entry['payload_p50_bytes'] / 1e3:>11.1f}")
+
+    with open(args.out, "w") as fh:
+        json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(results, json.load(fh))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Profile and check the app's cold start.
+
+For each mode (``eager``: every page imported at start-up, ``lazy``: pages
+imported on first visit, see ``dashboard/lazy.py``) this script:
+
+1. imports the app once under ``python -X importtime`` and reports the
+   modules with the largest cumulative import time, plus the totals per
+   top-level package;
+2. starts ``--runs`` fresh interpreters that import the app and serve
+   ``/``, ``/_dash-layout`` and ``/_dash-dependencies`` through the Flask
+   test client, and reports the median time from the first import to the
+   last response.
+
+It exits with status 1 when the lazy mode's median start exceeds the
+budget (``BUDGET_SECONDS``, or ``--budget``). The eager mode is reported for
+comparison only::
+
+    python scripts/bench_startup.py --modes lazy
+
+``tests/test_startup.py`` (marked ``slow``) checks the same budget as part
+of the test suite.
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Roughly 1.5x the lazy start on a development laptop (about 0.65s; eager
+# start-up, which imports every page, pandas and pyarrow, is about 0.95s).
+BUDGET_SECONDS = 1.0
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.server.test_client()
+for path in ["/", "/_dash-layout", "/_dash-dependencies"]:
+    status = client.get(path).status_code
+    assert status == 200, (path, status)
+served = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "serve_seconds": served - imported}))
+"""
+
+MODES = {"eager": "0", "lazy": "1"}
+
+
+def run(mode, importtime=False):
+    env = dict(os.environ, DASHBOARD_LAZY_PAGES=MODES[mode])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", CHILD]
+    result = subprocess.run(command, env=env, cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def import_times(stderr):
+    """(depth, module, self seconds, cumulative seconds) for each line of ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2 - 1
+        rows.append((depth, name.strip(), int(own) / 1e6, int(cumulative) / 1e6))
+    return rows
+
+
+def report_imports(rows, top):
+    print(f"  {'cumulative ms':>13} {'self ms':>8}  module")
+    for depth, name, own, cumulative in sorted(rows, key=lambda r: -r[3])[:top]:
+        print(f"  {cumulative * 1e3:>13.1f} {own * 1e3:>8.1f}  {'  ' * depth}{name}")
+
+    # Top-level imports only, so nothing is counted twice.
+    packages = collections.Counter()
+    for depth, name, own, cumulative in rows:
+        if depth == 0:
+            packages[name.split(".")[0]] += cumulative
+    print(f"  {'package':<24} {'cumulative ms':>13}")
+    for name, seconds in packages.most_common(top):
+        print(f"  {name:<24} {seconds * 1e3:>13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default="eager,lazy", help="comma-separated: eager, lazy")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20, help="modules listed in the import profile")
+    parser.add_argument("--budget", type=float, default=BUDGET_SECONDS,
+                        help="fail when the lazy median start exceeds this many seconds")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes {sorted(unknown)}; choose from {sorted(MODES)}")
+
+    run(modes[0])  # compile bytecode and fill the OS file cache before timing
+    over = []
+    for mode in modes:
+        print(f"== {mode}: import profile")
+        report_imports(import_times(run(mode, importtime=True)[1]), args.top)
+
+        results = [run(mode)[0] for _ in range(args.runs)]
+        median = lambda key: statistics.median(r[key] for r in results)
+        total = statistics.median(r["import_seconds"] + r["serve_seconds"] for r in results)
+        print(f"== {mode}: start over {args.runs} runs (median)")
+        print(f"  import {median('import_seconds') * 1e3:8.1f} ms  first responses "
+              f"{median('serve_seconds') * 1e3:8.1f} ms  total {total * 1e3:8.1f} ms")
+        if mode == "lazy" and total > args.budget:
+            over.append(f"{mode} start {total:.3f}s exceeds the {args.budget:.3f}s budget")
+
+    for message in over:
+        print(f"FAIL: {message}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""Load test: concurrent simulated users clicking through the pages.
+
+Each simulated user opens a page, then changes its dropdowns the way a
+person would (adding and removing years, switching app type, granularity,
+country, category or methods, zooming into a line chart), pausing
+``--think`` seconds on average between changes. Every change is sent to
+``/_dash-update-component`` exactly as the browser would send it,
+including the chained RQ2 app-type callback. At the end the script reports
+throughput and p50/p95/p99/max latency per page.
+
+Against a running server::
+
+    python scripts/load_test.py --url http://127.0.0.1:8080 --users 50 --duration 120
+
+or let the script start gunicorn (see gunicorn.conf.py) on synthetic data::
+
+    python scripts/synth_data.py generate --countries 100 --out /tmp/data_big
+    python scripts/load_test.py --start-server --data-dir /tmp/data_big --users 50
+
+Dropdown values are read from the same data directory as the server's.
+The method comparison and missingness pages are driven in server-side
+mode; with ``DASHBOARD_CLIENTSIDE=1`` their figure requests fail.
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class Client:
+    """Keep-alive connection of one simulated user."""
+
+    def __init__(self, url):
+        parts = urllib.parse.urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.conn = None
+
+    def update(self, outputs, inputs, changed):
+        """POST one callback; returns (seconds, bytes on the wire, parsed response or None)."""
+        if len(outputs) == 1:
+            output = "{}.{}".format(*outputs[0])
+            outputs_json = {"id": outputs[0][0], "property": outputs[0][1]}
+        else:
+            output = ".." + "...".join(f"{i}.{p}" for i, p in outputs) + ".."
+            outputs_json = [{"id": i, "property": p} for i, p in outputs]
+        body = json.dumps({
+            "output": output,
+            "outputs": outputs_json,
+            "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+            "changedPropIds": [f"{i}.{p}" for i, p in changed],
+            "state": [],
+        })
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            self.conn.request("POST", self.prefix + "/_dash-update-component", body,
+                              {"Content-Type": "application/json", "Accept-Encoding": "gzip"})
+            response = self.conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn = None
+            return time.perf_counter() - started, 0, None
+        elapsed = time.perf_counter() - started
+        if response.status != 200:
+            return elapsed, len(payload), None
+        size = len(payload)
+        if response.getheader("Content-Encoding") == "gzip":
+            payload = gzip.decompress(payload)
+        return elapsed, size, json.loads(payload or b"{}")
+
+
+class Values:
+    """Dropdown options of every page, read from the data directory."""
+
+    def __init__(self):
+        from dashboard import comparison, countries, data, methods
+
+        daily = data.get("borda_daily")
+        self.app_types = sorted(daily["app_type"].unique())
+        self.years = sorted(int(y) for y in daily["year"].unique())
+        missingness = data.get("missingness")
+        self.missing_types = sorted(missingness["app_type"].unique())
+        self.missing_years = sorted(int(y) for y in missingness["year"].unique())
+        self.missing_countries = sorted(missingness["country"].unique())
+        self.countries = countries.countries()
+        self.country_years = countries.years()
+        self.compare_app_types = comparison.app_types()
+        self.categories = list(methods.cube("monthly").classifications)
+        self.methods = methods.METHODS
+
+
+def toggle(rng, selected, options):
+    """Add a year, or drop one while keeping at least one selected."""
+    missing = [o for o in options if o not in selected]
+    if missing and (len(selected) < 2 or rng.random() < 0.6):
+        return sorted(selected + [rng.choice(missing)])
+    return sorted(s for s in selected if s != rng.choice(selected)) or selected
+
+
+def zoom(rng, years):
+    year = rng.choice(years)
+    month = rng.randint(1, 10)
+    return {"xaxis.range[0]": f"{year}-{month:02d}-01", "xaxis.range[1]": f"{year}-{month + 2:02d}-15"}
+
+
+def rq1_session(rng, values, graph, overlays=False):
+    state = {"granularity": "monthly", "app_type": values.app_types[0], "years": values.years[-1:], "zoom": None,
+             "overlays": []}
+    changed = "granularity-dropdown"
+    for step in range(rng.randint(3, 8)):
+        if step:
+            action = rng.choice(["years", "years", "granularity", "app_type", "zoom"] + ["overlays"] * overlays)
+            state["zoom"] = None
+            if action == "overlays":
+                state["overlays"] = toggle(rng, state["overlays"], ["rolling", "yoy", "changes"])
+                changed = "overlay-checklist"
+            elif action == "years":
+                state["years"], changed = toggle(rng, state["years"], values.years), "year-dropdown"
+            elif action == "granularity":
+                state["granularity"] = "daily" if state["granularity"] == "monthly" else "monthly"
+                changed = "granularity-dropdown"
+            elif action == "app_type":
+                state["app_type"], changed = rng.choice(values.app_types), "app-type-dropdown"
+            else:
+                state["zoom"], changed = zoom(rng, state["years"]), graph
+        prop = "relayoutData" if changed == graph else "value"
+        yield [([(graph, "figure")], [
+            ("granularity-dropdown", "value", state["granularity"]),
+            ("app-type-dropdown", "value", state["app_type"]),
+            ("year-dropdown", "value", state["years"]),
+            *([("overlay-checklist", "value", state["overlays"])] if overlays else []),
+            (graph, "relayoutData", state["zoom"]),
+        ], [(changed, prop)])]
+
+
+def rq2_session(rng, values):
+    state = {"granularity": "monthly", "country": rng.choice(values.countries),
+             "years": values.country_years[-1:], "app_type": None}
+    for step in range(rng.randint(3, 8)):
+        action = "country" if not step else rng.choice(["years", "country", "granularity", "app_type"])
+        if action == "years":
+            state["years"] = toggle(rng, state["years"], values.country_years)
+        elif action == "country":
+            state["country"] = rng.choice(values.countries)
+        elif action == "granularity":
+            state["granularity"] = "daily" if state["granularity"] == "monthly" else "monthly"
+        elif action == "app_type":
+            state["app_type"] = rng.choice(values.app_types)
+        # Country and year changes first refresh the app-type dropdown; the
+        # graph request uses whatever app type that callback picked.
+        yield [
+            ([("app-type-dropdown", "options"), ("app-type-dropdown", "value")], [
+                ("country-dropdown", "value", state["country"]),
+                ("year-dropdown", "value", state["years"]),
+            ], [("country-dropdown" if action == "country" else "year-dropdown", "value")])
+            if action in ("country", "years") else None,
+            lambda response: ([("trend-graph", "figure")], [
+                ("granularity-dropdown", "value", state["granularity"]),
+                ("app-type-dropdown", "value", _picked(response, state)),
+                ("country-dropdown", "value", state["country"]),
+                ("year-dropdown", "value", state["years"]),
+                ("overlay-checklist", "value", []),
+                ("trend-graph", "relayoutData", None),
+            ], [("app-type-dropdown", "value")]),
+        ]
+
+
+def _picked(response, state):
+    picked = ((response or {}).get("response", {}).get("app-type-dropdown", {}).get("value"))
+    if picked:
+        state["app_type"] = picked
+    return state["app_type"] or "Free"
+
+
+def compare_session(rng, values):
+    state = {"granularity": "monthly", "app_type": values.compare_app_types[0],
+             "years": values.country_years[-1:], "view": "heatmap"}
+    for step in range(rng.randint(3, 8)):
+        changed = "compare-app-type-dropdown"
+        if step:
+            action = rng.choice(["years", "years", "granularity", "app_type", "view"])
+            if action == "years":
+                state["years"] = toggle(rng, state["years"], values.country_years)
+                changed = "compare-year-dropdown"
+            elif action == "granularity":
+                state["granularity"] = "daily" if state["granularity"] == "monthly" else "monthly"
+                changed = "compare-granularity-dropdown"
+            elif action == "view":
+                state["view"] = "lines" if state["view"] == "heatmap" else "heatmap"
+                changed = "compare-view-radio"
+            else:
+                state["app_type"] = rng.choice(values.compare_app_types)
+        yield [([("compare-graph", "figure")], [
+            ("compare-granularity-dropdown", "value", state["granularity"]),
+            ("compare-app-type-dropdown", "value", state["app_type"]),
+            ("compare-year-dropdown", "value", state["years"]),
+            ("compare-view-radio", "value", state["view"]),
+        ], [(changed, "value")])]
+
+
+def missing_session(rng, values):
+    state = {"type": values.missing_types[0], "years": values.missing_years[-1:],
+             "countries": values.missing_countries[:1], "view": "bars"}
+    for step in range(rng.randint(3, 8)):
+        changed = "type-dropdown"
+        if step:
+            action = rng.choice(["years", "countries", "countries", "type", "view"])
+            if action == "years":
+                state["years"], changed = toggle(rng, state["years"], values.missing_years), "year-dropdown"
+            elif action == "view":
+                state["view"] = "heatmap" if state["view"] == "bars" else "bars"
+                changed = "view-radio"
+            elif action == "countries":
+                state["countries"] = toggle(rng, state["countries"], values.missing_countries)
+                changed = "country-dropdown"
+            else:
+                state["type"] = rng.choice(values.missing_types)
+        yield [([("missingness-graph", "figure")], [
+            ("type-dropdown", "value", state["type"]),
+            ("year-dropdown", "value", state["years"]),
+            ("country-dropdown", "value", state["countries"]),
+            ("view-radio", "value", state["view"]),
+        ], [(changed, "value")])]
+
+
+METHOD_DROPDOWNS = {
+    "years": "year-dropdown",
+    "category": "category-dropdown",
+    "methods": "method-dropdown",
+    "granularity": "granularity-dropdown",
+    "app_type": "app-type-dropdown",
+    "bands": "band-checklist",
+}
+
+
+def methods_session(rng, values):
+    state = {"app_type": values.app_types[0], "methods": list(values.methods), "years": values.years[-1:],
+             "category": rng.choice(values.categories), "granularity": "monthly", "bands": []}
+    for step in range(rng.randint(3, 8)):
+        changed = "app-type-dropdown"
+        if step:
+            action = rng.choice(["years", "category", "category", "methods", "granularity", "app_type", "bands"])
+            changed = METHOD_DROPDOWNS[action]
+            if action == "years":
+                state["years"] = toggle(rng, state["years"], values.years)
+            elif action == "category":
+                state["category"] = rng.choice(values.categories)
+            elif action == "methods":
+                state["methods"] = toggle(rng, state["methods"], values.methods)
+            elif action == "granularity":
+                state["granularity"] = "daily" if state["granularity"] == "monthly" else "monthly"
+            elif action == "bands":
+                state["bands"] = [] if state["bands"] else ["bands"]
+            else:
+                state["app_type"] = rng.choice(values.app_types)
+        yield [([("trend-graphx", "figure")], [
+            ("app-type-dropdown", "value", state["app_type"]),
+            ("method-dropdown", "value", state["methods"]),
+            ("year-dropdown", "value", state["years"]),
+            ("category-dropdown", "value", state["category"]),
+            ("granularity-dropdown", "value", state["granularity"]),
+            ("band-checklist", "value", state["bands"]),
+        ], [(changed, "value")])]
+
+
+PAGES = {
+    "rq1": (3, lambda rng, values: rq1_session(rng, values, "global-trend-graph", overlays=True)),
+    "rq1_1": (2, lambda rng, values: rq1_session(rng, values, "stacked-bar-chart")),
+    "rq2": (3, rq2_session),
+    "rq2_compare": (1, compare_session),
+    "missing": (1, missing_session),
+    "method_trends": (1, methods_session),
+}
+
+
+def user(url, values, pages, deadline, think, seed, results, lock):
+    rng = random.Random(seed)
+    client = Client(url)
+    names = list(pages)
+    weights = [PAGES[name][0] for name in names]
+    while time.monotonic() < deadline:
+        page = rng.choices(names, weights)[0]
+        for requests in PAGES[page][1](rng, values):
+            response = None
+            for request in requests:
+                if request is None:
+                    continue
+                if callable(request):
+                    request = request(response)
+                elapsed, size, response = client.update(*request)
+                label = page if request[0][0][1] == "figure" else f"{page}_dropdown"
+                with lock:
+                    results.append((label, elapsed, size, response is not None))
+            if time.monotonic() >= deadline:
+                return
+            time.sleep(rng.expovariate(1 / think) if think else 0)
+
+
+def report(results, duration):
+    pages = {}
+    for label in sorted({r[0] for r in results}):
+        rows = [r for r in results if r[0] == label]
+        latencies = sorted(r[1] for r in rows if r[3])
+        quantile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3 if latencies else None
+        pages[label] = {
+            "requests": len(rows),
+            "errors": sum(1 for r in rows if not r[3]),
+            "throughput_rps": len(rows) / duration,
+            "p50_ms": statistics.median(latencies) * 1e3 if latencies else None,
+            "p95_ms": quantile(0.95),
+            "p99_ms": quantile(0.99),
+            "max_ms": latencies[-1] * 1e3 if latencies else None,
+            "mean_bytes": statistics.mean(r[2] for r in rows),
+        }
+    return pages
+
+
+def start_server(port, data_dir):
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1")
+    if data_dir:
+        env["DASHBOARD_DATA_DIR"] = os.path.abspath(data_dir)
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:server"],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(600):
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/readyz")
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("server did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--start-server", action="store_true", help="start gunicorn on the --url port")
+    parser.add_argument("--data-dir", help="data directory (default: DASHBOARD_DATA_DIR or data/)")
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a user's changes")
+    parser.add_argument("--pages", nargs="*", choices=list(PAGES), help="only these pages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        os.environ["DASHBOARD_DATA_DIR"] = os.path.abspath(args.data_dir)
+    values = Values()
+
+    server = start_server(urllib.parse.urlsplit(args.url).port or 80, args.data_dir) if args.start_server else None
+    try:
+        results, lock = [], threading.Lock()
+        deadline = time.monotonic() + args.duration
+        started = time.monotonic()
+        threads = [threading.Thread(target=user, args=(args.url, values, args.pages or list(PAGES), deadline,
+                                                        args.think, args.seed + i, results, lock))
+                   for i in range(args.users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.monotonic() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    pages = report(results, duration)
+    print(f"{args.users} users, {duration:.0f}s, {len(results) / duration:.1f} requests/s")
+    print(f"{'page':<24} {'requests':>8} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8}"
+    for label, entry in pages.items():
+        print(f"{label:<24} {entry['requests']:>8} {entry['errors']:>6} {entry['throughput_rps']:>7.2f} "
+              f"{fmt(entry['p50_ms'])} {fmt(entry['p95_ms'])} {fmt(entry['p99_ms'])} {fmt(entry['max_ms'])}")
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({"users": args.users, "duration_s": duration, "think_s": args.think, "pages": pages}, fh,
+                      indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Synthetic datasets for benchmarking and load testing.
+
+``scale`` writes a schema-compatible copy of ``data/`` that is
+``--factor`` times larger, along one of two axes:
+
+``categories`` (default)
+    every classification gets ``factor - 1`` synthetic siblings
+    ("Cognitive Development #2", ...) with jittered scores, so each
+    selection holds ``factor`` times the rows and traces.
+``years``
+    the history is repeated ``factor - 1`` times further into the past,
+    so there are ``factor`` times as many years to select.
+
+Relative scores are recomputed per (time, app_type) after scaling.
+``missingness_by_rank.csv`` is scaled along the years axis only and copied
+otherwise.
+
+``generate`` builds every table from scratch for any number of countries,
+years and categories: the ``global_borda*`` files, ``missingness_by_rank.csv``
+and ``by_country_year/{country}_{year}.csv``. Category shares follow a
+random walk per country and app type, and the global tables are the sums
+of the per-country ones, so RQ1 and RQ2 stay consistent with each other.
+
+    python scripts/synth_data.py scale --factor 10 --out /tmp/data_x10
+    python scripts/synth_data.py generate --countries 100 --years 2010-2024 --out /tmp/data_big
+    DASHBOARD_DATA_DIR=/tmp/data_x10 python scripts/bench_callbacks.py --out x10.json
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dashboard import data, methods  # noqa: E402
+
+# pandas timestamps start in 1677
+MIN_YEAR = 1678
+
+MAX_RANK = 200
+BIN_WIDTH = 10
+APP_TYPES = ["Free", "Paid"]
+COUNTRIES = ["be", "ch", "de", "dk", "es", "fr", "gb", "it", "jp", "no", "pl", "us"]
+CATEGORIES = [
+    "Cognitive Development", "Education", "Education Management", "Entertainment", "Entitlement",
+    "Hobby", "Licensing Exam", "Non-Education", "Parents", "Preschool", "Professional & Career",
+    "Subject Learning", "Teaching and Learning", "Translating", "Well-being",
+]
+
+
+def kept(classification):
+    """Rows whose category is shown by the pages, and so worth replicating."""
+    text = classification.astype(str)
+    return (classification.notna() & ~text.isin(methods.EXCLUDED)
+            & ~text.str.lower().str.startswith(methods.EXCLUDED_PREFIX))
+
+
+def scale_categories(df, factor, rng):
+    copies = [df]
+    source = df[kept(df["classification"])]
+    for k in range(2, factor + 1):
+        copy = source.assign(classification=source["classification"] + f" #{k}")
+        copy["score_borda"] = copy["score_borda"] * rng.lognormal(0, 0.3, len(copy))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def scale_years(df, factor, time_cols, span):
+    copies = [df]
+    for k in range(1, factor):
+        copy = df.copy()
+        for col in time_cols:
+            copy[col] = copy[col] - pd.DateOffset(years=k * span)
+        copies.append(copy)
+    # Feb 29 lands on Feb 28 in non-leap years; keep one of the two rows.
+    keys = [c for c in df.columns if c not in ("score_borda", "relative_score", "unknown_ratio")]
+    return pd.concat(copies, ignore_index=True).drop_duplicates(keys)
+
+
+def relative(df, time_col):
+    total = df.groupby([time_col, "app_type"])["score_borda"].transform("sum")
+    return df.assign(relative_score=df["score_borda"] / total)
+
+
+def scale_file(source, target, time_cols, args, rng, span):
+    df = pd.read_csv(source)
+    for col in time_cols:
+        df[col] = pd.to_datetime(df[col])
+    if args.axis == "categories":
+        df = scale_categories(df, args.factor, rng)
+    else:
+        df = scale_years(df, args.factor, time_cols, span)
+    if "relative_score" in df:
+        df = relative(df, time_cols[0])
+    for col in time_cols:
+        df[col] = df[col].dt.strftime("%Y-%m-%d")
+    df.sort_values(list(df.columns[:3]), kind="stable").to_csv(target, index=False)
+    return len(df)
+
+
+def scale(args):
+    rng = np.random.default_rng(args.seed)
+    daily = pd.read_csv(data.path("borda_daily"), usecols=["date"], parse_dates=["date"])
+    first, last = daily["date"].dt.year.min(), daily["date"].dt.year.max()
+    span = last - first + 1
+    if args.axis == "years" and first - (args.factor - 1) * span < MIN_YEAR:
+        sys.exit(f"--axis years supports at most --factor {(first - MIN_YEAR) // span + 1} for this data")
+
+    os.makedirs(os.path.join(args.out, "by_country_year"), exist_ok=True)
+    for name, (fname, time_col) in data.DATASETS.items():
+        target = os.path.join(args.out, fname)
+        if time_col is None:
+            if args.axis == "years":
+                df = pd.read_csv(data.path(name))
+                df = pd.concat([df.assign(year=df["year"] - k * span) for k in range(args.factor)])
+                df.sort_values(["year", "country"], kind="stable").to_csv(target, index=False)
+            else:
+                shutil.copy(data.path(name), target)
+            continue
+        rows = scale_file(data.path(name), target, [time_col], args, rng, span)
+        print(f"{fname}: {rows} rows")
+
+    # Per-country files keep their {country}_{year}.csv names, so they are
+    # only scaled along the categories axis.
+    for source in sorted(glob.glob(os.path.join(data.DATA_DIR, "by_country_year", "*.csv"))):
+        target = os.path.join(args.out, "by_country_year", os.path.basename(source))
+        if args.axis == "categories":
+            scale_file(source, target, ["date", "month"], args, rng, span)
+        else:
+            shutil.copy(source, target)
+
+
+def generate(args):
+    rng = np.random.default_rng(args.seed)
+    first, last = (int(y) for y in args.years.split("-"))
+    days = pd.date_range(f"{first}-01-01", f"{last}-12-31", freq="D")
+    months = days.to_period("M").to_timestamp()
+    countries = (COUNTRIES + [f"x{i:03d}" for i in range(args.countries)])[:args.countries]
+    categories = (CATEGORIES + [f"Category {i}" for i in range(len(CATEGORIES) + 1, args.categories + 1)])[:args.categories]
+    shape = (len(APP_TYPES), len(categories), len(days))
+
+    os.makedirs(os.path.join(args.out, "by_country_year"), exist_ok=True)
+    score_total, count_total = np.zeros(shape), np.zeros(shape)
+    median_total = np.zeros(shape)
+    missing = []
+    for country in countries:
+        # Per app type: share of unlabelled apps, drifting category shares
+        # and drifting mean Borda points per listed app.
+        unknown = rng.beta(2, 6, len(APP_TYPES))
+        logits = rng.normal(0, 1, shape[:2])[..., None] + rng.normal(0, 0.05, shape).cumsum(axis=2)
+        shares = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+        counts = shares * (MAX_RANK * (1 - unknown))[:, None, None]
+        points = np.clip(rng.uniform(60, 140, shape[:2])[..., None] + rng.normal(0, 1, shape).cumsum(axis=2),
+                         1, MAX_RANK)
+        scores = np.round(counts * points)
+        score_total += scores
+        count_total += counts
+        median_total += counts * points * rng.uniform(0.85, 1.15, shape)
+
+        frame = _long(days, categories, scores, "date")
+        frame["month"] = frame["date"].to_numpy().astype("datetime64[M]").astype("datetime64[ns]")
+        frame = frame[frame["score_borda"] > 0]
+        for year, block in frame.groupby(frame["date"].dt.year):
+            block = block[["date", "month", "app_type", "classification", "score_borda"]]
+            _write(block, os.path.join(args.out, "by_country_year", f"{country}_{year}.csv"), ["date", "month"])
+
+        bins = np.arange(0, MAX_RANK, BIN_WIDTH)
+        for a, app_type in enumerate(APP_TYPES):
+            # free apps lose labels further down the list, paid apps near the top
+            slope = np.linspace(-0.5, 0.5, len(bins)) * (1 if app_type == "Free" else -1)
+            for year in range(first, last + 1):
+                ratio = np.clip(unknown[a] * (1 + slope) + rng.normal(0, 0.03, len(bins)), 0, 1) * 100
+                missing.append(pd.DataFrame({
+                    "year": year, "country": country, "rank_bin": [f"[{b}, {b + BIN_WIDTH})" for b in bins],
+                    "app_type": app_type, "unknown_ratio": ratio,
+                }))
+        print(f"{country}: {len(frame)} rows")
+
+    month_codes, month_index = pd.factorize(months)
+    for granularity, time_col in [("daily", "date"), ("monthly", "month")]:
+        if granularity == "daily":
+            times, borda, count, median = days, score_total, count_total, median_total
+        else:
+            times = month_index
+            borda, count, median = (_sum_months(a, month_codes, len(month_index))
+                                    for a in (score_total, count_total, median_total))
+        mean = np.divide(borda, count, out=np.zeros_like(borda), where=count > 0)
+        median = np.divide(median, count, out=np.zeros_like(median), where=count > 0)
+        for method, values in [("borda", borda), ("mean", mean), ("median", median)]:
+            frame = _long(times, categories, values, time_col)
+            total = frame.groupby([time_col, "app_type"])["score_borda"].transform("sum")
+            frame["relative_score"] = frame["score_borda"] / total
+            _write(frame, os.path.join(args.out, data.DATASETS[f"{method}_{granularity}"][0]), [time_col])
+            print(f"{method}_{granularity}: {len(frame)} rows")
+
+    pd.concat(missing, ignore_index=True).to_csv(os.path.join(args.out, data.DATASETS["missingness"][0]),
+                                                 index=False)
+
+
+def _long(times, categories, values, time_col):
+    """Long (time, app_type, classification, score_borda) rows of an (app_type, category, time) array."""
+    a, k, t = values.shape
+    return pd.DataFrame({
+        time_col: np.tile(times, a * k),
+        "app_type": np.repeat(APP_TYPES, k * t),
+        "classification": np.tile(np.repeat(categories, t), a),
+        "score_borda": values.reshape(-1),
+    }).sort_values([time_col, "app_type", "classification"], kind="stable")
+
+
+def _sum_months(values, codes, n):
+    out = np.zeros(values.shape[:2] + (n,))
+    np.add.at(out, (slice(None), slice(None), codes), values)
+    return out
+
+
+def _write(frame, path, time_cols):
+    frame = frame.assign(**{col: frame[col].dt.strftime("%Y-%m-%d") for col in time_cols})
+    frame.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scale_parser = commands.add_parser("scale", help="scale up a copy of data/")
+    scale_parser.add_argument("--factor", type=int, required=True, help="scale factor, e.g. 10 or 100")
+    scale_parser.add_argument("--axis", choices=["categories", "years"], default="categories")
+
+    generate_parser = commands.add_parser("generate", help="generate every table from scratch")
+    generate_parser.add_argument("--countries", type=int, default=len(COUNTRIES))
+    generate_parser.add_argument("--years", default="2017-2023", help="first-last year, e.g. 2010-2024")
+    generate_parser.add_argument("--categories", type=int, default=len(CATEGORIES))
+
+    for sub in (scale_parser, generate_parser):
+        sub.add_argument("--out", required=True, help="output data directory")
+        sub.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "scale":
+        scale(args)
+    else:
+        generate(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def fresh_app():
+    """Run ``script`` in a new interpreter with ``env`` and return the JSON it prints last.
+
+    The app reads its ``DASHBOARD_*`` settings at import, so each setting
+    needs its own process.
+    """
+    def run(script, **env):
+        env = dict(os.environ, **env)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+        result = subprocess.run([sys.executable, "-c", script], env=env, cwd=ROOT,
+                                capture_output=True, text=True, timeout=300)
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    return run
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: starts fresh interpreters; deselect with -m 'not slow'")
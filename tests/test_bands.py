@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from dashboard import bands
+
+
+def task(m=0, month="2023-03-01", days=31, seed=0):
+    """(method index, month, scores) with 2 app types x 3 categories; category 2 never scores."""
+    rng = np.random.default_rng(seed)
+    scores = rng.gamma(2.0, 50.0, size=(2, 3, days))
+    scores[:, 2, :] = 0
+    return m, pd.Timestamp(month), scores
+
+
+def test_bootstrap_is_reproducible():
+    first = bands.bootstrap_month(task())
+    second = bands.bootstrap_month(task())
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_seed_depends_on_method_and_month():
+    base = bands.bootstrap_month(task())[0]
+    assert not np.allclose(base, bands.bootstrap_month(task(m=1))[0], equal_nan=True)
+    assert not np.allclose(base, bands.bootstrap_month(task(month="2023-04-01"))[0], equal_nan=True)
+
+
+def test_band_brackets_the_observed_share():
+    lower, upper = bands.bootstrap_month(task())
+    assert np.all(lower[:, :2] <= 0) and np.all(upper[:, :2] >= 0)
+    assert np.isnan(lower[:, 2]).all() and np.isnan(upper[:, 2]).all()
+
+
+def test_pool_matches_serial(monkeypatch):
+    tasks = [task(m, month, seed=i) for i, (m, month) in
+             enumerate([(0, "2023-01-01"), (1, "2023-01-01"), (0, "2023-02-01"), (2, "2023-03-01")])]
+    tasks.insert(2, task(month="2023-04-01", days=0))
+    serial = bands._run(tasks, workers=1)
+    monkeypatch.setattr(bands, "PARALLEL_MIN_RESAMPLES", 0)
+    pooled = bands._run(tasks, workers=2)
+    assert len(serial) == len(pooled) == len(tasks)
+    for (a_lower, a_upper), (b_lower, b_upper) in zip(serial, pooled):
+        np.testing.assert_array_equal(a_lower, b_lower)
+        np.testing.assert_array_equal(a_upper, b_upper)
+    assert np.isnan(serial[2][0]).all()
@@ -0,0 +1,79 @@
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+from dashboard import cache
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "scores.csv"
+    pd.DataFrame({"app_type": ["Free", "Paid", "Free"], "score": [1.0, 2.0, 3.0]}).to_csv(path, index=False)
+    return path
+
+
+def load(source, directory, calls):
+    def parse():
+        calls.append(source)
+        return pd.read_csv(source)
+    return cache.load("scores", str(source), parse, 1, str(directory))
+
+
+def test_entry_is_reused_while_the_source_is_unchanged(source, tmp_path):
+    calls = []
+    first = load(source, tmp_path / "cache", calls)
+    second = load(source, tmp_path / "cache", calls)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert second["app_type"].tolist() == ["Free", "Paid", "Free"]
+
+
+def test_changed_size_rebuilds(source, tmp_path):
+    calls = []
+    load(source, tmp_path / "cache", calls)
+    with open(source, "a") as fh:
+        fh.write("Paid,4.0\n")
+    frame = load(source, tmp_path / "cache", calls)
+    assert len(calls) == 2
+    assert frame["score"].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_changed_mtime_and_content_rebuilds(source, tmp_path):
+    calls = []
+    load(source, tmp_path / "cache", calls)
+    source.write_text(source.read_text().replace("2.0", "5.0"))  # same size
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    frame = load(source, tmp_path / "cache", calls)
+    assert len(calls) == 2
+    assert frame["score"].tolist() == [1.0, 5.0, 3.0]
+
+
+def test_touched_source_keeps_entry_and_refreshes_manifest(source, tmp_path):
+    calls = []
+    load(source, tmp_path / "cache", calls)
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    load(source, tmp_path / "cache", calls)
+    assert len(calls) == 1
+    manifest = cache._read_manifest("scores", str(tmp_path / "cache"))
+    assert manifest["mtime_ns"] == os.stat(source).st_mtime_ns
+
+
+def test_parser_version_invalidates(source, tmp_path):
+    calls = []
+    load(source, tmp_path / "cache", calls)
+    cache.load("scores", str(source), lambda: calls.append(source) or pd.read_csv(source), 2, str(tmp_path / "cache"))
+    assert len(calls) == 2
+
+
+def test_files_get_the_umask_mode(source, tmp_path):
+    old = os.umask(0o027)
+    try:
+        load(source, tmp_path / "cache", [])
+    finally:
+        os.umask(old)
+    for path in (tmp_path / "cache").iterdir():
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
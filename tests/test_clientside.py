@@ -0,0 +1,32 @@
+SCRIPT = """
+import json
+import app
+from dashboard import warmup
+
+client = app.server.test_client()
+client.get("/")
+layout = warmup.page_module("dash_method_trends").layout()
+ids = [c.id for c in [layout, *layout._traverse()] if getattr(c, "id", None)]
+print(json.dumps({"ids": ids, "dependencies": client.get("/_dash-dependencies").get_json()}))
+"""
+
+# Everything the browser filters by itself once the bundles are loaded.
+BROWSER_ONLY = {"method-dropdown", "year-dropdown", "category-dropdown"}
+
+
+def test_method_filters_stay_in_the_browser(fresh_app):
+    found = fresh_app(SCRIPT, DASHBOARD_CLIENTSIDE="1", DASHBOARD_LAZY_PAGES="0")
+    on_page = set(found["ids"])
+    server = []
+    for dependency in found["dependencies"]:
+        if dependency.get("clientside_function"):
+            continue
+        outputs = {o.split(".")[0] for o in dependency["output"].strip(".").split("...")}
+        inputs = {i["id"] for i in dependency["inputs"]}
+        # Dash only fires a callback whose inputs and outputs are all on the page.
+        if outputs <= on_page and inputs <= on_page:
+            server.append((outputs, inputs))
+
+    assert server, "no server callback found for the method page"
+    for outputs, inputs in server:
+        assert not inputs & BROWSER_ONLY, (outputs, inputs)
@@ -0,0 +1,49 @@
+SCRIPT = """
+import json, os
+from dashboard import comparison, countries, data, store
+
+data.VERSION_CHECK_SECONDS = 0
+source = os.path.join(data.DATA_DIR, "by_country_year", "de_2023.csv")
+
+
+def write(games):
+    with open(source, "w") as fh:
+        fh.write("date,month,app_type,classification,score_borda\\n")
+        fh.write(f"2023-01-01,2023-01-01,Free,Games,{games}\\n")
+        fh.write("2023-01-01,2023-01-01,Free,Maths,100.0\\n")
+    # Make sure the change is visible even on a coarse filesystem clock.
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9 * len(found)))
+
+
+def share():
+    block = countries.country_cube("de", 2023, "Free", "monthly")[("Free", 2023)]
+    across = comparison.year_cube("monthly", "Free", 2023).long()
+    return (float(block.loc[block["classification"] == "Games", "relative_score"].iloc[0]),
+            float(across.loc[across["classification"] == "Games", "relative_score"].iloc[0]),
+            countries.from_store())
+
+
+found = []
+os.makedirs(os.path.dirname(source))
+write(100.0)
+found.append(share())
+write(300.0)
+found.append(share())
+if os.environ.get("BUILD_STORE"):
+    store.build()
+    found.append(share())
+    write(100.0)
+    found.append(share())
+print(json.dumps(found))
+"""
+
+
+def test_shares_follow_a_replaced_file(fresh_app, tmp_path):
+    found = fresh_app(SCRIPT, DASHBOARD_DATA_DIR=str(tmp_path))
+    assert found == [[50.0, 50.0, False], [75.0, 75.0, False]]
+
+
+def test_a_stale_store_is_not_used(fresh_app, tmp_path):
+    found = fresh_app(SCRIPT, DASHBOARD_DATA_DIR=str(tmp_path), BUILD_STORE="1")
+    assert found == [[50.0, 50.0, False], [75.0, 75.0, False], [75.0, 75.0, True], [50.0, 50.0, False]]
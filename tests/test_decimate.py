@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from dashboard import decimate
+
+
+@pytest.mark.parametrize("size, n", [(1000, 600), (1000, 3), (601, 600), (10_000, 50)])
+def test_lttb_keeps_endpoints_in_order(size, n):
+    rng = np.random.default_rng(0)
+    x = np.arange(size)
+    y = rng.normal(size=size).cumsum()
+    indices = decimate.lttb(x, y, n)
+    assert len(indices) == n
+    assert indices[0] == 0 and indices[-1] == size - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_returns_every_point_when_short():
+    assert decimate.lttb(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    assert decimate.lttb(np.arange(5), np.arange(5), 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[437] = 10
+    assert 437 in decimate.lttb(np.arange(1000), y, 50)
@@ -0,0 +1,29 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client():
+    return app.server.test_client()
+
+
+@pytest.mark.parametrize("kind, name, values", [
+    ("rq1", "years", ["2022,2023", "2023,2022", "2022,2022,2023"]),
+    ("methods", "categories", ["Cognitive Development,Subject Learning", "Subject Learning,Cognitive Development,Cognitive Development"]),
+])
+def test_equal_etags_have_equal_bodies(client, kind, name, values):
+    found = set()
+    for value in values:
+        # Streamed: read each body before the next request.
+        response = client.get(f"/export/{kind}", query_string={name: value})
+        assert response.status_code == 200
+        found.add((response.headers["ETag"], response.get_data()))
+    assert len(found) == 1
+
+
+def test_repeat_download_is_not_modified(client):
+    first = client.get("/export/rq1?years=2022")
+    first.get_data()
+    again = client.get("/export/rq1?years=2022", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,31 @@
+from dashboard import figures
+
+
+def test_lists_are_sorted_and_deduplicated():
+    assert figures.normalise([2023, 2021, 2023]) == [2021, 2023]
+    assert figures.normalise({"Mean", "Borda"}) == ["Borda", "Mean"]
+
+
+def test_mixed_types_sort_without_error():
+    assert figures.normalise([2, "a", 1]) == [1, 2, "a"]
+
+
+def test_tuples_stay_positional():
+    assert figures.normalise((20, 10)) == (20, 10)
+
+
+def test_scalars_are_unchanged():
+    assert figures.normalise("daily") == "daily"
+    assert figures.normalise(None) is None
+
+
+def test_equivalent_selections_share_a_key():
+    key = figures.make_key("rq1", ["daily", "Free", [2023, 2022]])
+    assert key == figures.make_key("rq1", ["daily", "Free", [2022, 2023, 2022]])
+    assert key != figures.make_key("rq1", ["monthly", "Free", [2022, 2023]])
+    assert key != figures.make_key("rq2", ["daily", "Free", [2022, 2023]])
+
+
+def test_zoom_ranges_in_either_order_get_different_keys():
+    assert figures.make_key("rq1", [("2020-01-01", "2021-01-01")]) != \
+        figures.make_key("rq1", [("2021-01-01", "2020-01-01")])
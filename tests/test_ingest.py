@@ -0,0 +1,49 @@
+import filecmp
+
+import pandas as pd
+
+from dashboard import ingest, pipeline
+from test_pipeline import raw_rankings
+
+OUTPUTS = [pattern.format(g) for g in ["daily", "monthly"] for pattern in pipeline.METHOD_FILES.values()]
+OUTPUTS.append(pipeline.MISSINGNESS_FILE)
+
+
+def build_both(tmp_path, raw):
+    """Write ``raw`` as two CSV files, then build the tables with the pipeline and with ingest."""
+    paths = [tmp_path / "part-1.csv", tmp_path / "part-2.csv"]
+    raw.iloc[:len(raw) // 2].to_csv(paths[0], index=False)
+    raw.iloc[len(raw) // 2:].to_csv(paths[1], index=False)
+    expected, actual = tmp_path / "pipeline", tmp_path / "ingest"
+    expected.mkdir()
+    actual.mkdir()
+    pipeline.build(pipeline.read_raw(paths), expected)
+    # Small chunks, so rows of one day are split across chunks and workers.
+    report = ingest.ingest(paths, actual, workers=2, chunk_bytes=16_384)
+    return expected, actual, report
+
+
+def test_ingest_matches_the_pipeline(tmp_path):
+    expected, actual, report = build_both(tmp_path, raw_rankings())
+    assert report["chunks"] > 4
+    for name in OUTPUTS:
+        assert filecmp.cmp(expected / name, actual / name, shallow=False), name
+
+
+def test_later_appends_work_on_an_ingested_tree(tmp_path):
+    raw = raw_rankings()
+    first, last = raw[raw["date"] < "2023-01-20"], raw[raw["date"] >= "2023-01-20"]
+    expected, actual, _ = build_both(tmp_path, first)
+    pipeline.append(last, expected)
+    pipeline.append(last, actual)
+    for name in OUTPUTS:
+        pd.testing.assert_frame_equal(pd.read_csv(actual / name), pd.read_csv(expected / name),
+                                      check_exact=False, obj=name)
+
+
+def test_empty_input_writes_empty_tables(tmp_path):
+    raw = raw_rankings().iloc[:0]
+    expected, actual, report = build_both(tmp_path, raw)
+    assert report["rows"] == 0
+    for name in OUTPUTS:
+        assert filecmp.cmp(expected / name, actual / name, shallow=False), name
@@ -0,0 +1,43 @@
+SCRIPT = """
+import json
+import dash
+import app
+from dashboard import lazy
+
+
+def outputs(client):
+    return sorted([d["output"], sorted(str(i["id"]) for i in d["inputs"])]
+                  for d in client.get("/_dash-dependencies").get_json())
+
+
+client = app.server.test_client()
+visits = []
+for module, meta in lazy.pages().items():
+    assert client.get(meta["path"]).status_code == 200
+    layout = dash.page_registry[module]["layout"]
+    layout = layout() if callable(layout) else layout
+    ids = [c.id for c in [layout, *layout._traverse()] if isinstance(getattr(c, "id", None), str)]
+    visits.append({"module": module, "ids": ids, "outputs": outputs(client)})
+print(json.dumps({"visits": visits, "outputs": outputs(client)}))
+"""
+
+
+def ids(callback):
+    output, inputs = callback
+    return {o.split(".")[0] for o in output.strip(".").split("...")} | set(inputs)
+
+
+def test_lazy_pages_get_their_callbacks(fresh_app):
+    eager = fresh_app(SCRIPT, DASHBOARD_LAZY_PAGES="0")
+    lazy = fresh_app(SCRIPT, DASHBOARD_LAZY_PAGES="1")
+
+    assert [v["module"] for v in lazy["visits"]] == [v["module"] for v in eager["visits"]]
+    assert lazy["outputs"] == eager["outputs"]
+    with_callbacks = 0
+    for visit in lazy["visits"]:
+        # Every callback Dash can fire on the page is known by the time the page is served.
+        on_page = [c for c in eager["outputs"] if ids(c) <= set(visit["ids"])]
+        with_callbacks += bool(on_page)
+        for callback in on_page:
+            assert callback in visit["outputs"], (visit["module"], callback)
+    assert with_callbacks >= 6
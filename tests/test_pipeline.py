@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import pipeline
+
+
+def raw_rankings(seed=0):
+    """Rankings of 2 countries x 2 app types over late December to early February."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for date in pd.date_range("2022-12-25", "2023-02-05"):
+        for country in ["DE", "us"]:
+            for app_type in ["Free", "Paid"]:
+                ranks = np.arange(40)
+                classification = rng.choice(["Games", "Maths", "Language", "Unknown", None], size=len(ranks))
+                rows.append(pd.DataFrame({
+                    "date": date.strftime("%Y-%m-%d"), "country": country, "app_type": app_type,
+                    "rank": ranks, "app_id": [f"app{i}" for i in rng.integers(0, 100, size=len(ranks))],
+                    "classification": classification,
+                }))
+    return pd.concat(rows, ignore_index=True)
+
+
+def tables(out_dir):
+    names = [pattern.format(g) for g in ["daily", "monthly"] for pattern in pipeline.METHOD_FILES.values()]
+    found = {}
+    for name in names + [pipeline.MISSINGNESS_FILE]:
+        frame = pd.read_csv(out_dir / name)
+        keys = list(frame.select_dtypes(exclude="float").columns)
+        found[name] = frame.sort_values(keys).reset_index(drop=True)
+    return found
+
+
+@pytest.mark.parametrize("splits", [["2023-01-01"], ["2023-01-15", "2023-01-16", "2023-02-01"]])
+def test_appends_match_a_full_build(tmp_path, splits):
+    raw = raw_rankings()
+    full, incremental = tmp_path / "full", tmp_path / "incremental"
+    full.mkdir()
+    incremental.mkdir()
+    pipeline.build(raw, full)
+
+    edges = [None, *splits, None]
+    pipeline.build(raw[raw["date"] < splits[0]], incremental)
+    for start, end in zip(edges[1:-1], edges[2:]):
+        part = raw[(raw["date"] >= start) & ((raw["date"] < end) if end else True)]
+        pipeline.append(part, incremental)
+
+    expected, actual = tables(full), tables(incremental)
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name], check_exact=False, obj=name)
+
+
+def test_appending_an_aggregated_date_fails(tmp_path):
+    raw = raw_rankings()
+    pipeline.build(raw, tmp_path)
+    with pytest.raises(ValueError, match="already aggregated"):
+        pipeline.append(raw[raw["date"] == "2023-01-10"], tmp_path)
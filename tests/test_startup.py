@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import statistics
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("bench_startup", os.path.join(ROOT, "scripts", "bench_startup.py"))
+bench_startup = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_startup)
+
+
+@pytest.mark.slow
+def test_lazy_start_is_within_budget():
+    bench_startup.run("lazy")  # compile bytecode and fill the OS file cache
+    totals = [sum(bench_startup.run("lazy")[0].values()) for _ in range(3)]
+    assert statistics.median(totals) <= bench_startup.BUDGET_SECONDS
@@ -0,0 +1,25 @@
+"""Production WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+With ``preload_app`` (the default in gunicorn.conf.py) this module is
+imported once in the gunicorn master: the datasets are loaded here, before
+the workers are forked, and every worker shares them copy-on-write. Set
+``DASHBOARD_PRELOAD=0`` to skip preloading and let pages load data on
+first use. With lazy page modules (``DASHBOARD_LAZY_PAGES=1``, see
+:mod:`dashboard.lazy`) preloading is off unless set to 1.
+"""
+import gc
+import logging
+import os
+
+from app import app, server  # noqa: F401
+from dashboard import health, lazy
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+if os.environ.get("DASHBOARD_PRELOAD", "0" if lazy.ENABLED else "1") != "0":
+    health.preload()
+    # Keep the preloaded objects out of the collector's generations so
+    # collections in the workers do not touch (and copy) their pages.
+    gc.freeze()